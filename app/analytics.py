@@ -0,0 +1,141 @@
+"""Sales rollups for the admin analytics endpoint.
+
+``sales_daily`` (per day) and ``sales_daily_products`` (per day and product)
+hold order counts, units and revenue. Checkout queues an
+``analytics.record_order`` job (app.jobs) that adds each new order to them
+(``record_order``), so reports read a few rows per day instead of
+aggregating ``orders``/``order_items``. ``backfill`` rebuilds both tables
+from the full history in two ``INSERT ... SELECT`` statements, e.g. after
+bulk-loading orders:
+
+    python -m app.analytics backfill
+"""
+import argparse
+import time
+from collections import defaultdict
+from datetime import date, datetime
+
+from sqlalchemy import distinct, func, insert, select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.config import Settings
+from app.database import Base, make_engine, upsert_increments
+
+ROLLUP_COLUMNS = ("orders", "units", "revenue")
+
+sales_daily = models.SalesDaily.__table__
+sales_daily_products = models.SalesDailyProduct.__table__
+orders = models.Order.__table__
+order_items = models.OrderItem.__table__
+
+
+def record_order(db: Session, created_at: datetime, items):
+    """Add an order's ``items`` (dicts of product_id, quantity, price) to the rollups.
+
+    Runs in the caller's transaction (the job's, so a retried job never
+    counts an order twice).
+    """
+    day = created_at.date()
+    per_product = defaultdict(lambda: {"units": 0, "revenue": 0.0})
+    for item in items:
+        per_product[item["product_id"]]["units"] += item["quantity"]
+        per_product[item["product_id"]]["revenue"] += item["price"] * item["quantity"]
+    upsert_increments(db, sales_daily, ("day",), [{
+        "day": day,
+        "orders": 1,
+        "units": sum(totals["units"] for totals in per_product.values()),
+        "revenue": sum(totals["revenue"] for totals in per_product.values()),
+    }], ROLLUP_COLUMNS)
+    upsert_increments(db, sales_daily_products, ("day", "product_id"), [
+        {"day": day, "product_id": product_id, "orders": 1, **totals}
+        for product_id, totals in sorted(per_product.items())
+    ], ROLLUP_COLUMNS)
+
+
+def backfill(engine) -> dict:
+    """Replace both rollups with aggregates of every stored order."""
+    day = func.date(orders.c.created_at)
+    revenue = func.sum(order_items.c.price * order_items.c.quantity)
+    sold = orders.join(order_items, order_items.c.order_id == orders.c.id)
+    with engine.begin() as conn:
+        conn.execute(sales_daily_products.delete())
+        conn.execute(sales_daily.delete())
+        conn.execute(insert(sales_daily_products).from_select(
+            ["day", "product_id", *ROLLUP_COLUMNS],
+            select(day, order_items.c.product_id, func.count(distinct(orders.c.id)),
+                   func.sum(order_items.c.quantity), revenue)
+            .select_from(sold)
+            .group_by(day, order_items.c.product_id),
+        ))
+        conn.execute(insert(sales_daily).from_select(
+            ["day", *ROLLUP_COLUMNS],
+            select(day, func.count(distinct(orders.c.id)), func.sum(order_items.c.quantity), revenue)
+            .select_from(sold)
+            .group_by(day),
+        ))
+        return {
+            "days": conn.execute(select(func.count()).select_from(sales_daily)).scalar(),
+            "product_days": conn.execute(select(func.count()).select_from(sales_daily_products)).scalar(),
+        }
+
+
+def sales_report(db: Session, start: date, end: date, top: int) -> dict:
+    """Totals, per-day figures and the ``top`` products by revenue in [start, end]."""
+    days = [
+        {"day": row.day, "orders": row.orders, "units": row.units, "revenue": round(row.revenue, 2)}
+        for row in db.query(models.SalesDaily)
+        .filter(models.SalesDaily.day >= start, models.SalesDaily.day <= end)
+        .order_by(models.SalesDaily.day)
+    ]
+    product_revenue = func.sum(models.SalesDailyProduct.revenue)
+    products = [
+        {
+            "product_id": product_id,
+            "name": name,
+            "orders": order_count,
+            "units": units,
+            "revenue": round(revenue, 2),
+        }
+        for product_id, name, order_count, units, revenue in db.query(
+            models.SalesDailyProduct.product_id,
+            models.Product.name,
+            func.sum(models.SalesDailyProduct.orders),
+            func.sum(models.SalesDailyProduct.units),
+            product_revenue,
+        )
+        .outerjoin(models.Product, models.Product.id == models.SalesDailyProduct.product_id)
+        .filter(models.SalesDailyProduct.day >= start, models.SalesDailyProduct.day <= end)
+        .group_by(models.SalesDailyProduct.product_id, models.Product.name)
+        .order_by(product_revenue.desc(), models.SalesDailyProduct.product_id)
+        .limit(top)
+    ]
+    return {
+        "start": start,
+        "end": end,
+        "orders": sum(day["orders"] for day in days),
+        "units": sum(day["units"] for day in days),
+        "revenue": round(sum(day["revenue"] for day in days), 2),
+        "by_day": days,
+        "by_product": products,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.analytics", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=("backfill",))
+    parser.add_argument("--database-url", help="Defaults to DATABASE_URL / settings")
+    args = parser.parse_args(argv)
+
+    engine = make_engine(args.database_url or Settings.from_env().database_url)
+    Base.metadata.create_all(bind=engine)
+    start = time.perf_counter()
+    result = backfill(engine)
+    engine.dispose()
+    print(f"Sales rollups rebuilt: {result['days']} days, {result['product_days']} "
+          f"product-days in {time.perf_counter() - start:.1f}s.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,49 +1,117 @@
+from dataclasses import dataclass
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import jwt, JWTError
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app import models
-from app.auth.jwt_handler import SECRET_KEY, ALGORITHM
+from app.auth.jwt_handler import verify_token
+from app.auth.revocation import revocations
 
 # Create HTTPBearer instance (used to extract token)
 oauth2_scheme = HTTPBearer()
 
 
-# ------------------ USER AUTH DEPENDENCY ------------------ #
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-):
-    token = credentials.credentials
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authentication token"
-            )
-    except JWTError:
+# ------------------ TOKEN CLAIMS DEPENDENCY ------------------ #
+def get_token_claims(credentials: HTTPAuthorizationCredentials = Depends(oauth2_scheme)) -> dict:
+    """Decoded claims of a valid, unrevoked bearer token (no database access)."""
+    payload = verify_token(credentials.credentials)
+    if payload is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired token"
         )
-
-    user = db.query(models.User).filter(models.User.id == int(user_id)).first()
-    if user is None:
+    user_id = payload.get("sub")
+    if user_id is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
+            detail="Invalid authentication token"
         )
+    if revocations.is_token_revoked(payload):
+        raise _revoked()
+    return payload
+
+
+def _revoked():
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Token has been revoked"
+    )
+
+
+def _user_not_found():
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="User not found"
+    )
+
+
+def _check_version(claims: dict, user: models.User):
+    # Authoritative check against the row: catches bumps made by other
+    # workers that this process has not heard about yet.
+    if claims.get("ver", 0) < (user.token_version or 0):
+        raise _revoked()
+
+
+# ------------------ USER AUTH DEPENDENCY ------------------ #
+def get_current_user(
+    claims: dict = Depends(get_token_claims),
+    db: Session = Depends(get_db)
+):
+    user = db.query(models.User).filter(models.User.id == int(claims["sub"])).first()
+    if user is None:
+        raise _user_not_found()
+    _check_version(claims, user)
+    return user
+
+
+def get_current_user_read(
+    claims: dict = Depends(get_token_claims),
+    read_db: Session = Depends(get_read_db),
+    db: Session = Depends(get_db)
+):
+    """``get_current_user`` for read-only routes, loaded through the read session.
+
+    A user missing from a lagging replica (e.g. just registered) is looked up
+    on the primary before giving up. The primary session only connects if used.
+    """
+    user_id = int(claims["sub"])
+    user = read_db.query(models.User).filter(models.User.id == user_id).first()
+    if user is None and read_db.info.get("replica"):
+        user = db.query(models.User).filter(models.User.id == user_id).first()
+    if user is None:
+        raise _user_not_found()
+    _check_version(claims, user)
     return user
 
 
 # ------------------ ADMIN AUTH DEPENDENCY ------------------ #
-def require_admin(current_user=Depends(get_current_user)):
-    if not current_user.is_admin:
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    role: str
+
+
+def require_admin(
+    claims: dict = Depends(get_token_claims),
+    db: Session = Depends(get_db)
+) -> Principal:
+    """Authorize admins against the user row, not the token's ``role`` claim.
+
+    A demotion or a token version bump must take effect at once, even when
+    another worker made it; only the two columns needed are read, by key.
+    """
+    user_id = int(claims["sub"])
+    user = (
+        db.query(models.User.token_version, models.User.is_admin)
+        .filter(models.User.id == user_id)
+        .first()
+    )
+    if user is None:
+        raise _user_not_found()
+    _check_version(claims, user)
+    if not user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Admins only"
         )
-    return current_user
+    return Principal(id=user_id, role="admin")
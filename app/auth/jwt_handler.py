@@ -1,35 +1,58 @@
-import os
+import uuid
 import warnings
 from datetime import datetime, timedelta
-from jose import JWTError, jwt
 
-# Load configuration from environment with safe development defaults.
-# In production, set a secure SECRET_KEY in the environment and avoid
-# relying on defaults.
+# Development defaults; create_app configures the real values from Settings.
+# In production, set a secure SECRET_KEY and avoid relying on the default.
 DEFAULT_SECRET = "dev-secret-please-change"
-SECRET_KEY = os.getenv("SECRET_KEY", DEFAULT_SECRET)
-if SECRET_KEY == DEFAULT_SECRET:
-    warnings.warn(
-        "Using default SECRET_KEY. Set a secure SECRET_KEY in the environment for production.",
-        UserWarning,
-    )
+SECRET_KEY = DEFAULT_SECRET
+ALGORITHM = "HS256"
+ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-ALGORITHM = os.getenv("ALGORITHM", "HS256")
-try:
-    ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
-except ValueError:
-    ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+def configure(secret_key=None, algorithm="HS256", expire_minutes=30):
+    global SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+    SECRET_KEY = secret_key or DEFAULT_SECRET
+    ALGORITHM = algorithm
+    ACCESS_TOKEN_EXPIRE_MINUTES = expire_minutes
+    if SECRET_KEY == DEFAULT_SECRET:
+        warnings.warn(
+            "Using default SECRET_KEY. Set a secure SECRET_KEY in the environment for production.",
+            UserWarning,
+        )
+
+
+# python-jose is imported inside the functions so importing the app (and
+# every CLI tool that imports it) does not pay for the crypto backends.
 
 def create_access_token(data: dict):
+    from jose import jwt
+
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
+    # A unique id lets a single token be revoked (logout).
+    to_encode.setdefault("jti", uuid.uuid4().hex)
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
+def create_user_token(user) -> str:
+    """Token carrying the claims needed to authorize without loading the user.
+
+    ``role`` lets admin checks skip the database; ``ver`` is compared with
+    ``User.token_version`` so bumping the version invalidates old tokens.
+    """
+    return create_access_token({
+        "sub": str(user.id),
+        "role": "admin" if user.is_admin else "user",
+        "ver": user.token_version or 0,
+    })
+
+
 def verify_token(token: str):
+    from jose import JWTError, jwt
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         return payload
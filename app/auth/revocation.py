@@ -0,0 +1,177 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+from datetime import datetime
+from typing import Dict
+
+from app.monitoring.metrics import TOKEN_REVOCATION_CHECKS
+
+logger = logging.getLogger("app.auth")
+
+# Revoked token ids are checked on every authenticated request. A Bloom filter
+# answers "definitely not revoked" for almost every token without touching the
+# exact set (or the database); the exact set confirms the rare positives.
+# create_app sizes the shared registry from Settings.
+REVOCATION_BLOOM_CAPACITY = 100_000
+REVOCATION_BLOOM_ERROR_RATE = 0.01
+
+# Other workers learn about revocations over the shared cache's pub/sub.
+REVOCATION_CHANNEL = "auth:revocations"
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (double hashing on one blake2b digest)."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationRegistry:
+    """Revoked token ids and minimum token versions per user, held in memory.
+
+    The database (``revoked_tokens`` and ``users.token_version``) is the
+    durable copy: ``load`` reads it at startup and ``attach`` keeps workers in
+    sync through pub/sub. Both checks are O(1) and never query the database.
+    """
+
+    def __init__(
+        self,
+        capacity: int = REVOCATION_BLOOM_CAPACITY,
+        error_rate: float = REVOCATION_BLOOM_ERROR_RATE,
+        clock=time.time,
+    ):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._clock = clock
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._revoked: Dict[str, float] = {}
+        self._versions: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._backend = None
+        self._unsubscribe = None
+
+    # ------------------ CHECKS ------------------ #
+    def is_revoked(self, jti: str) -> bool:
+        if jti not in self._bloom:
+            TOKEN_REVOCATION_CHECKS.inc(result="bloom_negative")
+            return False
+        revoked = jti in self._revoked
+        TOKEN_REVOCATION_CHECKS.inc(result="revoked" if revoked else "false_positive")
+        return revoked
+
+    def version_is_current(self, user_id: int, version: int) -> bool:
+        return version >= self._versions.get(user_id, 0)
+
+    def is_token_revoked(self, payload: dict) -> bool:
+        """Whether a decoded token was revoked by id or by a token version bump."""
+        jti = payload.get("jti")
+        if jti is not None and self.is_revoked(jti):
+            return True
+        try:
+            user_id = int(payload.get("sub"))
+        except (TypeError, ValueError):
+            return False
+        return not self.version_is_current(user_id, payload.get("ver", 0))
+
+    # ------------------ UPDATES ------------------ #
+    def revoke(self, jti: str, expires_at: float, publish: bool = True):
+        with self._lock:
+            self._revoked[jti] = expires_at
+            self._bloom.add(jti)
+            if len(self._revoked) > self.capacity:
+                self._purge_expired()
+        if publish:
+            self._publish(f"jti {jti} {expires_at}")
+
+    def set_version(self, user_id: int, version: int, publish: bool = True):
+        with self._lock:
+            if version > self._versions.get(user_id, 0):
+                self._versions[user_id] = version
+        if publish:
+            self._publish(f"ver {user_id} {version}")
+
+    def _purge_expired(self):
+        # Bloom filters cannot delete: rebuild from the live entries.
+        now = self._clock()
+        self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+        self._bloom = BloomFilter(max(self.capacity, len(self._revoked) * 2), self.error_rate)
+        for jti in self._revoked:
+            self._bloom.add(jti)
+
+    def purge_expired(self):
+        with self._lock:
+            self._purge_expired()
+
+    def configure(self, capacity: int, error_rate: float):
+        """Resize the Bloom filter; drops the current contents (``load`` refills them)."""
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._revoked.clear()
+            self._versions.clear()
+            self._bloom = BloomFilter(self.capacity, self.error_rate)
+
+    # ------------------ SYNC ------------------ #
+    def load(self, db):
+        """Replace the registry with the database's unexpired revocations and bumped token versions."""
+        from app import models
+
+        self.clear()
+        now = datetime.utcnow()
+        db.query(models.RevokedToken).filter(models.RevokedToken.expires_at <= now).delete()
+        db.commit()
+        for jti, expires_at in db.query(models.RevokedToken.jti, models.RevokedToken.expires_at):
+            self.revoke(jti, (expires_at - datetime(1970, 1, 1)).total_seconds(), publish=False)
+        for user_id, version in db.query(models.User.id, models.User.token_version).filter(
+            models.User.token_version > 0
+        ):
+            self.set_version(user_id, version, publish=False)
+
+    def attach(self, backend):
+        """Publish local revocations to, and apply remote ones from, ``backend``."""
+        self.detach()
+        self._backend = backend
+        self._unsubscribe = backend.subscribe(REVOCATION_CHANNEL, self._on_message)
+
+    def detach(self):
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+        self._backend = self._unsubscribe = None
+
+    def _publish(self, message: str):
+        if self._backend is None:
+            return
+        try:
+            self._backend.publish(REVOCATION_CHANNEL, message.encode())
+        except Exception:
+            logger.warning("Could not broadcast token revocation", exc_info=True)
+
+    def _on_message(self, message: bytes):
+        kind, key, value = message.decode().split(" ")
+        if kind == "jti":
+            self.revoke(key, float(value), publish=False)
+        elif kind == "ver":
+            self.set_version(int(key), int(value), publish=False)
+
+
+revocations = RevocationRegistry()
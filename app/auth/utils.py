@@ -1,9 +1,18 @@
-from passlib.context import CryptContext
+from functools import lru_cache
+from app.monitoring.metrics import PASSWORD_HASH_DURATION
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    # passlib (and the bcrypt backend it loads) is imported on first use.
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    with PASSWORD_HASH_DURATION.time(operation="hash"):
+        return get_pwd_context().hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    with PASSWORD_HASH_DURATION.time(operation="verify"):
+        return get_pwd_context().verify(plain_password, hashed_password)
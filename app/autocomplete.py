@@ -0,0 +1,208 @@
+import bisect
+import heapq
+import logging
+import os
+import threading
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger("app.autocomplete")
+
+# Typeahead is answered from memory: a sorted array of (word-start suffix of
+# the lower-cased name, product id) searched with bisect. Only the most
+# popular AUTOCOMPLETE_MAX_PRODUCTS products are indexed so memory stays
+# bounded however large the catalog grows.
+try:
+    AUTOCOMPLETE_MAX_PRODUCTS = int(os.getenv("AUTOCOMPLETE_MAX_PRODUCTS", "200000"))
+except ValueError:
+    AUTOCOMPLETE_MAX_PRODUCTS = 200_000
+
+# Other workers apply product writes published on this channel.
+AUTOCOMPLETE_CHANNEL = "catalog:autocomplete"
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.casefold().split())
+
+
+def _keys(name: str, product_id: int) -> List[Tuple[str, int]]:
+    """One key per word start, so "pro" finds "Laptop Pro" as well as "Pro Mouse"."""
+    normalized = _normalize(name)
+    starts = [0] + [i + 1 for i, char in enumerate(normalized) if char == " "]
+    return [(normalized[start:], product_id) for start in starts]
+
+
+class PrefixIndex:
+    """Sorted-array prefix index over product names, ranked by popularity or name."""
+
+    # Above this many matching keys, popularity ranking walks the products
+    # from the most popular down instead of ranking every match.
+    WALK_THRESHOLD = 1000
+
+    def __init__(self, max_products: int = AUTOCOMPLETE_MAX_PRODUCTS):
+        self.max_products = max_products
+        self._keys: List[Tuple[str, int]] = []
+        # id -> (name, normalized name, popularity)
+        self._products: Dict[int, Tuple[str, str, int]] = {}
+        # (-popularity, id), most popular first.
+        self._order: List[Tuple[int, int]] = []
+        self._lock = threading.Lock()
+        self._backend = None
+        self._unsubscribe = None
+
+    def __len__(self):
+        return len(self._products)
+
+    # ------------------ QUERIES ------------------ #
+    def search(self, prefix: str, limit: int = 10, sort: str = "popularity") -> List[dict]:
+        """Up to ``limit`` products with a word starting with ``prefix``."""
+        prefix = _normalize(prefix)
+        if not prefix:
+            return []
+        with self._lock:
+            start = bisect.bisect_left(self._keys, (prefix,))
+            end = bisect.bisect_left(self._keys, (prefix + "\U0010ffff",), lo=start)
+            if sort == "name":
+                ids = []
+                for position in range(start, end):
+                    product_id = self._keys[position][1]
+                    if product_id not in ids:
+                        ids.append(product_id)
+                        if len(ids) == limit:
+                            break
+            elif end - start > self.WALK_THRESHOLD:
+                # Short prefixes match a large share of the catalog, so the
+                # top matches are found after a short walk.
+                word_start = " " + prefix
+                ids = []
+                for _, product_id in self._order:
+                    normalized = self._products[product_id][1]
+                    if normalized.startswith(prefix) or word_start in normalized:
+                        ids.append(product_id)
+                        if len(ids) == limit:
+                            break
+            else:
+                matched = {product_id for _, product_id in self._keys[start:end]}
+                ids = [
+                    product_id for _, product_id in heapq.nsmallest(
+                        limit, ((-self._products[product_id][2], product_id) for product_id in matched)
+                    )
+                ]
+            return [{"id": product_id, "name": self._products[product_id][0]} for product_id in ids]
+
+    # ------------------ UPDATES ------------------ #
+    def load(self, rows):
+        """Replace the index with ``rows`` of (id, name, popularity), most popular first."""
+        products, keys = {}, []
+        for product_id, name, popularity in rows:
+            if len(products) >= self.max_products:
+                break
+            products[product_id] = (name, _normalize(name), popularity or 0)
+            keys.extend(_keys(name, product_id))
+        keys.sort()
+        order = sorted((-popularity, product_id) for product_id, (_, _, popularity) in products.items())
+        with self._lock:
+            self._products, self._keys, self._order = products, keys, order
+
+    def _delete(self, items: list, item):
+        position = bisect.bisect_left(items, item)
+        if position < len(items) and items[position] == item:
+            del items[position]
+
+    def _remove(self, product_id: int):
+        entry = self._products.pop(product_id, None)
+        if entry is None:
+            return
+        for key in _keys(entry[0], product_id):
+            self._delete(self._keys, key)
+        self._delete(self._order, (-entry[2], product_id))
+
+    def _put(self, product_id: int, name: str, popularity: int):
+        self._remove(product_id)
+        if len(self._products) >= self.max_products:
+            # Full: a product displaces the least popular one only if it is
+            # at least as popular.
+            least_popularity, least = self._order[-1]
+            if -least_popularity > popularity:
+                return
+            self._remove(least)
+        self._products[product_id] = (name, _normalize(name), popularity)
+        for key in _keys(name, product_id):
+            bisect.insort(self._keys, key)
+        bisect.insort(self._order, (-popularity, product_id))
+
+    def put(self, product_id: int, name: str, publish: bool = True):
+        """Index a created or renamed product."""
+        with self._lock:
+            entry = self._products.get(product_id)
+            self._put(product_id, name, entry[2] if entry else 0)
+        if publish:
+            self._publish(f"put {product_id} {name}")
+
+    def remove(self, product_id: int, publish: bool = True):
+        with self._lock:
+            self._remove(product_id)
+        if publish:
+            self._publish(f"del {product_id}")
+
+    def add_popularity(self, deltas: Dict[int, int]):
+        """Apply popularity increments (as flushed by the product counters)."""
+        with self._lock:
+            for product_id, delta in deltas.items():
+                entry = self._products.get(product_id)
+                if entry is not None:
+                    self._delete(self._order, (-entry[2], product_id))
+                    self._products[product_id] = (entry[0], entry[1], entry[2] + delta)
+                    bisect.insort(self._order, (-entry[2] - delta, product_id))
+
+    def clear(self):
+        with self._lock:
+            self._products, self._keys, self._order = {}, [], []
+
+    # ------------------ SYNC ------------------ #
+    def attach(self, backend):
+        """Publish local product writes to, and apply remote ones from, ``backend``."""
+        self.detach()
+        self._backend = backend
+        self._unsubscribe = backend.subscribe(AUTOCOMPLETE_CHANNEL, self._on_message)
+
+    def detach(self):
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+        self._backend = self._unsubscribe = None
+
+    def _publish(self, message: str):
+        if self._backend is None:
+            return
+        try:
+            self._backend.publish(AUTOCOMPLETE_CHANNEL, message.encode())
+        except Exception:
+            logger.warning("Could not broadcast autocomplete update", exc_info=True)
+
+    def _on_message(self, message: bytes):
+        kind, _, rest = message.decode().partition(" ")
+        if kind == "put":
+            product_id, _, name = rest.partition(" ")
+            self.put(int(product_id), name, publish=False)
+        elif kind == "del":
+            self.remove(int(rest), publish=False)
+
+
+def load_index(index: PrefixIndex, db):
+    """Fill ``index`` from the catalog, most popular products first."""
+    from sqlalchemy import func
+
+    from app import models
+
+    # Products never counted have no stats row; rank them as 0 rather than
+    # letting their NULLs sort first (PostgreSQL does for DESC).
+    popularity = func.coalesce(models.ProductStats.popularity, 0)
+    rows = (
+        db.query(models.Product.id, models.Product.name, popularity)
+        .outerjoin(models.ProductStats, models.ProductStats.product_id == models.Product.id)
+        .order_by(popularity.desc(), models.Product.id)
+        .limit(index.max_products)
+    )
+    index.load(rows)
+
+
+autocomplete_index = PrefixIndex()
@@ -0,0 +1,562 @@
+import json
+import logging
+import socket
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from fastapi import Request
+
+logger = logging.getLogger("app.cache")
+
+# Channel carrying cache keys to evict from every worker's local layer.
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+
+class CacheError(Exception):
+    pass
+
+
+class CacheBackend:
+    """Key/value store with expiry and pub/sub shared by the app's caches.
+
+    Values are bytes. Implementations must be safe to call from the
+    threadpool that runs sync routes.
+    """
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        raise NotImplementedError
+
+    def delete(self, *keys: str):
+        raise NotImplementedError
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        """Add ``amount`` to an integer counter; ``ttl`` applies when the key is created."""
+        raise NotImplementedError
+
+    def consume_tokens(
+        self, key: str, capacity: float, refill_per_second: float, cost: float = 1.0
+    ) -> Tuple[bool, float]:
+        """Atomically take ``cost`` tokens from the bucket at ``key``.
+
+        Buckets start full and refill continuously. Returns ``(allowed,
+        retry_after_seconds)``; a rejected call takes no tokens.
+        """
+        raise NotImplementedError
+
+    def publish(self, channel: str, message: bytes):
+        raise NotImplementedError
+
+    def subscribe(self, channel: str, callback: Callable[[bytes], None]) -> Callable[[], None]:
+        """Call ``callback`` with each message on ``channel``; returns an unsubscribe function."""
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def get_json(self, key: str):
+        value = self.get(key)
+        return None if value is None else json.loads(value)
+
+    def set_json(self, key: str, value, ttl: Optional[float] = None):
+        self.set(key, json.dumps(value, separators=(",", ":")).encode(), ttl)
+
+
+# ------------------ IN-MEMORY ------------------ #
+class _Subscribers:
+    def __init__(self):
+        self._callbacks: Dict[str, List[Callable]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, channel, callback):
+        with self._lock:
+            self._callbacks.setdefault(channel, []).append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                callbacks = self._callbacks.get(channel, [])
+                if callback in callbacks:
+                    callbacks.remove(callback)
+        return unsubscribe
+
+    def deliver(self, channel, message):
+        with self._lock:
+            callbacks = list(self._callbacks.get(channel, ()))
+        for callback in callbacks:
+            try:
+                callback(message)
+            except Exception:
+                logger.exception("Cache subscriber for %s failed", channel)
+
+
+class InMemoryCache(CacheBackend):
+    """Process-local LRU cache; pub/sub only reaches subscribers in this process."""
+
+    def __init__(self, max_entries: int = 10_000, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self._clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._subscribers = _Subscribers()
+
+    def _live(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= self._clock():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return entry
+
+    def get(self, key):
+        with self._lock:
+            entry = self._live(key)
+            return None if entry is None else entry[0]
+
+    def set(self, key, value, ttl=None):
+        expires_at = self._clock() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def incr(self, key, amount=1, ttl=None):
+        with self._lock:
+            entry = self._live(key)
+            if entry is None:
+                value = amount
+                expires_at = self._clock() + ttl if ttl is not None else None
+            else:
+                value = int(entry[0]) + amount
+                expires_at = entry[1]
+            self._data[key] = (str(value).encode(), expires_at)
+            return value
+
+    def consume_tokens(self, key, capacity, refill_per_second, cost=1.0):
+        with self._lock:
+            now = self._clock()
+            entry = self._live(key)
+            if entry is None:
+                tokens = capacity
+            else:
+                stored, updated_at = entry[0].split(b":")
+                tokens = min(capacity, float(stored) + (now - float(updated_at)) * refill_per_second)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            # A bucket that would be full again carries no state worth keeping.
+            self._data[key] = (b"%r:%r" % (tokens, now), now + capacity / refill_per_second)
+            self._data.move_to_end(key)
+            return allowed, 0.0 if allowed else (cost - tokens) / refill_per_second
+
+    def publish(self, channel, message):
+        self._subscribers.deliver(channel, message)
+
+    def subscribe(self, channel, callback):
+        return self._subscribers.add(channel, callback)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+# ------------------ FAKE SHARED STORE ------------------ #
+class FakeCacheServer:
+    """In-process stand-in for a shared store (one Redis) in tests.
+
+    Each ``FakeCache`` client plays a worker: clients see each other's keys
+    and pub/sub messages, but hold their own subscriptions.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.store = InMemoryCache(max_entries=1_000_000, clock=clock)
+        self.commands = []
+
+    def client(self) -> "FakeCache":
+        return FakeCache(self)
+
+
+class FakeCache(CacheBackend):
+    def __init__(self, server: FakeCacheServer):
+        self.server = server
+        self._unsubscribers = []
+
+    def _record(self, *command):
+        self.server.commands.append(command)
+
+    def get(self, key):
+        self._record("GET", key)
+        return self.server.store.get(key)
+
+    def set(self, key, value, ttl=None):
+        self._record("SET", key)
+        self.server.store.set(key, value, ttl)
+
+    def delete(self, *keys):
+        self._record("DEL", *keys)
+        self.server.store.delete(*keys)
+
+    def incr(self, key, amount=1, ttl=None):
+        self._record("INCRBY", key)
+        return self.server.store.incr(key, amount, ttl)
+
+    def consume_tokens(self, key, capacity, refill_per_second, cost=1.0):
+        self._record("EVAL", key)
+        return self.server.store.consume_tokens(key, capacity, refill_per_second, cost)
+
+    def publish(self, channel, message):
+        self._record("PUBLISH", channel)
+        self.server.store.publish(channel, message)
+
+    def subscribe(self, channel, callback):
+        unsubscribe = self.server.store.subscribe(channel, callback)
+        self._unsubscribers.append(unsubscribe)
+        return unsubscribe
+
+    def clear(self):
+        self.server.store.clear()
+
+    def close(self):
+        for unsubscribe in self._unsubscribers:
+            unsubscribe()
+        self._unsubscribers.clear()
+
+
+# ------------------ REDIS ------------------ #
+# Token bucket evaluated server-side so concurrent workers share one bucket;
+# TIME keeps every worker on the server's clock.
+_TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+local retry = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+else
+  retry = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return {allowed, tostring(retry)}
+"""
+
+
+class RespConnection:
+    """Minimal blocking RESP2 client connection (enough for the commands used here)."""
+
+    def __init__(self, host: str, port: int, timeout: Optional[float] = 1.0):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = self.sock.makefile("rb")
+
+    @staticmethod
+    def encode(*args) -> bytes:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if isinstance(arg, str):
+                arg = arg.encode()
+            elif not isinstance(arg, bytes):
+                arg = str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        return b"".join(parts)
+
+    def send(self, *args):
+        self.sock.sendall(self.encode(*args))
+
+    def command(self, *args):
+        self.send(*args)
+        return self.read_reply()
+
+    def read_reply(self):
+        line = self._reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("Connection closed by server")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            raise CacheError(payload.decode())
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length == -1:
+                return None
+            data = self._reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            length = int(payload)
+            if length == -1:
+                return None
+            return [self.read_reply() for _ in range(length)]
+        raise ConnectionError(f"Unexpected reply {line!r}")
+
+    def close(self):
+        try:
+            self._reader.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class RedisCache(CacheBackend):
+    """Redis backend speaking RESP directly; one connection per thread."""
+
+    def __init__(
+        self, host: str = "localhost", port: int = 6379, db: int = 0,
+        password: Optional[str] = None, timeout: Optional[float] = 1.0,
+    ):
+        self.host, self.port, self.db = host, port, db
+        self.password = password
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._subscriber_threads = []
+        self._closed = threading.Event()
+
+    def _connect(self, timeout) -> RespConnection:
+        connection = RespConnection(self.host, self.port, timeout)
+        if self.password:
+            connection.command("AUTH", self.password)
+        if self.db:
+            connection.command("SELECT", self.db)
+        return connection
+
+    def _connection(self) -> RespConnection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = self._connect(self.timeout)
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def execute(self, *args):
+        """Run one command; server errors and connection failures raise CacheError."""
+        try:
+            return self._connection().command(*args)
+        except OSError as exc:
+            # The connection's state is unknown: drop it so the next call reconnects.
+            connection = getattr(self._local, "connection", None)
+            if connection is not None:
+                connection.close()
+                self._local.connection = None
+            raise CacheError(str(exc)) from exc
+
+    def get(self, key):
+        return self.execute("GET", key)
+
+    def set(self, key, value, ttl=None):
+        if ttl is None:
+            self.execute("SET", key, value)
+        else:
+            self.execute("SET", key, value, "PX", max(int(ttl * 1000), 1))
+
+    def delete(self, *keys):
+        if keys:
+            self.execute("DEL", *keys)
+
+    def incr(self, key, amount=1, ttl=None):
+        value = self.execute("INCRBY", key, amount)
+        if ttl is not None and value == amount:
+            self.execute("PEXPIRE", key, max(int(ttl * 1000), 1))
+        return value
+
+    def consume_tokens(self, key, capacity, refill_per_second, cost=1.0):
+        allowed, retry_after = self.execute(
+            "EVAL", _TOKEN_BUCKET_SCRIPT, 1, key, capacity, refill_per_second, cost
+        )
+        return bool(allowed), float(retry_after)
+
+    def publish(self, channel, message):
+        self.execute("PUBLISH", channel, message)
+
+    def subscribe(self, channel, callback):
+        stopped = threading.Event()
+        holder = {}
+
+        def listen():
+            backoff = 0.1
+            while not stopped.is_set() and not self._closed.is_set():
+                try:
+                    connection = holder["connection"] = self._connect(timeout=None)
+                    connection.command("SUBSCRIBE", channel)
+                    backoff = 0.1
+                    while not stopped.is_set():
+                        reply = connection.read_reply()
+                        if isinstance(reply, list) and reply[0] == b"message":
+                            try:
+                                callback(reply[2])
+                            except Exception:
+                                logger.exception("Cache subscriber for %s failed", channel)
+                except (OSError, CacheError):
+                    if stopped.is_set() or self._closed.is_set():
+                        return
+                    logger.warning("Lost subscription to %s; reconnecting", channel)
+                    stopped.wait(backoff)
+                    backoff = min(backoff * 2, 5.0)
+
+        thread = threading.Thread(target=listen, name=f"cache-subscriber-{channel}", daemon=True)
+        thread.start()
+        self._subscriber_threads.append(thread)
+
+        def unsubscribe():
+            stopped.set()
+            connection = holder.get("connection")
+            if connection is not None:
+                try:
+                    connection.sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+                connection.close()
+        return unsubscribe
+
+    def clear(self):
+        self.execute("FLUSHDB")
+
+    def close(self):
+        self._closed.set()
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+
+
+# ------------------ NEAR CACHE ------------------ #
+class NearCache:
+    """Per-worker layer in front of a shared backend.
+
+    Reads check a short-lived local copy first, then the shared backend.
+    ``invalidate`` deletes from the backend and publishes the keys, so every
+    worker evicts its local copy. Backend failures are logged and treated as
+    misses: the cache never takes the catalog down with it.
+    """
+
+    def __init__(
+        self, backend: CacheBackend, local_ttl: float = 5.0, max_local_entries: int = 10_000,
+        channel: str = INVALIDATION_CHANNEL,
+    ):
+        self.backend = backend
+        self.channel = channel
+        self.local_ttl = local_ttl
+        # A process-local backend already is the local layer.
+        self.local = (
+            InMemoryCache(max_local_entries)
+            if local_ttl > 0 and not isinstance(backend, InMemoryCache) else None
+        )
+        self._unsubscribe = None
+        self._subscribe_lock = threading.Lock()
+
+    def _ensure_subscribed(self):
+        # Subscribing may open a connection, so it waits for first use rather
+        # than happening when the app is built.
+        if self.local is None or self._unsubscribe is not None:
+            return
+        with self._subscribe_lock:
+            if self._unsubscribe is None:
+                self._unsubscribe = self.backend.subscribe(self.channel, self._on_invalidate)
+
+    def _on_invalidate(self, message: bytes):
+        self.local.delete(*message.decode().split("\n"))
+
+    def get_json(self, key: str):
+        self._ensure_subscribed()
+        if self.local is not None:
+            value = self.local.get(key)
+            if value is not None:
+                return json.loads(value)
+        try:
+            value = self.backend.get(key)
+        except CacheError:
+            logger.warning("Cache read of %s failed", key, exc_info=True)
+            return None
+        if value is None:
+            return None
+        if self.local is not None:
+            self.local.set(key, value, self.local_ttl)
+        return json.loads(value)
+
+    def set_json(self, key: str, value, ttl: Optional[float] = None):
+        self._ensure_subscribed()
+        data = json.dumps(value, separators=(",", ":")).encode()
+        try:
+            self.backend.set(key, data, ttl)
+        except CacheError:
+            logger.warning("Cache write of %s failed", key, exc_info=True)
+        if self.local is not None:
+            self.local.set(key, data, min(self.local_ttl, ttl) if ttl else self.local_ttl)
+
+    def invalidate(self, *keys: str):
+        if self.local is not None:
+            self.local.delete(*keys)
+        try:
+            self.backend.delete(*keys)
+            if self.local is not None:
+                self.backend.publish(self.channel, "\n".join(keys).encode())
+        except CacheError:
+            logger.warning("Cache invalidation of %s failed", keys, exc_info=True)
+
+    def clear(self):
+        if self.local is not None:
+            self.local.clear()
+        self.backend.clear()
+
+    def close(self):
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
+        self.backend.close()
+
+
+def create_backend(url: str) -> CacheBackend:
+    """``memory://`` or ``redis://[:password@]host[:port][/db]``."""
+    parts = urlsplit(url)
+    if parts.scheme == "memory":
+        return InMemoryCache()
+    if parts.scheme == "redis":
+        db = parts.path.lstrip("/")
+        return RedisCache(
+            host=parts.hostname or "localhost",
+            port=parts.port or 6379,
+            db=int(db) if db else 0,
+            password=parts.password,
+        )
+    raise ValueError(f"Unsupported cache URL: {url}")
+
+
+def get_cache(request: Request) -> NearCache:
+    return request.app.state.cache
+
+
+# ------------------ CATALOG ------------------ #
+def product_key(product_id: int) -> str:
+    return f"product:{product_id}"
+
+
+# Price/availability counts behind the search facets; any product write
+# changes them.
+FACETS_KEY = "catalog:facets"
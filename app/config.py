@@ -0,0 +1,155 @@
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+DEFAULT_DATABASE_URL = "sqlite:///./ecommerce.db"
+DEFAULT_CORS_ORIGINS = ("http://localhost:5173", "http://127.0.0.1:5173")
+
+
+def _env_bool(value: Optional[str], default: bool) -> bool:
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_float(value: Optional[str], default: float) -> float:
+    try:
+        return float(value) if value is not None else default
+    except ValueError:
+        return default
+
+
+def _parse_pairs(value: Optional[str]) -> Dict[str, str]:
+    pairs = {}
+    for item in (value or "").split(","):
+        name, _, setting = item.partition("=")
+        if name.strip() and setting.strip():
+            pairs[name.strip()] = setting.strip()
+    return pairs
+
+
+@dataclass
+class Settings:
+    """Application settings.
+
+    Built explicitly and handed to ``create_app`` so importing the app never
+    touches the environment file, the database or third-party SDKs.
+    """
+
+    database_url: str = DEFAULT_DATABASE_URL
+    # JWT signing; None falls back to a development key (with a warning).
+    secret_key: Optional[str] = None
+    jwt_algorithm: str = "HS256"
+    access_token_expire_minutes: int = 30
+    # Sizing of the revoked-token Bloom filter (app.auth.revocation).
+    revocation_bloom_capacity: int = 100_000
+    revocation_bloom_error_rate: float = 0.01
+    stripe_secret_key: Optional[str] = None
+    stripe_api_base: Optional[str] = None
+    cors_origins: Tuple[str, ...] = field(default=DEFAULT_CORS_ORIGINS)
+    # Run Base.metadata.create_all during startup (development convenience).
+    create_schema: bool = True
+    # Pay one-off costs (bcrypt context, JWT/Stripe imports, first DB
+    # connection) during startup instead of on the first requests.
+    warm_up: bool = False
+    # Read-only routes are spread round-robin over these (empty: primary only).
+    read_replica_urls: Tuple[str, ...] = ()
+    # A client's reads go to the primary for this long after it wrote.
+    read_your_writes_seconds: float = 5.0
+    replica_health_check_seconds: float = 30.0
+    # Shared cache: memory:// (per process) or redis://host:port/db.
+    cache_url: str = "memory://"
+    cache_ttl_seconds: float = 60.0
+    # Per-worker copy of shared entries, evicted over pub/sub on invalidation.
+    cache_local_ttl_seconds: float = 5.0
+    rate_limit_enabled: bool = True
+    # "memory" keeps buckets per process; "cache" shares them via cache_url.
+    rate_limit_backend: str = "memory"
+    # Overrides of app.ratelimit.DEFAULT_LIMITS, e.g. {"login.ip": "20/60"}.
+    rate_limits: Dict[str, str] = field(default_factory=dict)
+    # Key per-IP limits on the first X-Forwarded-For hop (only behind a proxy).
+    rate_limit_trust_forwarded_for: bool = False
+    # Product view/cart/purchase counters are written to product_stats this
+    # often (0: only at shutdown).
+    stats_flush_interval_seconds: float = 5.0
+    # Minimum similarity (0-1) of a /products/fuzzy match.
+    fuzzy_search_threshold: float = 0.3
+    # Cart rows untouched for this long are deleted by the cart sweeper,
+    # which runs this often (0: never).
+    cart_expiry_days: float = 30.0
+    cart_sweep_interval_seconds: float = 3600.0
+    # Background job worker threads (0: jobs only run via app.jobs.run_pending)
+    # and how often idle workers poll the queue.
+    job_workers: int = 2
+    job_poll_interval_seconds: float = 1.0
+    # How long shutdown waits for running jobs to finish.
+    job_drain_timeout_seconds: float = 10.0
+    # Monitoring: slow-query logging and N+1 detection (app.monitoring.sql),
+    # request profiling (app.monitoring.profiling) and tracemalloc tracking
+    # (app.monitoring.memory, off by default because it slows allocations).
+    sql_slow_query_ms: float = 100.0
+    sql_n_plus_one_threshold: int = 3
+    profile_sample_rate: float = 0.0
+    profile_interval_ms: float = 2.0
+    profile_max_stored: int = 50
+    tracemalloc: bool = False
+    tracemalloc_frames: int = 10
+    memory_max_snapshots: int = 10
+
+    @classmethod
+    def from_env(cls, env_file: Optional[str] = ".env") -> "Settings":
+        """Read settings from ``os.environ``, falling back to ``env_file``.
+
+        The file is parsed without being exported into the process
+        environment, so reading settings has no side effects.
+        """
+        values = {}
+        if env_file and os.path.exists(env_file):
+            from dotenv import dotenv_values
+
+            values.update({k: v for k, v in dotenv_values(env_file).items() if v is not None})
+        values.update(os.environ)
+
+        origins = values.get("CORS_ORIGINS")
+        replica_urls = values.get("READ_REPLICA_URLS") or ""
+        return cls(
+            database_url=values.get("DATABASE_URL", DEFAULT_DATABASE_URL),
+            secret_key=values.get("SECRET_KEY"),
+            jwt_algorithm=values.get("ALGORITHM", "HS256"),
+            access_token_expire_minutes=int(_env_float(values.get("ACCESS_TOKEN_EXPIRE_MINUTES"), 30)),
+            revocation_bloom_capacity=int(_env_float(values.get("REVOCATION_BLOOM_CAPACITY"), 100_000)),
+            revocation_bloom_error_rate=_env_float(values.get("REVOCATION_BLOOM_ERROR_RATE"), 0.01),
+            stripe_secret_key=values.get("STRIPE_SECRET_KEY"),
+            stripe_api_base=values.get("STRIPE_API_BASE"),
+            cors_origins=(
+                tuple(o.strip() for o in origins.split(",") if o.strip())
+                if origins else DEFAULT_CORS_ORIGINS
+            ),
+            create_schema=_env_bool(values.get("CREATE_SCHEMA"), True),
+            warm_up=_env_bool(values.get("WARM_UP"), False),
+            read_replica_urls=tuple(u.strip() for u in replica_urls.split(",") if u.strip()),
+            read_your_writes_seconds=_env_float(values.get("READ_YOUR_WRITES_SECONDS"), 5.0),
+            replica_health_check_seconds=_env_float(values.get("REPLICA_HEALTH_CHECK_SECONDS"), 30.0),
+            cache_url=values.get("CACHE_URL", "memory://"),
+            cache_ttl_seconds=_env_float(values.get("CACHE_TTL_SECONDS"), 60.0),
+            cache_local_ttl_seconds=_env_float(values.get("CACHE_LOCAL_TTL_SECONDS"), 5.0),
+            rate_limit_enabled=_env_bool(values.get("RATE_LIMIT_ENABLED"), True),
+            rate_limit_backend=values.get("RATE_LIMIT_BACKEND", "memory"),
+            rate_limits=_parse_pairs(values.get("RATE_LIMITS")),
+            rate_limit_trust_forwarded_for=_env_bool(values.get("RATE_LIMIT_TRUST_FORWARDED_FOR"), False),
+            stats_flush_interval_seconds=_env_float(values.get("STATS_FLUSH_INTERVAL_SECONDS"), 5.0),
+            fuzzy_search_threshold=_env_float(values.get("FUZZY_SEARCH_THRESHOLD"), 0.3),
+            cart_expiry_days=_env_float(values.get("CART_EXPIRY_DAYS"), 30.0),
+            cart_sweep_interval_seconds=_env_float(values.get("CART_SWEEP_INTERVAL_SECONDS"), 3600.0),
+            job_workers=int(_env_float(values.get("JOB_WORKERS"), 2)),
+            job_poll_interval_seconds=_env_float(values.get("JOB_POLL_INTERVAL_SECONDS"), 1.0),
+            job_drain_timeout_seconds=_env_float(values.get("JOB_DRAIN_TIMEOUT_SECONDS"), 10.0),
+            sql_slow_query_ms=_env_float(values.get("SQL_SLOW_QUERY_MS"), 100.0),
+            sql_n_plus_one_threshold=int(_env_float(values.get("SQL_N_PLUS_ONE_THRESHOLD"), 3)),
+            profile_sample_rate=_env_float(values.get("PROFILE_SAMPLE_RATE"), 0.0),
+            profile_interval_ms=_env_float(values.get("PROFILE_INTERVAL_MS"), 2.0),
+            profile_max_stored=int(_env_float(values.get("PROFILE_MAX_STORED"), 50)),
+            tracemalloc=_env_bool(values.get("TRACEMALLOC"), False),
+            tracemalloc_frames=int(_env_float(values.get("TRACEMALLOC_FRAMES"), 10)),
+            memory_max_snapshots=int(_env_float(values.get("MEMORY_MAX_SNAPSHOTS"), 10)),
+        )
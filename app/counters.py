@@ -0,0 +1,140 @@
+import logging
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.database import upsert_increments
+
+logger = logging.getLogger("app.counters")
+
+# Views happen on every product page; bumping a row per view would make
+# popular products hot rows. Events are summed in memory and written in one
+# batched upsert per flush, so a row is written at most once per interval.
+EVENTS = ("views", "cart_adds", "purchases")
+# Contribution of one event to ``product_stats.popularity``.
+POPULARITY_WEIGHTS = {"views": 1, "cart_adds": 5, "purchases": 20}
+
+
+class CounterBuffer:
+    """Per-product event counts waiting to be written to ``product_stats``."""
+
+    def __init__(self):
+        self._counts: Dict[int, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(EVENTS, 0))
+        self._lock = threading.Lock()
+        # Called with {product_id: popularity increment} after each flush.
+        self.listeners: List[Callable[[Dict[int, int]], None]] = []
+
+    def record(self, product_id: int, event: str, amount: int = 1):
+        if event not in POPULARITY_WEIGHTS:
+            raise ValueError(f"Unknown product event: {event}")
+        with self._lock:
+            self._counts[product_id][event] += amount
+
+    def pending(self) -> Dict[int, Dict[str, int]]:
+        with self._lock:
+            return {product_id: dict(counts) for product_id, counts in self._counts.items()}
+
+    def _swap(self) -> Dict[int, Dict[str, int]]:
+        with self._lock:
+            counts, self._counts = self._counts, defaultdict(lambda: dict.fromkeys(EVENTS, 0))
+        return counts
+
+    def _restore(self, counts: Dict[int, Dict[str, int]]):
+        with self._lock:
+            for product_id, events in counts.items():
+                for event, amount in events.items():
+                    self._counts[product_id][event] += amount
+
+    def flush(self, db: Session) -> int:
+        """Write buffered counts in one batched upsert; returns the products written.
+
+        Counts are put back if the write fails, so a database outage delays
+        them instead of losing them.
+        """
+        from app import models
+
+        counts = self._swap()
+        if not counts:
+            return 0
+        try:
+            # Products deleted since their events were recorded would fail the
+            # foreign key and, with it, the whole batch.
+            existing = {
+                product_id for (product_id,) in db.query(models.Product.id).filter(
+                    models.Product.id.in_(counts)
+                )
+            }
+            rows = [
+                {
+                    "product_id": product_id,
+                    **events,
+                    "popularity": sum(POPULARITY_WEIGHTS[event] * amount for event, amount in events.items()),
+                }
+                for product_id, events in sorted(counts.items())
+                if product_id in existing
+            ]
+            upsert_increments(
+                db, models.ProductStats.__table__, ("product_id",), rows, EVENTS + ("popularity",)
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            self._restore(counts)
+            raise
+        deltas = {row["product_id"]: row["popularity"] for row in rows}
+        for listener in self.listeners:
+            listener(deltas)
+        return len(rows)
+
+    def clear(self):
+        with self._lock:
+            self._counts.clear()
+
+
+class StatsFlusher:
+    """Daemon thread flushing a ``CounterBuffer`` every ``interval`` seconds.
+
+    ``get_db`` is a dependency-style generator yielding a session, so the
+    flusher writes to the same database as the routes (overrides included).
+    An ``interval`` of 0 disables the thread; ``stop`` still flushes.
+    """
+
+    def __init__(self, buffer: CounterBuffer, get_db: Callable[[], Iterator[Session]], interval: float):
+        self.buffer = buffer
+        self.get_db = get_db
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stats-flusher", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def flush(self):
+        db_gen = self.get_db()
+        try:
+            self.buffer.flush(next(db_gen))
+        except Exception:
+            logger.warning("Could not flush product counters; retrying next interval", exc_info=True)
+        finally:
+            db_gen.close()
+
+    def stop(self):
+        """Stop the thread and write whatever is still buffered."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+
+product_counters = CounterBuffer()
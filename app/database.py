@@ -1,20 +1,250 @@
-from sqlalchemy import create_engine
+import hashlib
+import itertools
+import logging
+import threading
+import time
+from typing import Optional, Sequence
+from fastapi import Request
+from sqlalchemy import and_, create_engine, event, insert, text
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./ecommerce.db"
+logger = logging.getLogger("app.database")
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
 
-sessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def make_engine(url: str):
+    connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+    return create_engine(url, connect_args=connect_args)
+
+
+# Built by create_app from Settings.database_url (configure_database), never
+# at import; sessions cannot be opened before an app has been created.
+SQLALCHEMY_DATABASE_URL: Optional[str] = None
+engine = None
+
+sessionLocal = sessionmaker(autocommit=False, autoflush=False)
 
 Base = declarative_base()
 
-def get_db():
+
+def configure_database(url: str):
+    """Point the module engine and session factory at ``url``."""
+    global engine, SQLALCHEMY_DATABASE_URL
+    if engine is not None:
+        if url == SQLALCHEMY_DATABASE_URL:
+            return engine
+        engine.dispose()
+    SQLALCHEMY_DATABASE_URL = url
+    # create_engine does not connect; the first connection is made on first use.
+    engine = make_engine(url)
+    sessionLocal.configure(bind=engine)
+    return engine
+
+
+# ------------------ READ REPLICAS ------------------ #
+class ReplicaSet:
+    """Round-robin over read replica engines, skipping unhealthy ones.
+
+    Health is probed lazily with ``SELECT 1`` at most once per
+    ``health_check_interval`` per replica, on the request that picks it. A
+    replica that fails a probe (or a query, see ``mark_unhealthy``) is skipped
+    until its next probe succeeds.
+    """
+
+    def __init__(self, urls: Sequence[str], health_check_interval: float = 30.0):
+        self.urls = tuple(urls)
+        self.engines = [make_engine(url) for url in self.urls]
+        self.health_check_interval = health_check_interval
+        self._healthy = [True] * len(self.engines)
+        self._checked_at = [float("-inf")] * len(self.engines)
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def _probe(self, index: int) -> bool:
+        try:
+            with self.engines[index].connect() as conn:
+                conn.execute(text("SELECT 1"))
+            healthy = True
+        except Exception:
+            logger.warning("Read replica %s failed its health check", self.urls[index], exc_info=True)
+            healthy = False
+        self._healthy[index] = healthy
+        return healthy
+
+    def choose(self):
+        """The next healthy replica engine, or None when none is available."""
+        count = len(self.engines)
+        start = next(self._counter)
+        now = time.monotonic()
+        for offset in range(count):
+            index = (start + offset) % count
+            with self._lock:
+                due = now - self._checked_at[index] >= self.health_check_interval
+                if due:
+                    self._checked_at[index] = now
+            if due:
+                self._probe(index)
+            if self._healthy[index]:
+                return self.engines[index]
+        return None
+
+    def mark_unhealthy(self, engine):
+        if engine not in self.engines:
+            return
+        index = self.engines.index(engine)
+        self._healthy[index] = False
+        self._checked_at[index] = time.monotonic()
+
+    def dispose(self):
+        for engine in self.engines:
+            engine.dispose()
+
+
+class RecentWriters:
+    """Clients that wrote to the primary within the last ``window`` seconds.
+
+    Reads from those clients go to the primary so they see their own writes
+    despite replication lag. Clients are keyed by a digest of their bearer
+    token; anonymous requests never get the guarantee.
+    """
+
+    def __init__(self, window: float = 5.0, max_entries: int = 100_000):
+        self.window = window
+        self.max_entries = max_entries
+        self._last_write = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: str):
+        now = time.monotonic()
+        with self._lock:
+            self._last_write[key] = now
+            if len(self._last_write) > self.max_entries:
+                cutoff = now - self.window
+                self._last_write = {k: t for k, t in self._last_write.items() if t > cutoff}
+
+    def wrote_recently(self, key: str) -> bool:
+        written_at = self._last_write.get(key)
+        return written_at is not None and time.monotonic() - written_at < self.window
+
+    def clear(self):
+        with self._lock:
+            self._last_write.clear()
+
+
+replicas: Optional[ReplicaSet] = None
+recent_writers = RecentWriters()
+
+readSessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+
+def configure_replicas(
+    urls: Sequence[str] = (),
+    read_your_writes_seconds: float = 5.0,
+    health_check_interval: float = 30.0,
+):
+    """Route ``get_read_db`` sessions to ``urls`` (none: everything reads the primary)."""
+    global replicas
+    if replicas is not None:
+        replicas.dispose()
+    replicas = ReplicaSet(urls, health_check_interval) if urls else None
+    recent_writers.window = read_your_writes_seconds
+    recent_writers.clear()
+    return replicas
+
+
+def _client_key(request: Optional[Request]) -> Optional[str]:
+    if request is None:
+        return None
+    authorization = request.headers.get("authorization")
+    if not authorization:
+        return None
+    return hashlib.sha1(authorization.encode()).hexdigest()
+
+
+@event.listens_for(sessionLocal, "after_flush")
+def _flag_pending_write(session, flush_context):
+    session.info["pending_write"] = True
+
+
+@event.listens_for(sessionLocal, "after_commit")
+def _flag_write(session):
+    if session.info.pop("pending_write", False):
+        session.info["wrote"] = True
+
+
+@event.listens_for(sessionLocal, "after_rollback")
+def _discard_pending_write(session):
+    session.info.pop("pending_write", None)
+
+
+@event.listens_for(readSessionLocal, "before_flush")
+def _refuse_writes(session, flush_context, instances):
+    raise RuntimeError("Read-only session: use get_db for routes that write")
+
+
+def get_db(request: Request = None):
     db = sessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        if db.info.get("wrote"):
+            key = _client_key(request)
+            if key is not None:
+                recent_writers.record(key)
+        db.close()
+
+
+def get_read_db(request: Request = None):
+    """Session for read-only routes: a replica when one is configured and healthy.
+
+    Falls back to the primary when no replica is available and for clients
+    that wrote within the read-your-writes window.
+    """
+    engine = None
+    if replicas is not None:
+        key = _client_key(request)
+        if key is None or not recent_writers.wrote_recently(key):
+            engine = replicas.choose()
+    db = readSessionLocal(bind=engine) if engine is not None else sessionLocal()
+    db.info["replica"] = engine is not None
+    try:
+        yield db
+    except OperationalError:
+        if engine is not None:
+            replicas.mark_unhealthy(engine)
+        raise
+    finally:
+        db.close()
+
+
+def upsert_increments(db, table, keys: Sequence[str], rows, columns: Sequence[str]):
+    """Add ``columns`` of each row onto the existing row with the same ``keys``.
+
+    ``db`` is a Session or Connection. One INSERT ... ON CONFLICT DO UPDATE
+    for all rows on SQLite and PostgreSQL; other dialects fall back to an
+    UPDATE (then INSERT if nothing matched) per row.
+    """
+    if not rows:
+        return
+    dialect = (db.get_bind() if isinstance(db, Session) else db).dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c[key] for key in keys],
+            set_={column: table.c[column] + stmt.excluded[column] for column in columns},
+        )
+        db.execute(stmt, rows)
+        return
+    for row in rows:
+        updated = db.execute(
+            table.update()
+            .where(and_(*(table.c[key] == row[key] for key in keys)))
+            .values({column: table.c[column] + row[column] for column in columns})
+        )
+        if updated.rowcount == 0:
+            db.execute(insert(table), row)
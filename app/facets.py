@@ -0,0 +1,90 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, case, func, or_
+from sqlalchemy.orm import Session
+
+from app import models
+from app.cache import FACETS_KEY, NearCache
+
+# (value, lower bound inclusive, upper bound exclusive); None is unbounded.
+PRICE_BUCKETS: Tuple[Tuple[str, Optional[float], Optional[float]], ...] = (
+    ("0-25", None, 25),
+    ("25-50", 25, 50),
+    ("50-100", 50, 100),
+    ("100-250", 100, 250),
+    ("250-500", 250, 500),
+    ("500+", 500, None),
+)
+PRICE_BUCKET_VALUES = tuple(value for value, _, _ in PRICE_BUCKETS)
+AVAILABILITY_VALUES = ("in_stock", "out_of_stock")
+
+
+def _price_condition(lower, upper):
+    conditions = []
+    if lower is not None:
+        conditions.append(models.Product.price >= lower)
+    if upper is not None:
+        conditions.append(models.Product.price < upper)
+    return and_(*conditions)
+
+
+def price_filter(values: Sequence[str]):
+    """SQL condition matching any of the given price buckets."""
+    return or_(*(
+        _price_condition(lower, upper) for value, lower, upper in PRICE_BUCKETS if value in values
+    ))
+
+
+def availability_filter(in_stock: bool):
+    if in_stock:
+        return models.Product.quantity > 0
+    return or_(models.Product.quantity <= 0, models.Product.quantity.is_(None))
+
+
+def catalog_counts(db: Session, cache: NearCache, ttl: float) -> Dict[str, Dict[str, int]]:
+    """Product counts per price bucket and availability, e.g. {"0-25": {"in_stock": 3}}.
+
+    One grouped query over the catalog, cached until a product write
+    invalidates ``FACETS_KEY`` (or ``ttl`` passes).
+    """
+    cached = cache.get_json(FACETS_KEY)
+    if cached is not None:
+        return cached
+
+    bucket = case(
+        *((_price_condition(lower, upper), value) for value, lower, upper in PRICE_BUCKETS[:-1]),
+        else_=PRICE_BUCKETS[-1][0],
+    )
+    availability = case((models.Product.quantity > 0, "in_stock"), else_="out_of_stock")
+    counts: Dict[str, Dict[str, int]] = {value: {} for value in PRICE_BUCKET_VALUES}
+    for value, stock, count in db.query(bucket, availability, func.count()).group_by(bucket, availability):
+        counts[value][stock] = count
+    cache.set_json(FACETS_KEY, counts, ttl=ttl)
+    return counts
+
+
+def facets(
+    counts: Dict[str, Dict[str, int]],
+    prices: Sequence[str],
+    in_stock: Optional[bool],
+) -> Tuple[int, Dict[str, List[dict]]]:
+    """Total matches and facet counts for the selected filters.
+
+    Each facet is counted with the other facet's filter applied but not its
+    own, so every value shows how many results selecting it would give.
+    """
+    stock_values = AVAILABILITY_VALUES if in_stock is None else (
+        ("in_stock",) if in_stock else ("out_of_stock",)
+    )
+    price_values = prices or PRICE_BUCKET_VALUES
+    total = sum(counts[price].get(stock, 0) for price in price_values for stock in stock_values)
+    return total, {
+        "price": [
+            {"value": price, "count": sum(counts[price].get(stock, 0) for stock in stock_values)}
+            for price in PRICE_BUCKET_VALUES
+        ],
+        "availability": [
+            {"value": stock, "count": sum(counts[price].get(stock, 0) for price in price_values)}
+            for stock in AVAILABILITY_VALUES
+        ],
+    }
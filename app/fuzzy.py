@@ -0,0 +1,158 @@
+"""Typo-tolerant product name search over a trigram index.
+
+Names and queries are split into trigrams the way pg_trgm does it (lower
+case, words of letters and digits padded with two spaces in front and one
+behind), and a product scores the best Jaccard similarity between the query's
+trigrams and those of one of its words, so "labtop" finds "Laptop Stand".
+
+On PostgreSQL the ``pg_trgm`` GIN index on ``products.name`` (migration 0009)
+finds candidates with ``<%`` and ranks them by ``word_similarity``. Elsewhere
+``product_name_trigrams`` is the index: candidates are the products sharing a
+trigram with the query, counted per word from its primary key. The routes keep
+it current; rebuild it after bulk-loading products:
+
+    python -m app.fuzzy rebuild
+"""
+import argparse
+import re
+import time
+from typing import Dict, List, Set, Tuple
+
+from sqlalchemy import func, literal, select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.config import Settings
+from app.database import Base, make_engine
+
+name_trigrams = models.ProductNameTrigram.__table__
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+def trigrams(word: str) -> Set[str]:
+    padded = f"  {word.lower()} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def word_trigrams(text: str) -> List[Set[str]]:
+    """Trigram sets of each word of ``text``."""
+    return [trigrams(word) for word in _WORD.findall(text)]
+
+
+def _uses_pg_trgm(db) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def _rows(product_id: int, name: str) -> List[dict]:
+    return [
+        {"trigram": trigram, "product_id": product_id, "word": position, "word_trigrams": len(grams)}
+        for position, grams in enumerate(word_trigrams(name))
+        for trigram in grams
+    ]
+
+
+# ------------------ MAINTENANCE ------------------ #
+def index_product(db: Session, product_id: int, name: str):
+    """(Re)index a product's name in the caller's transaction."""
+    if _uses_pg_trgm(db):
+        return
+    unindex_product(db, product_id)
+    rows = _rows(product_id, name)
+    if rows:
+        db.execute(name_trigrams.insert(), rows)
+
+
+def unindex_product(db: Session, product_id: int):
+    # Removed explicitly: SQLite does not enforce the cascade by default.
+    if not _uses_pg_trgm(db):
+        db.execute(name_trigrams.delete().where(name_trigrams.c.product_id == product_id))
+
+
+def rebuild(engine, batch_size: int = 5000) -> int:
+    """Replace the trigram table with the trigrams of every product name."""
+    if engine.dialect.name == "postgresql":
+        return 0
+    products = models.Product.__table__
+    written = 0
+    with engine.begin() as conn:
+        conn.execute(name_trigrams.delete())
+        batch = []
+        for product_id, name in conn.execute(select(products.c.id, products.c.name)).all():
+            batch.extend(_rows(product_id, name))
+            if len(batch) >= batch_size:
+                conn.execute(name_trigrams.insert(), batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            conn.execute(name_trigrams.insert(), batch)
+            written += len(batch)
+    return written
+
+
+# ------------------ SEARCH ------------------ #
+def search(db: Session, query: str, limit: int, threshold: float) -> List[Tuple[models.Product, float]]:
+    """Up to ``limit`` products whose best word scores at least ``threshold``, best first."""
+    grams: Dict[str, None] = dict.fromkeys(
+        trigram for grams in word_trigrams(query) for trigram in sorted(grams)
+    )
+    if not grams:
+        return []
+
+    if _uses_pg_trgm(db):
+        # ``<%`` uses the GIN index with this (transaction-local) threshold.
+        db.execute(select(func.set_config("pg_trgm.word_similarity_threshold", str(threshold), True)))
+        score = func.word_similarity(query, models.Product.name)
+        return [
+            (product, float(similarity))
+            for product, similarity in db.query(models.Product, score)
+            .filter(literal(query).op("<%")(models.Product.name))
+            .order_by(score.desc(), models.Product.id)
+            .limit(limit)
+        ]
+
+    query_size = len(grams)
+    matches = (
+        select(
+            name_trigrams.c.product_id,
+            func.count().label("matched"),
+            func.max(name_trigrams.c.word_trigrams).label("size"),
+        )
+        .where(name_trigrams.c.trigram.in_(list(grams)))
+        .group_by(name_trigrams.c.product_id, name_trigrams.c.word)
+        .subquery()
+    )
+    # Jaccard similarity of the query and one word: shared / (|query| + |word| - shared).
+    similarity = matches.c.matched * 1.0 / (query_size + matches.c.size - matches.c.matched)
+    best = (
+        select(matches.c.product_id, func.max(similarity).label("score"))
+        .group_by(matches.c.product_id)
+        .subquery()
+    )
+    return [
+        (product, score)
+        for product, score in db.query(models.Product, best.c.score)
+        .join(best, best.c.product_id == models.Product.id)
+        .filter(best.c.score >= threshold)
+        .order_by(best.c.score.desc(), models.Product.id)
+        .limit(limit)
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.fuzzy", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=("rebuild",))
+    parser.add_argument("--database-url", help="Defaults to DATABASE_URL / settings")
+    args = parser.parse_args(argv)
+
+    engine = make_engine(args.database_url or Settings.from_env().database_url)
+    Base.metadata.create_all(bind=engine)
+    start = time.perf_counter()
+    written = rebuild(engine)
+    engine.dispose()
+    print(f"Trigram index rebuilt: {written} trigrams in {time.perf_counter() - start:.1f}s.")
+
+
+if __name__ == "__main__":
+    main()
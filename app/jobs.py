@@ -0,0 +1,203 @@
+"""Durable background jobs.
+
+Jobs are rows in the ``jobs`` table, so they survive restarts and need
+nothing beyond the application database (SQLite included). Request handlers
+``enqueue`` work in their own transaction, so a job exists exactly when the
+request's changes were committed, and return without waiting for it.
+
+Worker threads started in the application lifespan claim due jobs one at a
+time, run the registered handler and delete the job in the handler's
+transaction. A failing job is retried with exponential backoff until
+``max_attempts``, then kept as ``failed`` for inspection. On shutdown the
+workers stop claiming and finish the jobs in hand; anything still queued runs
+after the next start.
+"""
+import json
+import logging
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session
+
+from app import analytics, models, recommendations
+from app.monitoring.metrics import JOB_DURATION, JOBS_PROCESSED
+
+logger = logging.getLogger("app.jobs")
+
+# Delay before retry n is RETRY_BASE_SECONDS * 2 ** (n - 1), at most RETRY_MAX_SECONDS.
+RETRY_BASE_SECONDS = 5.0
+RETRY_MAX_SECONDS = 3600.0
+# A job running for longer than this is assumed lost with its worker and is
+# claimed again.
+JOB_TIMEOUT_SECONDS = 600.0
+
+Handler = Callable[[Session, dict], None]
+HANDLERS: Dict[str, Handler] = {}
+
+
+def handler(kind: str):
+    """Register the decorated function as the handler of ``kind`` jobs."""
+    def register(func: Handler) -> Handler:
+        HANDLERS[kind] = func
+        return func
+    return register
+
+
+def enqueue(db: Session, kind: str, payload: Optional[dict] = None, delay: float = 0,
+            max_attempts: int = 5) -> models.Job:
+    """Add a job in the caller's transaction; it runs once that commits."""
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    job = models.Job(
+        kind=kind,
+        payload=json.dumps(payload or {}),
+        max_attempts=max_attempts,
+        run_at=datetime.utcnow() + timedelta(seconds=delay),
+    )
+    db.add(job)
+    return job
+
+
+def retry_delay(attempts: int) -> float:
+    return min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS)
+
+
+def _claim(db: Session) -> Optional[models.Job]:
+    """Mark the next due job as running; None when there is none.
+
+    The claim is an UPDATE conditional on the attempt count read, which
+    every claim bumps, so of two workers (threads or processes) racing for
+    the same row only one wins.
+    """
+    now = datetime.utcnow()
+    due = or_(
+        (models.Job.status == "queued") & (models.Job.run_at <= now),
+        (models.Job.status == "running") & (models.Job.locked_at < now - timedelta(seconds=JOB_TIMEOUT_SECONDS)),
+    )
+    for job_id, attempts in (
+        db.query(models.Job.id, models.Job.attempts)
+        .filter(due)
+        .order_by(models.Job.run_at, models.Job.id)
+        .limit(5)
+        .all()
+    ):
+        claimed = db.execute(
+            update(models.Job)
+            .where(models.Job.id == job_id, models.Job.attempts == attempts, due)
+            .values(status="running", locked_at=now, attempts=attempts + 1)
+        ).rowcount
+        db.commit()
+        if claimed:
+            return db.get(models.Job, job_id)
+    db.commit()
+    return None
+
+
+def run_next(db: Session) -> bool:
+    """Claim and run one due job; returns False when none was due."""
+    job = _claim(db)
+    if job is None:
+        return False
+    job_id, kind = job.id, job.kind
+    start = time.perf_counter()
+    try:
+        HANDLERS[kind](db, json.loads(job.payload))
+        db.delete(job)
+        db.commit()
+        JOBS_PROCESSED.inc(kind=kind, result="done")
+    except Exception:
+        db.rollback()
+        job = db.get(models.Job, job_id)
+        job.last_error = traceback.format_exc(limit=5)[-2000:]
+        job.locked_at = None
+        if job.attempts >= job.max_attempts:
+            job.status = "failed"
+            JOBS_PROCESSED.inc(kind=kind, result="failed")
+            logger.error("Job %s (%s) failed permanently", job_id, kind, exc_info=True)
+        else:
+            job.status = "queued"
+            job.run_at = datetime.utcnow() + timedelta(seconds=retry_delay(job.attempts))
+            JOBS_PROCESSED.inc(kind=kind, result="retried")
+            logger.warning("Job %s (%s) failed; retrying", job_id, kind, exc_info=True)
+        db.commit()
+    finally:
+        JOB_DURATION.observe(time.perf_counter() - start, kind=kind)
+    return True
+
+
+def run_pending(db: Session, limit: int = 1000) -> int:
+    """Run due jobs in the calling thread until none is left; returns how many ran."""
+    ran = 0
+    while ran < limit and run_next(db):
+        ran += 1
+    return ran
+
+
+class JobWorkers:
+    """``concurrency`` daemon threads running due jobs.
+
+    ``get_db`` is a dependency-style generator factory (see
+    ``app.counters.StatsFlusher``); each thread opens its own session per
+    poll. Idle threads look for work every ``poll_interval`` seconds.
+    """
+
+    def __init__(self, get_db: Callable[[], Iterator[Session]], concurrency: int, poll_interval: float):
+        self.get_db = get_db
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        if self.concurrency <= 0 or self._threads:
+            return
+        self._stop.clear()
+        for number in range(self.concurrency):
+            thread = threading.Thread(target=self._run, name=f"job-worker-{number}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _run(self):
+        while not self._stop.is_set():
+            db_gen = self.get_db()
+            try:
+                db = next(db_gen)
+                # Keep going while there is work, but stop claiming once asked to.
+                while not self._stop.is_set() and run_next(db):
+                    pass
+            except Exception:
+                logger.warning("Job worker could not reach the database", exc_info=True)
+            finally:
+                db_gen.close()
+            self._stop.wait(self.poll_interval)
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop claiming jobs and wait up to ``timeout`` seconds for running ones."""
+        self._stop.set()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(0, deadline - time.monotonic()))
+        if any(thread.is_alive() for thread in self._threads):
+            logger.warning("Job workers still running after %ss; their jobs will be reclaimed", timeout)
+        self._threads = []
+
+
+# ------------------ HANDLERS ------------------ #
+@handler("analytics.record_order")
+def _record_order(db: Session, payload: dict):
+    order = db.get(models.Order, payload["order_id"])
+    if order is None:
+        return
+    analytics.record_order(db, order.created_at, [
+        {"product_id": item.product_id, "quantity": item.quantity, "price": item.price}
+        for item in db.query(models.OrderItem).filter(models.OrderItem.order_id == order.id)
+    ])
+
+
+@handler("recommendations.update")
+def _update_recommendations(db: Session, payload: dict):
+    recommendations.update(db.get_bind(), top_k=payload.get("top_k", 10))
@@ -1,36 +1,173 @@
-import os
-from dotenv import load_dotenv
-import stripe
+import logging
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from typing import Optional
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import Base, engine
-from app.routes import users, products, carts, orders, admin
-
-load_dotenv()
-stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
-Base.metadata.create_all(bind=engine)
-
-app = FastAPI(title="E-Commerce API")
-
-app.include_router(users.router)
-app.include_router(products.router)
-app.include_router(carts.router)
-app.include_router(orders.router)
-app.include_router(admin.router)
-
-@app.get("/")
-def root():
-    return {"message": "API is running"}
-
-origins = [
-    "http://localhost:5173",
-    "http://127.0.0.1:5173"
-]
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
\ No newline at end of file
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from app import database, payments
+from app.auth import jwt_handler
+from app.cache import InMemoryCache, NearCache, create_backend
+from app.counters import StatsFlusher, product_counters
+from app.jobs import JobWorkers
+from app.ratelimit import RateLimiter
+from app.stream import stock_updates
+from app.sweeper import CartSweeper
+from app.config import Settings
+from app.auth.revocation import revocations
+from app.autocomplete import autocomplete_index, load_index
+from app.database import Base, get_db
+from app.routes import users, products, carts, orders, admin, monitoring
+from app.monitoring import memory, profiling
+from app.monitoring import sql as sql_monitoring
+from app.monitoring.metrics import DB_POOL_CHECKED_OUT
+from app.monitoring.memory import MemoryMiddleware
+from app.monitoring.middleware import MetricsMiddleware
+from app.monitoring.profiling import ProfilingMiddleware
+
+logger = logging.getLogger("app")
+
+
+def warm_up():
+    """Pay first-use costs before traffic arrives instead of on the first requests."""
+    from app.auth.jwt_handler import create_access_token, verify_token
+    from app.auth.utils import get_pwd_context
+
+    get_pwd_context()
+    verify_token(create_access_token({"sub": "0"}))
+    payments.get_stripe()
+    with database.engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+
+def load_revocations(get_session):
+    db_gen = get_session()
+    try:
+        revocations.load(next(db_gen))
+    except SQLAlchemyError:
+        # An unmigrated database must not keep the API from starting, but
+        # revoked tokens are accepted until it is migrated.
+        logger.error("Could not load token revocations; run the migrations", exc_info=True)
+    finally:
+        db_gen.close()
+
+
+def load_autocomplete(get_session):
+    db_gen = get_session()
+    try:
+        load_index(autocomplete_index, next(db_gen))
+    except SQLAlchemyError:
+        logger.error("Could not build the autocomplete index; run the migrations", exc_info=True)
+    finally:
+        db_gen.close()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    settings: Settings = app.state.settings
+    payments.configure(settings.stripe_secret_key, settings.stripe_api_base)
+    if settings.create_schema:
+        Base.metadata.create_all(bind=database.engine)
+    if settings.warm_up:
+        warm_up()
+    # Resolved per call so dependency overrides (tests) are honoured.
+    get_session = lambda: app.dependency_overrides.get(get_db, get_db)()
+    revocations.configure(settings.revocation_bloom_capacity, settings.revocation_bloom_error_rate)
+    load_revocations(get_session)
+    revocations.attach(app.state.cache.backend)
+    load_autocomplete(get_session)
+    autocomplete_index.attach(app.state.cache.backend)
+    stock_updates.attach(app.state.cache.backend)
+    product_counters.listeners.append(autocomplete_index.add_popularity)
+    flusher = StatsFlusher(product_counters, get_session, interval=settings.stats_flush_interval_seconds)
+    flusher.start()
+    sweeper = CartSweeper(
+        get_session,
+        interval=settings.cart_sweep_interval_seconds,
+        max_age=timedelta(days=settings.cart_expiry_days),
+    )
+    sweeper.start()
+    workers = JobWorkers(
+        get_session, concurrency=settings.job_workers, poll_interval=settings.job_poll_interval_seconds
+    )
+    workers.start()
+    yield
+    # End any event streams still open.
+    stock_updates.close()
+    workers.stop(timeout=settings.job_drain_timeout_seconds)
+    sweeper.stop()
+    flusher.stop()
+    product_counters.listeners.remove(autocomplete_index.add_popularity)
+    stock_updates.detach()
+    autocomplete_index.detach()
+    revocations.detach()
+    app.state.cache.close()
+
+
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
+    settings = settings or Settings.from_env()
+    jwt_handler.configure(
+        settings.secret_key, settings.jwt_algorithm, settings.access_token_expire_minutes
+    )
+    database.configure_database(settings.database_url)
+    database.configure_replicas(
+        settings.read_replica_urls,
+        read_your_writes_seconds=settings.read_your_writes_seconds,
+        health_check_interval=settings.replica_health_check_seconds,
+    )
+
+    app = FastAPI(title="E-Commerce API", lifespan=lifespan)
+    app.state.settings = settings
+    # Building the backend does no I/O; connections are opened on first use.
+    app.state.cache = NearCache(
+        create_backend(settings.cache_url), local_ttl=settings.cache_local_ttl_seconds
+    )
+    app.state.rate_limiter = RateLimiter(
+        app.state.cache.backend if settings.rate_limit_backend == "cache" else InMemoryCache(),
+        limits=settings.rate_limits,
+        enabled=settings.rate_limit_enabled,
+        trust_forwarded_for=settings.rate_limit_trust_forwarded_for,
+    )
+
+    app.include_router(users.router)
+    app.include_router(products.router)
+    app.include_router(carts.router)
+    app.include_router(orders.router)
+    app.include_router(admin.router)
+    app.include_router(monitoring.router)
+
+    @app.get("/")
+    def root():
+        return {"message": "API is running"}
+
+    sql_monitoring.configure(settings.sql_slow_query_ms, settings.sql_n_plus_one_threshold)
+    sql_monitoring.install()
+    DB_POOL_CHECKED_OUT.set_function(lambda: database.engine.pool.checkedout())
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=list(settings.cors_origins),
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    memory.configure(settings.tracemalloc_frames, settings.memory_max_snapshots)
+    if settings.tracemalloc:
+        memory.start()
+    app.add_middleware(MemoryMiddleware)
+    profiling.configure(settings.profile_max_stored)
+    app.add_middleware(
+        ProfilingMiddleware,
+        sample_rate=settings.profile_sample_rate,
+        interval_ms=settings.profile_interval_ms,
+    )
+    # Added last so it wraps CORS and every route: latency includes all middleware.
+    app.add_middleware(MetricsMiddleware)
+    return app
+
+
+# Module-level instance for ``uvicorn app.main:app``; building it only reads
+# settings. Use ``uvicorn --factory app.main:create_app`` for a fresh instance.
+app = create_app()
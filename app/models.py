@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Boolean, Date, DateTime, ForeignKey, Index, func
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -11,6 +11,8 @@ class User(Base):
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
     is_admin = Column(Boolean, default=False)
+    # Embedded in issued tokens; bumping it invalidates every token of the user.
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
 
 class Product(Base):
     __tablename__ = "products"
@@ -18,34 +20,65 @@ class Product(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, index=True, nullable=False)
     description = Column(String, nullable=True)
-    price = Column(Float, nullable=False)
-    quantity = Column(Integer, default=0)
-    created_at = Column(DateTime, default=datetime.utcnow())
+    # Indexed for price-bucket filters and price sorts in /products/search.
+    price = Column(Float, nullable=False, index=True)
+    # Indexed for the low-stock report (quantity <= threshold).
+    quantity = Column(Integer, default=0, index=True)
+    # Set per insert; /products/search?sort=newest orders by it.
+    created_at = Column(DateTime, default=datetime.utcnow)
 
 class CartItem(Base):
     __tablename__ = "cart_items"
+    __table_args__ = (
+        # Cart lookups always filter by user, usually together with product.
+        Index("ix_cart_items_user_id_product_id", "user_id", "product_id"),
+        # Covers the cart demand report: units per product are summed from
+        # the index in product order, without reading the table.
+        Index("ix_cart_items_product_id_quantity", "product_id", "quantity"),
+        # The cart sweeper finds expired rows oldest first.
+        Index("ix_cart_items_updated_at", "updated_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     product_id = Column(Integer, ForeignKey("products.id"))
     quantity = Column(Integer, default=1)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow, server_default=func.now())
+    # Bumped whenever the quantity changes; carts idle past the expiry are swept.
+    updated_at = Column(
+        DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow, server_default=func.now()
+    )
 
     user = relationship("User")
     product = relationship("Product")
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        # Order history: a user's orders, newest first.
+        Index("ix_orders_user_id_created_at", "user_id", "created_at"),
+        # Order export: every order in a date range, in (created_at, id) order.
+        Index("ix_orders_created_at_id", "created_at", "id"),
+        # Payment confirmation records each Stripe session as one order.
+        Index("ix_orders_stripe_session_id", "stripe_session_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     total_price = Column(Float, default=0.0)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # The paid Stripe Checkout Session; None for orders loaded outside the API.
+    stripe_session_id = Column(String, nullable=True)
 
     user = relationship("User")
     items = relationship("OrderItem", back_populates="order")
 
 class OrderItem(Base):
     __tablename__ = "order_items"
+    __table_args__ = (
+        Index("ix_order_items_order_id", "order_id"),
+        Index("ix_order_items_product_id", "product_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     order_id = Column(Integer, ForeignKey("orders.id"))
@@ -54,4 +87,123 @@ class OrderItem(Base):
     price = Column(Float)
 
     order = relationship("Order", back_populates="items")
-    product = relationship("Product")
\ No newline at end of file
+    product = relationship("Product")
+
+class CheckoutSession(Base):
+    __tablename__ = "checkout_sessions"
+
+    # The cart as sent to Stripe at checkout. Turned into an Order (and
+    # deleted) once the payment is confirmed; abandoned ones are purged by
+    # the cart sweeper.
+    id = Column(String, primary_key=True)  # Stripe Checkout Session id
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    total_price = Column(Float, nullable=False)
+    # JSON list of {"product_id", "quantity", "price"} at the charged prices.
+    items = Column(String, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(String(32), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    # Rows can be purged once the token would have expired anyway.
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+class ProductStats(Base):
+    __tablename__ = "product_stats"
+    __table_args__ = (
+        # /products/popular reads this index backwards instead of sorting.
+        Index("ix_product_stats_popularity", "popularity", "product_id"),
+    )
+
+    # Written by app.counters in batched upserts, never per request.
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    views = Column(Integer, nullable=False, default=0, server_default="0")
+    cart_adds = Column(Integer, nullable=False, default=0, server_default="0")
+    purchases = Column(Integer, nullable=False, default=0, server_default="0")
+    # Weighted sum of the counts (app.counters.POPULARITY_WEIGHTS).
+    popularity = Column(Integer, nullable=False, default=0, server_default="0")
+
+    product = relationship("Product")
+
+class ProductCooccurrence(Base):
+    __tablename__ = "product_cooccurrence"
+
+    # Number of orders containing both products; stored in both directions.
+    # Kept so new orders can be added without recounting the history.
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    related_product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    count = Column(Integer, nullable=False, default=0, server_default="0")
+
+class ProductRecommendation(Base):
+    __tablename__ = "product_recommendations"
+
+    # Top-K of product_cooccurrence per product, precomputed by
+    # app.recommendations; GET /products/{id}/related reads one PK range.
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    rank = Column(Integer, primary_key=True)
+    related_product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    score = Column(Integer, nullable=False)
+
+    related_product = relationship("Product", foreign_keys=[related_product_id])
+
+class ProcessingWatermark(Base):
+    __tablename__ = "processing_watermarks"
+
+    # Highest order id folded into an incrementally maintained table.
+    name = Column(String, primary_key=True)
+    last_id = Column(Integer, nullable=False, default=0, server_default="0")
+
+class SalesDaily(Base):
+    __tablename__ = "sales_daily"
+
+    # Maintained by app.analytics as orders are recorded (and by its backfill).
+    day = Column(Date, primary_key=True)
+    orders = Column(Integer, nullable=False, default=0, server_default="0")
+    units = Column(Integer, nullable=False, default=0, server_default="0")
+    revenue = Column(Float, nullable=False, default=0.0, server_default="0")
+
+class SalesDailyProduct(Base):
+    __tablename__ = "sales_daily_products"
+
+    day = Column(Date, primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    # Orders containing the product.
+    orders = Column(Integer, nullable=False, default=0, server_default="0")
+    units = Column(Integer, nullable=False, default=0, server_default="0")
+    revenue = Column(Float, nullable=False, default=0.0, server_default="0")
+
+class ProductNameTrigram(Base):
+    __tablename__ = "product_name_trigrams"
+
+    # Trigram index over product names for fuzzy search on databases without
+    # pg_trgm, maintained by app.fuzzy. One row per trigram of each word.
+    trigram = Column(String(3), primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    # Position of the word in the name, and how many trigrams it has.
+    word = Column(Integer, primary_key=True)
+    word_trigrams = Column(Integer, nullable=False)
+
+class Job(Base):
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Workers claim the next due job: status = 'queued' and run_at <= now.
+        Index("ix_jobs_status_run_at", "status", "run_at"),
+    )
+
+    # Background work queued by app.jobs and run by its worker threads.
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)
+    # JSON-encoded arguments of the handler.
+    payload = Column(String, nullable=False, default="{}")
+    # queued -> running -> deleted on success; back to queued (with backoff)
+    # on failure until max_attempts, then failed.
+    status = Column(String, nullable=False, default="queued")
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    # Set when claimed; running jobs older than the timeout are reclaimed.
+    locked_at = Column(DateTime, nullable=True)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
@@ -0,0 +1,95 @@
+from contextvars import ContextVar
+from typing import Callable, List, Optional
+
+# Per-request bookkeeping shared with code that runs while the request is
+# being served (SQL event listeners, etc.). Sync endpoints execute in a
+# threadpool with a copy of the request context, so the object stored here is
+# the same instance the middleware reads back once the response is sent.
+_current_request: ContextVar[Optional["RequestStats"]] = ContextVar(
+    "current_request_stats", default=None
+)
+
+UNMATCHED_ROUTE = "unmatched"
+
+_request_listeners: List[Callable[["RequestStats"], None]] = []
+# Number of active statement captures; full statement recording is skipped
+# entirely (no list appends) unless someone is listening for it.
+_statement_captures = 0
+
+
+class RequestStats:
+    __slots__ = (
+        "method", "path", "route", "scope", "status_code",
+        "statement_count", "db_time", "statement_shapes", "statements",
+    )
+
+    def __init__(self, method: str, path: str, record_statements: bool = False, scope=None):
+        self.method = method
+        self.path = path
+        self.route = UNMATCHED_ROUTE
+        self.scope = scope
+        self.status_code = None
+        self.statement_count = 0
+        self.db_time = 0.0
+        # normalized statement text -> number of executions in this request
+        self.statement_shapes = {}
+        # (statement, parameters) pairs; only kept while a capture is active
+        self.statements = [] if record_statements else None
+
+
+    def current_route(self) -> str:
+        """Route template, resolved from the ASGI scope once routing has happened."""
+        if self.scope is not None:
+            return route_template(self.scope)
+        return self.route
+
+
+def route_template(scope) -> str:
+    """Return the matched route template (``/products/{product_id}``) for a scope.
+
+    Raw paths are never used as label values so metric cardinality stays
+    bounded by the number of routes.
+    """
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _current_request.get()
+
+
+def start_request(stats: RequestStats):
+    return _current_request.set(stats)
+
+
+def end_request(token):
+    _current_request.reset(token)
+
+
+def add_request_listener(listener: Callable[[RequestStats], None]):
+    """Register a callback invoked with the stats of every completed request."""
+    _request_listeners.append(listener)
+
+
+def remove_request_listener(listener: Callable[[RequestStats], None]):
+    if listener in _request_listeners:
+        _request_listeners.remove(listener)
+
+
+def recording_statements() -> bool:
+    return _statement_captures > 0
+
+
+def begin_statement_capture():
+    global _statement_captures
+    _statement_captures += 1
+
+
+def end_statement_capture():
+    global _statement_captures
+    _statement_captures -= 1
+
+
+def notify_request_complete(stats: RequestStats):
+    for listener in list(_request_listeners):
+        listener(stats)
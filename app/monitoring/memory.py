@@ -0,0 +1,193 @@
+import threading
+import tracemalloc
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+from app.monitoring import metrics
+from app.monitoring.context import route_template
+
+# tracemalloc-based allocation tracking. Tracing is off unless TRACEMALLOC=1
+# (Settings.tracemalloc, or PYTHONTRACEMALLOC) is set, because tracing slows
+# every allocation; the middleware below is a single ``is_tracing()`` check
+# while it is off.
+
+TRACEMALLOC_FRAMES = 10
+MEMORY_MAX_SNAPSHOTS = 10
+
+GROUP_BY_CHOICES = ("lineno", "filename", "traceback")
+
+# Python 3.9+. Without it the traced peak is the process-wide high-water mark,
+# which only gives a request's peak when the request raised it.
+_reset_peak = getattr(tracemalloc, "reset_peak", None)
+
+# Allocations made by the tracer itself or the import system are noise.
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+class MemoryTrackingDisabled(RuntimeError):
+    pass
+
+
+def configure(frames: int = 10, max_snapshots: int = 10):
+    global TRACEMALLOC_FRAMES
+    TRACEMALLOC_FRAMES = frames
+    memory_tracker.max_snapshots = max_snapshots
+
+
+def start(frames: int = None):
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames or TRACEMALLOC_FRAMES)
+
+
+def stop():
+    tracemalloc.stop()
+
+
+def _require_tracing():
+    if not tracemalloc.is_tracing():
+        raise MemoryTrackingDisabled("Memory tracking is disabled; set TRACEMALLOC=1")
+
+
+class RouteMemoryStats:
+    __slots__ = ("requests", "net_bytes", "max_peak_bytes", "last_peak_bytes")
+
+    def __init__(self):
+        self.requests = 0
+        self.net_bytes = 0
+        self.max_peak_bytes = 0
+        self.last_peak_bytes = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "net_bytes": self.net_bytes,
+            "avg_net_bytes": self.net_bytes // self.requests if self.requests else 0,
+            "max_peak_bytes": self.max_peak_bytes,
+            "last_peak_bytes": self.last_peak_bytes,
+        }
+
+
+class MemoryTracker:
+    """Per-route allocation totals plus named snapshots for diffing."""
+
+    def __init__(self, max_snapshots: int = MEMORY_MAX_SNAPSHOTS):
+        self.max_snapshots = max_snapshots
+        self._routes = {}
+        self._snapshots = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, route: str, net_bytes: int, peak_bytes: int):
+        with self._lock:
+            stats = self._routes.get(route)
+            if stats is None:
+                stats = self._routes[route] = RouteMemoryStats()
+            stats.requests += 1
+            stats.net_bytes += net_bytes
+            stats.last_peak_bytes = peak_bytes
+            stats.max_peak_bytes = max(stats.max_peak_bytes, peak_bytes)
+        metrics.REQUEST_PEAK_ALLOCATED_BYTES.observe(peak_bytes, route=route)
+
+    def route_stats(self) -> dict:
+        with self._lock:
+            return {route: stats.as_dict() for route, stats in self._routes.items()}
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+            self._snapshots.clear()
+
+    def top(self, limit: int = 20, group_by: str = "lineno"):
+        _require_tracing()
+        snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        return [_format_stat(stat) for stat in snapshot.statistics(group_by)[:limit]]
+
+    def take_snapshot(self, label: str = None) -> dict:
+        _require_tracing()
+        snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        entry = {
+            "id": uuid.uuid4().hex[:12],
+            "label": label,
+            "created_at": datetime.utcnow().isoformat(),
+            "traced_bytes": tracemalloc.get_traced_memory()[0],
+        }
+        with self._lock:
+            self._snapshots[entry["id"]] = (entry, snapshot)
+            while len(self._snapshots) > self.max_snapshots:
+                self._snapshots.popitem(last=False)
+        return entry
+
+    def snapshots(self):
+        with self._lock:
+            return [entry for entry, _ in self._snapshots.values()]
+
+    def diff(self, first_id: str, second_id: str, limit: int = 20, group_by: str = "lineno"):
+        """Allocation sites that grew (or shrank) between two snapshots, largest first."""
+        first = self._snapshots.get(first_id)
+        second = self._snapshots.get(second_id)
+        if first is None or second is None:
+            raise KeyError(first_id if first is None else second_id)
+        differences = second[1].compare_to(first[1], group_by)
+        return [_format_stat_diff(stat) for stat in differences[:limit]]
+
+
+def _format_traceback(traceback) -> list:
+    return [f"{frame.filename}:{frame.lineno}" for frame in traceback]
+
+
+def _format_stat(stat) -> dict:
+    return {
+        "traceback": _format_traceback(stat.traceback),
+        "size_bytes": stat.size,
+        "count": stat.count,
+    }
+
+
+def _format_stat_diff(stat) -> dict:
+    return {
+        "traceback": _format_traceback(stat.traceback),
+        "size_bytes": stat.size,
+        "size_diff_bytes": stat.size_diff,
+        "count": stat.count,
+        "count_diff": stat.count_diff,
+    }
+
+
+memory_tracker = MemoryTracker()
+
+
+class MemoryMiddleware:
+    """Pure ASGI middleware recording peak and net traced bytes per route.
+
+    ``tracemalloc`` counters are process-wide, so with concurrent requests the
+    numbers include allocations made by overlapping requests; run the mode on
+    a single worker with low concurrency when hunting a specific handler.
+    """
+
+    def __init__(self, app, tracker: MemoryTracker = None):
+        self.app = app
+        self.tracker = tracker or memory_tracker
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not tracemalloc.is_tracing():
+            await self.app(scope, receive, send)
+            return
+
+        before, peak_before = tracemalloc.get_traced_memory()
+        if _reset_peak is not None:
+            _reset_peak()
+            peak_before = before
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if tracemalloc.is_tracing():
+                current, peak = tracemalloc.get_traced_memory()
+                # A peak that did not move says nothing about this request;
+                # its net growth is then the best lower bound.
+                peak_bytes = peak - before if peak > peak_before else max(current - before, 0)
+                self.tracker.record(route_template(scope), current - before, peak_bytes)
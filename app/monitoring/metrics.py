@@ -0,0 +1,307 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Minimal Prometheus-compatible metrics registry.
+# Kept dependency-free and cheap enough to leave on in production: every
+# update is a dict lookup plus a short critical section on a per-metric lock.
+
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children = {}
+
+    def _key(self, labels: dict):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}"
+            )
+        return tuple(labels[name] for name in self.labelnames)
+
+    def clear(self):
+        with self._lock:
+            self._children.clear()
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self):
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._children[key] = self._children.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._children.get(self._key(labels), 0)
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._children.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        super().__init__(name, documentation, labelnames)
+        # A callback gauge is sampled at scrape time instead of being updated
+        # on the hot path (e.g. connection pool occupancy).
+        self._callback = callback
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._children[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._children[key] = self._children.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, callback):
+        self._callback = callback
+
+    def value(self, **labels) -> float:
+        if self._callback is not None:
+            return self._callback()
+        return self._children.get(self._key(labels), 0)
+
+    def _samples(self):
+        if self._callback is not None:
+            try:
+                return [f"{self.name} {_format_value(self._callback())}"]
+            except Exception:
+                return []
+        with self._lock:
+            items = list(self._children.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                # [per-bucket counts..., +Inf count, sum]
+                child = self._children[key] = [0] * (len(self.buckets) + 2)
+            child[index] += 1
+            child[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        child = self._children.get(self._key(labels))
+        return sum(child[:-1]) if child else 0
+
+    def sum(self, **labels) -> float:
+        child = self._children.get(self._key(labels))
+        return child[-1] if child else 0.0
+
+    def _samples(self):
+        with self._lock:
+            items = [(key, list(child)) for key, child in self._children.items()]
+        lines = []
+        for key, child in items:
+            cumulative = 0
+            bounds = self.buckets + (float("inf"),)
+            for bound, count in zip(bounds, child[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+                )
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(child[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str):
+        return self._metrics.get(name)
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=(), callback=None):
+        return self.register(Gauge(name, documentation, labelnames, callback))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# ------------------ APPLICATION METRICS ------------------ #
+HTTP_REQUESTS = REGISTRY.counter(
+    "http_requests_total",
+    "Total HTTP requests by method, route template and status code.",
+    ("method", "route", "status"),
+)
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by method and route template.",
+    ("method", "route"),
+)
+HTTP_REQUESTS_IN_PROGRESS = REGISTRY.gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being served.",
+)
+DB_STATEMENTS_PER_REQUEST = REGISTRY.histogram(
+    "db_statements_per_request",
+    "SQL statements executed while serving a request, by route template.",
+    ("route",),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+DB_TIME_PER_REQUEST = REGISTRY.histogram(
+    "db_time_per_request_seconds",
+    "Total time spent executing SQL while serving a request, by route template.",
+    ("route",),
+)
+DB_SLOW_QUERIES = REGISTRY.counter(
+    "db_slow_queries_total",
+    "SQL statements slower than the slow query threshold, by route template.",
+    ("route",),
+)
+DB_N_PLUS_ONE_SUSPECTED = REGISTRY.counter(
+    "db_n_plus_one_suspected_total",
+    "Requests that repeated an identical statement shape (likely N+1), by route template.",
+    ("route",),
+)
+DB_POOL_CHECKED_OUT = REGISTRY.gauge(
+    "db_pool_checked_out_connections",
+    "Database connections currently checked out of the pool.",
+)
+PASSWORD_HASH_DURATION = REGISTRY.histogram(
+    "password_hash_duration_seconds",
+    "Time spent in bcrypt hashing and verification.",
+    ("operation",),
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.5),
+)
+STRIPE_REQUEST_DURATION = REGISTRY.histogram(
+    "stripe_request_duration_seconds",
+    "Latency of outbound Stripe API calls.",
+    ("operation",),
+)
+REQUEST_PEAK_ALLOCATED_BYTES = REGISTRY.histogram(
+    "http_request_peak_allocated_bytes",
+    "Peak traced allocation per request (only while tracemalloc is enabled).",
+    ("route",),
+    buckets=(1 << 10, 1 << 14, 1 << 16, 1 << 18, 1 << 20, 1 << 22, 1 << 24, 1 << 26, 1 << 28),
+)
+RATE_LIMITED_REQUESTS = REGISTRY.counter(
+    "http_rate_limited_total",
+    "Requests rejected with 429 by the rate limiter, by route and bucket key kind.",
+    ("route", "key"),
+)
+TOKEN_REVOCATION_CHECKS = REGISTRY.counter(
+    "auth_token_revocation_checks_total",
+    "Token revocation lookups: cleared by the Bloom filter, revoked, or Bloom false positives.",
+    ("result",),
+)
+CART_ROWS_RECLAIMED = REGISTRY.counter(
+    "cart_rows_reclaimed_total",
+    "Rows deleted by the cart sweeper: expired carts, items of deleted products or abandoned checkouts.",
+    ("reason",),
+)
+CART_SWEEP_DURATION = REGISTRY.histogram(
+    "cart_sweep_duration_seconds",
+    "Time taken by one cart sweep.",
+)
+JOBS_PROCESSED = REGISTRY.counter(
+    "jobs_processed_total",
+    "Background jobs run, by kind and result (done, retried or failed).",
+    ("kind", "result"),
+)
+JOB_DURATION = REGISTRY.histogram(
+    "job_duration_seconds",
+    "Time taken by one background job attempt, by kind.",
+    ("kind",),
+)
@@ -0,0 +1,47 @@
+import time
+
+from app.monitoring import context, metrics
+from app.monitoring.context import RequestStats, route_template
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording per-route latency, status and SQL counts."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(
+            scope["method"],
+            scope["path"],
+            record_statements=context.recording_statements(),
+            scope=scope,
+        )
+        token = context.start_request(stats)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        metrics.HTTP_REQUESTS_IN_PROGRESS.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.HTTP_REQUESTS_IN_PROGRESS.dec()
+            stats.route = route = route_template(scope)
+            stats.status_code = status_code
+            metrics.HTTP_REQUEST_DURATION.observe(elapsed, method=stats.method, route=route)
+            metrics.HTTP_REQUESTS.inc(method=stats.method, route=route, status=str(status_code))
+            metrics.DB_STATEMENTS_PER_REQUEST.observe(stats.statement_count, route=route)
+            metrics.DB_TIME_PER_REQUEST.observe(stats.db_time, route=route)
+            context.end_request(token)
+            context.notify_request_complete(stats)
@@ -0,0 +1,308 @@
+import marshal
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from contextvars import Context, ContextVar
+from datetime import datetime
+from typing import Optional
+from urllib.parse import parse_qsl
+
+from starlette.concurrency import run_in_threadpool
+
+from app import models
+from app.auth.jwt_handler import verify_token
+from app.auth.revocation import revocations
+from app.database import get_db
+from app.monitoring.context import route_template
+
+# Opt-in request profiling. A request is profiled when an admin sends the
+# ``X-Profile: 1`` header (or ``?_profile=1``), or when it is picked by the
+# random sampler (``Settings.profile_sample_rate``, 0 disables sampling). Requests that
+# are not profiled only pay for a header scan.
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY_PARAM = "_profile"
+
+PROFILE_SAMPLE_RATE = 0.0
+PROFILE_INTERVAL_MS = 2.0
+PROFILE_MAX_STORED = 50
+
+# The sampler of the request being profiled, set in the request's context.
+# Sync endpoints and dependencies run in threadpool workers inside a copy of
+# that context, and the request's coroutines run on the event loop inside its
+# task's context, so a thread belongs to the request while the context it is
+# executing in carries this sampler.
+_active_sampler: ContextVar[Optional["StackSampler"]] = ContextVar("active_sampler", default=None)
+
+
+def _running_context(frame) -> Optional[Context]:
+    """The ``contextvars.Context`` a thread is executing in, if it can be told.
+
+    Looks for the frame that entered it: an anyio worker thread running a
+    threadpool call (``context.run(func)``) or an asyncio handle running a
+    task step (``self._context.run(...)``). Only frames with those names have
+    their locals read.
+    """
+    while frame is not None:
+        name = frame.f_code.co_name
+        if name == "run" or name == "_run":
+            local = frame.f_locals
+            context = local.get("context")
+            if context is None and name == "_run":
+                context = getattr(local.get("self"), "_context", None)
+            if isinstance(context, Context):
+                return context
+        frame = frame.f_back
+    return None
+
+
+class StackSampler:
+    """Wall-clock sampling profiler of the threads serving one request.
+
+    Only threads currently executing in the request's context are sampled
+    (see ``_active_sampler``), so concurrent requests served by other
+    threadpool workers, and idle threads, never show up in its profile.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.is_set():
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                context = _running_context(frame)
+                if context is None or context.get(_active_sampler) is not self:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                    frame = frame.f_back
+                stack.reverse()
+                self.samples[tuple(stack)] += 1
+            self._stop.wait(self.interval)
+
+
+class Profile:
+    def __init__(self, method, path, trigger, interval):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        self.route = None
+        self.status_code = None
+        self.trigger = trigger
+        self.interval = interval
+        self.duration = 0.0
+        self.created_at = datetime.utcnow()
+        self.samples = Counter()
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status_code": self.status_code,
+            "trigger": self.trigger,
+            "duration_ms": round(self.duration * 1000, 3),
+            "sample_count": sum(self.samples.values()),
+            "created_at": self.created_at.isoformat(),
+        }
+
+    def collapsed(self) -> str:
+        """Brendan Gregg collapsed-stack format, one ``frame;frame;... count`` per line."""
+        lines = []
+        for stack, count in self.samples.most_common():
+            frames = ";".join(
+                f"{name} ({os.path.basename(filename)}:{lineno})"
+                for filename, lineno, name in stack
+            )
+            lines.append(f"{frames} {count}")
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def pstats(self) -> bytes:
+        """Marshalled stats loadable with ``pstats.Stats``.
+
+        Times are derived from samples: each sample contributes one interval to
+        the inclusive time of every function on its stack and to the own time
+        of the leaf. Call counts are sample counts.
+        """
+        stats = {}
+        for stack, count in self.samples.items():
+            elapsed = count * self.interval
+            seen = set()
+            for depth, func in enumerate(stack):
+                entry = stats.setdefault(func, [0, 0, 0.0, 0.0, {}])
+                if func not in seen:
+                    seen.add(func)
+                    entry[0] += count
+                    entry[1] += count
+                    entry[3] += elapsed
+                if depth == len(stack) - 1:
+                    entry[2] += elapsed
+                if depth:
+                    caller = stack[depth - 1]
+                    edge = entry[4].setdefault(caller, [0, 0, 0.0, 0.0])
+                    edge[0] += count
+                    edge[1] += count
+                    edge[3] += elapsed
+                    if depth == len(stack) - 1:
+                        edge[2] += elapsed
+        return marshal.dumps({
+            func: (cc, nc, tt, ct, {caller: tuple(edge) for caller, edge in callers.items()})
+            for func, (cc, nc, tt, ct, callers) in stats.items()
+        })
+
+
+class ProfileStore:
+    """Bounded in-memory store; the oldest profile is evicted first."""
+
+    def __init__(self, max_items: int):
+        self.max_items = max_items
+        self._profiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, profile: Profile):
+        with self._lock:
+            self._profiles[profile.id] = profile
+            while len(self._profiles) > self.max_items:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str):
+        return self._profiles.get(profile_id)
+
+    def list(self):
+        with self._lock:
+            return list(reversed(self._profiles.values()))
+
+    def clear(self):
+        with self._lock:
+            self._profiles.clear()
+
+
+profile_store = ProfileStore(PROFILE_MAX_STORED)
+
+
+def configure(max_stored: int = 50):
+    profile_store.max_items = max_stored
+
+
+def _header(scope, name: bytes):
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _profile_requested(scope) -> bool:
+    if _header(scope, PROFILE_HEADER) == "1":
+        return True
+    query_string = scope.get("query_string", b"")
+    return (
+        PROFILE_QUERY_PARAM.encode() in query_string
+        and (PROFILE_QUERY_PARAM, "1") in parse_qsl(query_string.decode("latin-1"))
+    )
+
+
+def _is_admin_request(scope) -> bool:
+    """Resolve the bearer token of a request to an admin user.
+
+    Like ``require_admin`` the user row decides (role claims go stale on
+    demotion); it is read through the application's ``get_db`` (honouring
+    dependency overrides) so the check runs against the database routes use.
+    Tokens claiming the user role are refused without a read.
+    """
+    authorization = _header(scope, b"authorization") or ""
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    payload = verify_token(token)
+    if not payload or payload.get("sub") is None or revocations.is_token_revoked(payload):
+        return False
+    if payload.get("role") == "user":
+        return False
+
+    app = scope.get("app")
+    overrides = getattr(app, "dependency_overrides", {})
+    db_gen = overrides.get(get_db, get_db)()
+    db = next(db_gen)
+    try:
+        user = (
+            db.query(models.User.token_version, models.User.is_admin)
+            .filter(models.User.id == int(payload["sub"]))
+            .first()
+        )
+        return bool(user and user.is_admin and payload.get("ver", 0) >= (user.token_version or 0))
+    finally:
+        db_gen.close()
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware running selected requests under the stack sampler."""
+
+    def __init__(self, app, sample_rate: float = None, interval_ms: float = None, store=None):
+        self.app = app
+        self.sample_rate = PROFILE_SAMPLE_RATE if sample_rate is None else sample_rate
+        self.interval = (PROFILE_INTERVAL_MS if interval_ms is None else interval_ms) / 1000
+        self.store = store or profile_store
+
+    async def _trigger(self, scope):
+        if _profile_requested(scope):
+            if await run_in_threadpool(_is_admin_request, scope):
+                return "requested"
+            return None
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sampled"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trigger = await self._trigger(scope)
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile(scope["method"], scope["path"], trigger, self.interval)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                profile.status_code = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"x-profile-id", profile.id.encode())
+                ]
+            await send(message)
+
+        sampler = StackSampler(self.interval)
+        token = _active_sampler.set(sampler)
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop()
+            _active_sampler.reset(token)
+            profile.duration = time.perf_counter() - start
+            profile.route = route_template(scope)
+            profile.samples = sampler.samples
+            self.store.add(profile)
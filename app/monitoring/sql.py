@@ -0,0 +1,122 @@
+import logging
+import re
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.monitoring import context, metrics
+from app.monitoring.context import current_request_stats
+
+logger = logging.getLogger("app.sql")
+
+# Statements slower than this are logged with their bound parameters.
+SLOW_QUERY_MS = 100.0
+
+# A statement shape executed this many times in one request is reported as a
+# likely N+1 (a query issued per row of a previous result).
+N_PLUS_ONE_THRESHOLD = 3
+
+_installed = False
+
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)|\(\s*%\(\w+\)s(?:\s*,\s*%\(\w+\)s)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def statement_shape(statement: str) -> str:
+    """Normalize a statement so executions differing only by values compare equal.
+
+    SQLAlchemy already emits bound placeholders, so only whitespace and
+    expanded ``IN (?, ?, ...)`` lists need folding.
+    """
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    return _IN_LIST.sub("(?)", shape)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context_, executemany):
+    stats = current_request_stats()
+    if stats is None:
+        return
+    stats.statement_count += 1
+    shape = statement_shape(statement)
+    stats.statement_shapes[shape] = stats.statement_shapes.get(shape, 0) + 1
+    if stats.statements is not None:
+        stats.statements.append((statement, parameters))
+    if context_ is not None:
+        context_._query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context_, executemany):
+    stats = current_request_stats()
+    if stats is None:
+        return
+    start = getattr(context_, "_query_start", None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    stats.db_time += elapsed
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        metrics.DB_SLOW_QUERIES.inc(route=stats.current_route())
+        logger.warning(
+            "Slow query (%.1f ms) during %s %s: %s | parameters=%r",
+            elapsed * 1000, stats.method, stats.path, statement, parameters,
+        )
+
+
+def find_repeated_statements(stats, threshold: int = None):
+    """Return ``{shape: count}`` for shapes executed at least ``threshold`` times."""
+    threshold = threshold or N_PLUS_ONE_THRESHOLD
+    return {
+        shape: count
+        for shape, count in stats.statement_shapes.items()
+        if count >= threshold
+    }
+
+
+def _report_n_plus_one(stats):
+    repeated = find_repeated_statements(stats)
+    if not repeated:
+        return
+    metrics.DB_N_PLUS_ONE_SUSPECTED.inc(route=stats.route)
+    for shape, count in repeated.items():
+        logger.warning(
+            "Possible N+1 in %s %s (route %s): statement executed %d times: %s",
+            stats.method, stats.path, stats.route, count, shape,
+        )
+
+
+def configure(slow_query_ms: float = 100.0, n_plus_one_threshold: int = 3):
+    global SLOW_QUERY_MS, N_PLUS_ONE_THRESHOLD
+    SLOW_QUERY_MS = slow_query_ms
+    N_PLUS_ONE_THRESHOLD = n_plus_one_threshold
+
+
+def install():
+    """Attach SQL instrumentation to every engine (including test engines)."""
+    global _installed
+    if _installed:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    context.add_request_listener(_report_n_plus_one)
+    _installed = True
+
+
+@contextmanager
+def capture_requests():
+    """Collect the :class:`RequestStats` of every request completed in the block.
+
+    Statements and their bound parameters are recorded on each entry's
+    ``statements`` list while the capture is active.
+    """
+    captured = []
+    context.begin_statement_capture()
+    context.add_request_listener(captured.append)
+    try:
+        yield captured
+    finally:
+        context.remove_request_listener(captured.append)
+        context.end_statement_capture()
@@ -0,0 +1,29 @@
+# Stripe SDK access. ``stripe`` is a heavy import, so it is loaded on the
+# first payment call instead of when the application module is imported.
+
+_config = {"api_key": None, "api_base": None}
+_stripe = None
+
+
+def configure(api_key=None, api_base=None):
+    _config["api_key"] = api_key
+    _config["api_base"] = api_base
+    if _stripe is not None:
+        _apply(_stripe)
+
+
+def _apply(module):
+    if _config["api_key"]:
+        module.api_key = _config["api_key"]
+    if _config["api_base"]:
+        module.api_base = _config["api_base"]
+
+
+def get_stripe():
+    global _stripe
+    if _stripe is None:
+        import stripe
+
+        _apply(stripe)
+        _stripe = stripe
+    return _stripe
@@ -0,0 +1,104 @@
+import hashlib
+import logging
+import math
+from dataclasses import dataclass
+from typing import Mapping, Optional
+
+from fastapi import HTTPException, Request, status
+
+from app.cache import CacheBackend, CacheError
+from app.monitoring.metrics import RATE_LIMITED_REQUESTS
+
+logger = logging.getLogger("app.ratelimit")
+
+# "<route>.<key kind>" -> "<requests>/<seconds>". Each limit is a token bucket
+# holding <requests> tokens that refills at <requests>/<seconds> per second.
+DEFAULT_LIMITS = {
+    "login.ip": "20/60",
+    "login.email": "5/60",
+    "register.ip": "5/60",
+    "register.email": "3/3600",
+}
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    capacity: float
+    period: float
+
+    @classmethod
+    def parse(cls, spec: str) -> "RateLimit":
+        requests, _, seconds = spec.partition("/")
+        limit = cls(float(requests), float(seconds))
+        if limit.capacity <= 0 or limit.period <= 0:
+            raise ValueError(f"Invalid rate limit: {spec}")
+        return limit
+
+    @property
+    def refill_per_second(self) -> float:
+        return self.capacity / self.period
+
+
+def client_ip(request: Request, trust_forwarded_for: bool = False) -> str:
+    if trust_forwarded_for:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+class RateLimiter:
+    """Token-bucket limits keyed by route and client attribute (IP, email).
+
+    Buckets live in ``backend``: an ``InMemoryCache`` limits per process, the
+    shared cache backend limits across workers. If the backend is unreachable
+    requests are let through rather than locking everyone out.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        limits: Optional[Mapping[str, str]] = None,
+        enabled: bool = True,
+        trust_forwarded_for: bool = False,
+    ):
+        self.backend = backend
+        self.limits = {
+            name: RateLimit.parse(spec) for name, spec in {**DEFAULT_LIMITS, **(limits or {})}.items()
+        }
+        self.enabled = enabled
+        self.trust_forwarded_for = trust_forwarded_for
+
+    def hit(self, name: str, value: str) -> float:
+        """Take a token for ``value`` under limit ``name``; returns the wait if over the limit."""
+        limit = self.limits.get(name)
+        if limit is None or not self.enabled:
+            return 0.0
+        digest = hashlib.sha1(value.encode()).hexdigest()
+        try:
+            allowed, retry_after = self.backend.consume_tokens(
+                f"ratelimit:{name}:{digest}", limit.capacity, limit.refill_per_second
+            )
+        except CacheError:
+            logger.warning("Rate limit store unavailable; allowing request", exc_info=True)
+            return 0.0
+        return 0.0 if allowed else retry_after
+
+    def enforce(self, request: Request, route: str, email: Optional[str] = None):
+        """Raise 429 with ``Retry-After`` when the client IP or the email is over its limit."""
+        checks = [("ip", client_ip(request, self.trust_forwarded_for))]
+        if email:
+            checks.append(("email", email.strip().lower()))
+        for kind, value in checks:
+            retry_after = self.hit(f"{route}.{kind}", value)
+            if retry_after > 0:
+                RATE_LIMITED_REQUESTS.inc(route=route, key=kind)
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Too many requests, try again later",
+                    headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+                )
+
+
+def get_rate_limiter(request: Request) -> RateLimiter:
+    return request.app.state.rate_limiter
@@ -0,0 +1,209 @@
+"""Build "frequently bought together" recommendations from order history.
+
+Two products co-occur when they appear in the same order. Pair counts are
+kept in ``product_cooccurrence`` and the top-K related products of each
+product in ``product_recommendations``, which ``GET /products/{id}/related``
+reads directly:
+
+    python -m app.recommendations rebuild --top-k 10
+    python -m app.recommendations update
+
+``rebuild`` recounts the whole history. With NumPy and SciPy installed
+(``pip install numpy scipy``) it builds the sparse order x product matrix X
+and computes the counts as Xᵀ·X and the top-K with array operations;
+without them it falls back to ``update`` from an empty state. ``update``
+only folds in orders added since the last run (tracked in
+``processing_watermarks``) and re-ranks the products they touched. Order ids
+are assumed to be assigned in commit order.
+"""
+import argparse
+import time
+from collections import defaultdict
+from itertools import chain, permutations
+
+from sqlalchemy import func, insert, select
+
+from app import models
+from app.config import Settings
+from app.database import Base, make_engine, upsert_increments
+
+WATERMARK = "recommendations"
+DEFAULT_TOP_K = 10
+BATCH_SIZE = 10_000
+
+cooccurrence = models.ProductCooccurrence.__table__
+recommendations = models.ProductRecommendation.__table__
+order_items = models.OrderItem.__table__
+watermarks = models.ProcessingWatermark.__table__
+
+
+def _watermark(conn, name: str) -> int:
+    return conn.execute(
+        select(watermarks.c.last_id).where(watermarks.c.name == name)
+    ).scalar() or 0
+
+
+def _set_watermark(conn, name: str, last_id: int):
+    updated = conn.execute(
+        watermarks.update().where(watermarks.c.name == name).values(last_id=last_id)
+    )
+    if updated.rowcount == 0:
+        conn.execute(insert(watermarks), {"name": name, "last_id": last_id})
+
+
+def _insert_batches(conn, table, rows):
+    for start in range(0, len(rows), BATCH_SIZE):
+        conn.execute(insert(table), rows[start:start + BATCH_SIZE])
+
+
+def _rank(conn, product_ids, top_k: int):
+    """Recompute the stored top-K of ``product_ids`` from their pair counts."""
+    product_ids = sorted(product_ids)
+    for start in range(0, len(product_ids), 500):
+        chunk = product_ids[start:start + 500]
+        ranked = select(
+            cooccurrence.c.product_id,
+            cooccurrence.c.related_product_id,
+            cooccurrence.c.count,
+            func.row_number().over(
+                partition_by=cooccurrence.c.product_id,
+                order_by=(cooccurrence.c.count.desc(), cooccurrence.c.related_product_id),
+            ).label("rank"),
+        ).where(cooccurrence.c.product_id.in_(chunk)).subquery()
+        rows = [
+            {"product_id": product_id, "rank": rank, "related_product_id": related, "score": count}
+            for product_id, related, count, rank in conn.execute(
+                select(ranked).where(ranked.c.rank <= top_k)
+            )
+        ]
+        conn.execute(recommendations.delete().where(recommendations.c.product_id.in_(chunk)))
+        _insert_batches(conn, recommendations, rows)
+
+
+def _update(conn, top_k: int) -> dict:
+    since = _watermark(conn, WATERMARK)
+    baskets = defaultdict(set)
+    for order_id, product_id in conn.execute(
+        select(order_items.c.order_id, order_items.c.product_id)
+        .where(order_items.c.order_id > since)
+        .order_by(order_items.c.order_id)
+    ):
+        baskets[order_id].add(product_id)
+    if not baskets:
+        return {"orders": 0, "pairs": 0, "products": 0}
+
+    deltas = defaultdict(int)
+    for products in baskets.values():
+        for pair in permutations(products, 2):
+            deltas[pair] += 1
+    rows = [
+        {"product_id": product_id, "related_product_id": related, "count": count}
+        for (product_id, related), count in sorted(deltas.items())
+    ]
+    for start in range(0, len(rows), BATCH_SIZE):
+        upsert_increments(
+            conn, cooccurrence, ("product_id", "related_product_id"),
+            rows[start:start + BATCH_SIZE], ("count",),
+        )
+    touched = {product_id for product_id, _ in deltas}
+    _rank(conn, touched, top_k)
+    _set_watermark(conn, WATERMARK, max(baskets))
+    return {"orders": len(baskets), "pairs": len(rows), "products": len(touched)}
+
+
+def update(engine, top_k: int = DEFAULT_TOP_K) -> dict:
+    """Fold orders newer than the watermark into the counts and rankings."""
+    with engine.begin() as conn:
+        return _update(conn, top_k)
+
+
+def _vectorized_counts(conn, last_order_id: int):
+    """Pair counts (products, related, counts) of all orders up to ``last_order_id``."""
+    import numpy as np
+    from scipy import sparse
+
+    result = conn.execute(
+        select(order_items.c.order_id, order_items.c.product_id)
+        .where(order_items.c.order_id <= last_order_id)
+    )
+    pairs = np.fromiter(chain.from_iterable(result), dtype=np.int64).reshape(-1, 2)
+    orders, order_index = np.unique(pairs[:, 0], return_inverse=True)
+    product_ids, product_index = np.unique(pairs[:, 1], return_inverse=True)
+    baskets = sparse.csr_matrix(
+        (np.ones(len(pairs), dtype=np.int32), (order_index, product_index)),
+        shape=(len(orders), len(product_ids)),
+    )
+    # A product listed twice in one order still counts once.
+    baskets.sum_duplicates()
+    baskets.data[:] = 1
+    counts = (baskets.T @ baskets).tocoo()
+    off_diagonal = counts.row != counts.col
+    return (
+        product_ids[counts.row[off_diagonal]],
+        product_ids[counts.col[off_diagonal]],
+        counts.data[off_diagonal].astype(np.int64),
+    )
+
+
+def _vectorized_top_k(products, related, counts, top_k: int):
+    import numpy as np
+
+    # Sort by product, then count descending, then related id; the rank of
+    # an entry is its offset from the first entry of its product.
+    order = np.lexsort((related, -counts, products))
+    products, related, counts = products[order], related[order], counts[order]
+    starts = np.flatnonzero(np.r_[True, products[1:] != products[:-1]])
+    rank = np.arange(len(products)) - np.repeat(starts, np.diff(np.r_[starts, len(products)])) + 1
+    keep = rank <= top_k
+    return products[keep], rank[keep], related[keep], counts[keep]
+
+
+def rebuild(engine, top_k: int = DEFAULT_TOP_K) -> dict:
+    """Recount every order and replace the stored counts and rankings."""
+    try:
+        import numpy  # noqa: F401
+        import scipy.sparse  # noqa: F401
+    except ImportError:
+        with engine.begin() as conn:
+            conn.execute(recommendations.delete())
+            conn.execute(cooccurrence.delete())
+            _set_watermark(conn, WATERMARK, 0)
+            return _update(conn, top_k)
+
+    with engine.begin() as conn:
+        last_order_id = conn.execute(select(func.max(order_items.c.order_id))).scalar() or 0
+        products, related, counts = _vectorized_counts(conn, last_order_id)
+        conn.execute(recommendations.delete())
+        conn.execute(cooccurrence.delete())
+        _insert_batches(conn, cooccurrence, [
+            {"product_id": p, "related_product_id": r, "count": c}
+            for p, r, c in zip(products.tolist(), related.tolist(), counts.tolist())
+        ])
+        top_products, ranks, top_related, scores = _vectorized_top_k(products, related, counts, top_k)
+        _insert_batches(conn, recommendations, [
+            {"product_id": p, "rank": k, "related_product_id": r, "score": s}
+            for p, k, r, s in zip(top_products.tolist(), ranks.tolist(), top_related.tolist(), scores.tolist())
+        ])
+        _set_watermark(conn, WATERMARK, last_order_id)
+    return {"pairs": len(products), "products": len(set(top_products.tolist()))}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.recommendations", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=("rebuild", "update"))
+    parser.add_argument("--database-url", help="Defaults to DATABASE_URL / settings")
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K)
+    args = parser.parse_args(argv)
+
+    engine = make_engine(args.database_url or Settings.from_env().database_url)
+    Base.metadata.create_all(bind=engine)
+    start = time.perf_counter()
+    result = (rebuild if args.command == "rebuild" else update)(engine, top_k=args.top_k)
+    engine.dispose()
+    summary = ", ".join(f"{value} {name}" for name, value in result.items())
+    print(f"Recommendations {args.command}: {summary} in {time.perf_counter() - start:.1f}s.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import date, datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
-from app import models, schemas
+from typing import List, Literal, Optional
+from app.database import get_db, get_read_db
+from app import analytics, export, fuzzy, jobs, models, schemas
 from app.auth.dependencies import require_admin
+from app.autocomplete import autocomplete_index
+from app.stream import stock_updates
+from app.cache import FACETS_KEY, NearCache, get_cache, product_key
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
@@ -12,6 +18,7 @@ router = APIRouter(prefix="/admin", tags=["Admin"])
 def create_product(
     product: schemas.ProductCreate,
     db: Session = Depends(get_db),
+    cache: NearCache = Depends(get_cache),
     admin_user = Depends(require_admin)
 ):
     new_product = models.Product(
@@ -21,8 +28,12 @@ def create_product(
         quantity=product.quantity,
     )
     db.add(new_product)
+    db.flush()
+    fuzzy.index_product(db, new_product.id, new_product.name)
     db.commit()
     db.refresh(new_product)
+    cache.invalidate(FACETS_KEY)
+    autocomplete_index.put(new_product.id, new_product.name)
     return new_product
 
 
@@ -32,6 +43,7 @@ def update_product(
     product_id: int,
     updated_data: schemas.ProductUpdate,
     db: Session = Depends(get_db),
+    cache: NearCache = Depends(get_cache),
     admin_user = Depends(require_admin)
 ):
     product = db.query(models.Product).filter(models.Product.id == product_id).first()
@@ -42,9 +54,13 @@ def update_product(
     product.description = updated_data.description or product.description
     product.price = updated_data.price or product.price
     product.quantity = updated_data.quantity or product.quantity
+    fuzzy.index_product(db, product.id, product.name)
 
     db.commit()
     db.refresh(product)
+    cache.invalidate(product_key(product_id), FACETS_KEY)
+    autocomplete_index.put(product.id, product.name)
+    stock_updates.publish([{"id": product.id, "price": product.price, "quantity": product.quantity}])
     return product
 
 
@@ -53,14 +69,19 @@ def update_product(
 def delete_product(
     product_id: int,
     db: Session = Depends(get_db),
+    cache: NearCache = Depends(get_cache),
     admin_user = Depends(require_admin)
 ):
     product = db.query(models.Product).filter(models.Product.id == product_id).first()
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
 
+    fuzzy.unindex_product(db, product_id)
     db.delete(product)
     db.commit()
+    cache.invalidate(product_key(product_id), FACETS_KEY)
+    autocomplete_index.remove(product_id)
+    stock_updates.publish([{"id": product_id, "deleted": True}])
     return {"detail": "Product deleted"}
 
 
@@ -72,3 +93,169 @@ def get_all_products(
 ):
     products = db.query(models.Product).all()
     return products
+
+
+# ------------------ SALES ANALYTICS ------------------ #
+@router.get("/analytics/sales", response_model=schemas.SalesReportOut)
+def sales_analytics(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    top: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db),
+    admin_user = Depends(require_admin)
+):
+    """Revenue, units and orders per day and for the top products (default: last 30 days)."""
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=29)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    return analytics.sales_report(db, start, end, top)
+
+
+# ------------------ ORDER EXPORT ------------------ #
+EXPORT_FORMATS = {
+    "csv": ("text/csv", export.csv_chunks),
+    "ndjson": ("application/x-ndjson", export.ndjson_chunks),
+}
+
+@router.get("/orders/export")
+def export_orders(
+    start: date = Query(..., alias="from"),
+    end: date = Query(..., alias="to"),
+    format: Literal["csv", "ndjson"] = "csv",
+    # Request scope (the default): the session stays open while the rows stream.
+    db: Session = Depends(get_read_db),
+    admin_user = Depends(require_admin)
+):
+    """Every order line placed in [from, to], streamed as CSV or NDJSON."""
+    if start > end:
+        raise HTTPException(status_code=400, detail="from must not be after to")
+    media_type, chunks = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        chunks(export.export_batches(db, start, end)),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="orders-{start}-{end}.{format}"'},
+    )
+
+
+# ------------------ INVENTORY ------------------ #
+@router.get("/inventory/low-stock", response_model=List[schemas.ProductOut])
+def low_stock(
+    threshold: int = Query(10, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_read_db),
+    admin_user = Depends(require_admin)
+):
+    """Products with at most ``threshold`` units on hand, emptiest first (ix_products_quantity)."""
+    return (
+        db.query(models.Product)
+        .filter(models.Product.quantity <= threshold)
+        .order_by(models.Product.quantity, models.Product.id)
+        .limit(limit)
+        .all()
+    )
+
+
+@router.get("/inventory/cart-demand", response_model=List[schemas.CartDemandOut])
+def cart_demand(
+    request: Request,
+    short_only: bool = False,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_read_db),
+    cache: NearCache = Depends(get_cache),
+    admin_user = Depends(require_admin)
+):
+    """Units in carts versus on hand per product, largest shortfall first.
+
+    One grouped pass over ix_cart_items_product_id_quantity; only products
+    that are in at least one cart are joined (by primary key). The pass is
+    linear in cart rows, so the result is cached for ``cache_ttl_seconds``.
+    """
+    key = f"report:cart-demand:{int(short_only)}:{limit}"
+    cached = cache.get_json(key)
+    if cached is not None:
+        return cached
+
+    demand = (
+        select(
+            models.CartItem.product_id,
+            func.sum(models.CartItem.quantity).label("in_carts"),
+            func.count().label("carts"),
+        )
+        .group_by(models.CartItem.product_id)
+        .subquery()
+    )
+    shortfall = demand.c.in_carts - func.coalesce(models.Product.quantity, 0)
+    query = (
+        db.query(
+            models.Product.id,
+            models.Product.name,
+            func.coalesce(models.Product.quantity, 0),
+            demand.c.in_carts,
+            demand.c.carts,
+            shortfall,
+        )
+        .select_from(demand)
+        .join(models.Product, models.Product.id == demand.c.product_id)
+    )
+    if short_only:
+        query = query.filter(shortfall > 0)
+    rows = query.order_by(shortfall.desc(), models.Product.id).limit(limit).all()
+    report = [
+        {
+            "product_id": product_id,
+            "name": name,
+            "on_hand": on_hand,
+            "in_carts": in_carts,
+            "carts": carts,
+            "shortfall": gap,
+        }
+        for product_id, name, on_hand, in_carts, carts, gap in rows
+    ]
+    cache.set_json(key, report, ttl=request.app.state.settings.cache_ttl_seconds)
+    return report
+
+
+# ------------------ BACKGROUND JOBS ------------------ #
+@router.post("/recommendations/refresh", response_model=schemas.JobOut, status_code=status.HTTP_202_ACCEPTED)
+def refresh_recommendations(
+    top_k: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+    admin_user = Depends(require_admin)
+):
+    """Queue an incremental recommendations update and return without waiting for it."""
+    job = jobs.enqueue(db, "recommendations.update", {"top_k": top_k}, max_attempts=3)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+@router.get("/jobs", response_model=List[schemas.JobOut])
+def list_jobs(
+    job_status: Optional[Literal["queued", "running", "failed"]] = Query(None, alias="status"),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_read_db),
+    admin_user = Depends(require_admin)
+):
+    # Finished jobs are deleted, so the table only holds pending and failed work.
+    query = db.query(models.Job)
+    if job_status:
+        query = query.filter(models.Job.status == job_status)
+    return query.order_by(models.Job.id.desc()).limit(limit).all()
+
+
+@router.post("/jobs/{job_id}/retry", response_model=schemas.JobOut)
+def retry_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    admin_user = Depends(require_admin)
+):
+    job = db.get(models.Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status != "failed":
+        raise HTTPException(status_code=400, detail="Only failed jobs can be retried")
+    job.status, job.attempts, job.run_at = "queued", 0, datetime.utcnow()
+    db.commit()
+    db.refresh(job)
+    return job
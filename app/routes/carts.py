@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from typing import List
 from app import models, schemas
-from app.database import get_db
-from app.auth.dependencies import get_current_user
+from app.counters import product_counters
+from app.database import get_db, get_read_db
+from app.auth.dependencies import get_current_user, get_current_user_read
 
 router = APIRouter(prefix="/cart", tags=["Cart"])
 
@@ -34,14 +35,20 @@ def add_to_cart(
 
     db.commit()
     db.refresh(cart_item)
+    product_counters.record(item.product_id, "cart_adds", item.quantity)
     return cart_item
 
 @router.get("/", response_model=List[schemas.CartItemOut])
 def view_cart(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user_read)
 ):
-    return db.query(models.CartItem).filter(models.CartItem.user_id == current_user.id).all()
+    return (
+        db.query(models.CartItem)
+        .options(joinedload(models.CartItem.product))
+        .filter(models.CartItem.user_id == current_user.id)
+        .all()
+    )
 
 @router.delete("/{product_id}")
 def remove_from_cart(
@@ -0,0 +1,112 @@
+import tracemalloc
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import Response, PlainTextResponse
+from app.auth.dependencies import require_admin
+from app.monitoring.metrics import REGISTRY, CONTENT_TYPE_LATEST
+from app.monitoring.memory import memory_tracker, MemoryTrackingDisabled, GROUP_BY_CHOICES
+from app.monitoring.profiling import profile_store
+
+router = APIRouter(tags=["Monitoring"])
+
+# ------------------ PROMETHEUS METRICS ------------------ #
+@router.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE_LATEST)
+
+
+# ------------------ REQUEST PROFILES ------------------ #
+@router.get("/admin/profiles")
+def list_profiles(admin_user = Depends(require_admin)):
+    return [profile.summary() for profile in profile_store.list()]
+
+
+@router.get("/admin/profiles/{profile_id}")
+def download_profile(
+    profile_id: str,
+    format: str = "collapsed",
+    admin_user = Depends(require_admin)
+):
+    profile = profile_store.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    if format == "collapsed":
+        return PlainTextResponse(
+            profile.collapsed(),
+            headers={"Content-Disposition": f'attachment; filename="{profile_id}.collapsed"'},
+        )
+    if format == "pstats":
+        return Response(
+            profile.pstats(),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="{profile_id}.pstats"'},
+        )
+    raise HTTPException(status_code=400, detail="format must be 'collapsed' or 'pstats'")
+
+
+@router.delete("/admin/profiles")
+def clear_profiles(admin_user = Depends(require_admin)):
+    profile_store.clear()
+    return {"detail": "Profiles cleared"}
+
+
+# ------------------ MEMORY TRACKING ------------------ #
+def _check_group_by(group_by: str):
+    if group_by not in GROUP_BY_CHOICES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"group_by must be one of {', '.join(GROUP_BY_CHOICES)}",
+        )
+
+
+@router.get("/admin/memory")
+def memory_overview(admin_user = Depends(require_admin)):
+    tracing = tracemalloc.is_tracing()
+    current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+    return {
+        "enabled": tracing,
+        "traced_bytes": current,
+        "traced_peak_bytes": peak,
+        "routes": memory_tracker.route_stats(),
+    }
+
+
+@router.get("/admin/memory/top")
+def memory_top_allocations(
+    limit: int = Query(20, ge=1, le=500),
+    group_by: str = "lineno",
+    admin_user = Depends(require_admin)
+):
+    _check_group_by(group_by)
+    try:
+        return memory_tracker.top(limit=limit, group_by=group_by)
+    except MemoryTrackingDisabled as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.post("/admin/memory/snapshots")
+def take_memory_snapshot(label: str = None, admin_user = Depends(require_admin)):
+    try:
+        return memory_tracker.take_snapshot(label)
+    except MemoryTrackingDisabled as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.get("/admin/memory/snapshots")
+def list_memory_snapshots(admin_user = Depends(require_admin)):
+    return memory_tracker.snapshots()
+
+
+@router.get("/admin/memory/snapshots/{first_id}/diff/{second_id}")
+def diff_memory_snapshots(
+    first_id: str,
+    second_id: str,
+    limit: int = Query(20, ge=1, le=500),
+    group_by: str = "lineno",
+    admin_user = Depends(require_admin)
+):
+    _check_group_by(group_by)
+    try:
+        return memory_tracker.diff(first_id, second_id, limit=limit, group_by=group_by)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
@@ -1,11 +1,18 @@
-import os
-import stripe
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Optional, Tuple
 from fastapi.responses import JSONResponse
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app import models, schemas
-from app.database import get_db
-from app.auth.dependencies import get_current_user
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import delete, insert, tuple_
+from sqlalchemy.orm import Session, joinedload, selectinload
+from app import jobs, models, schemas
+from app.counters import product_counters
+from app.database import get_db, get_read_db
+from app.auth.dependencies import get_current_user, get_current_user_read
+from app.monitoring.metrics import STRIPE_REQUEST_DURATION
+from app.payments import get_stripe
 
 
 router = APIRouter(prefix="/orders", tags=["Orders"])
@@ -22,13 +29,18 @@ def checkout(
     if not cart_items:
         raise HTTPException(status_code=400, detail="Cart is empty")
 
-    # 2. Build Stripe line items
+    # 2. Build Stripe line items (all products fetched in one query)
+    product_ids = {item.product_id for item in cart_items}
+    products = {
+        product.id: product
+        for product in db.query(models.Product).filter(
+            models.Product.id.in_(product_ids)
+        )
+    }
     line_items = []
     total = 0
     for item in cart_items:
-        product = db.query(models.Product).filter(
-            models.Product.id == item.product_id
-        ).first()
+        product = products.get(item.product_id)
         if not product or product.quantity < item.quantity:
             raise HTTPException(
                 status_code=400,
@@ -47,26 +59,153 @@ def checkout(
         total += product.price * item.quantity
 
     # 3. Create Stripe Checkout Session
+    stripe = get_stripe()
     try:
-        session = stripe.checkout.Session.create(
-            payment_method_types=["card"],
-            line_items=line_items,
-            mode="payment",
-            success_url="http://127.0.0.1:8000/orders/success?session_id={CHECKOUT_SESSION_ID}",
-            cancel_url="http://127.0.0.1:8000/orders/cancel",
-        )
+        with STRIPE_REQUEST_DURATION.time(operation="checkout.session.create"):
+            session = stripe.checkout.Session.create(
+                payment_method_types=["card"],
+                line_items=line_items,
+                mode="payment",
+                success_url="http://127.0.0.1:8000/orders/success?session_id={CHECKOUT_SESSION_ID}",
+                cancel_url="http://127.0.0.1:8000/orders/cancel",
+            )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-    # 4. Return the session URL for front-end redirect
-    return JSONResponse({"checkout_url": session.url})
+    # 4. Keep the cart at the charged prices until Stripe confirms payment;
+    # the order is recorded by payment_success
+    items = [
+        {"product_id": item.product_id, "quantity": item.quantity, "price": products[item.product_id].price}
+        for item in cart_items
+    ]
+    db.add(models.CheckoutSession(
+        id=session.id,
+        user_id=current_user.id,
+        total_price=round(total, 2),
+        items=json.dumps(items),
+    ))
+    db.commit()
+
+    # 5. Return the session URL for front-end redirect
+    return JSONResponse({"checkout_url": session.url, "session_id": session.id})
+
+def record_paid_order(db: Session, session_id: str) -> Optional[models.Order]:
+    """Turn the checkout of a paid Stripe session into an Order, exactly once.
+
+    Deleting the checkout row claims it, so of two confirmations racing for
+    the same session (a reload, a retried redirect) only one records the
+    order; the other gets the recorded one. The sales rollups are updated by
+    a background job committed with the order, the bought products leave the
+    cart and their purchases count towards popularity. Returns None for an
+    unknown session.
+    """
+    order = db.query(models.Order).filter(models.Order.stripe_session_id == session_id).first()
+    if order:
+        return order
+    checkout = db.get(models.CheckoutSession, session_id)
+    if checkout is None:
+        return None
+    claimed = db.execute(
+        delete(models.CheckoutSession).where(models.CheckoutSession.id == session_id)
+    ).rowcount
+    if not claimed:
+        db.rollback()
+        return db.query(models.Order).filter(models.Order.stripe_session_id == session_id).first()
+
+    items = json.loads(checkout.items)
+    order = models.Order(user_id=checkout.user_id, total_price=checkout.total_price, stripe_session_id=session_id)
+    db.add(order)
+    db.flush()
+    db.execute(insert(models.OrderItem), [{"order_id": order.id, **item} for item in items])
+    db.execute(
+        delete(models.CartItem).where(
+            models.CartItem.user_id == checkout.user_id,
+            models.CartItem.product_id.in_([item["product_id"] for item in items]),
+        )
+    )
+    jobs.enqueue(db, "analytics.record_order", {"order_id": order.id})
+    db.commit()
+    for item in items:
+        product_counters.record(item["product_id"], "purchases", item["quantity"])
+    return order
 
 @router.get("/success")
 def payment_success(session_id: str, db: Session = Depends(get_db)):
-    session = stripe.checkout.Session.retrieve(session_id)
+    stripe = get_stripe()
+    with STRIPE_REQUEST_DURATION.time(operation="checkout.session.retrieve"):
+        session = stripe.checkout.Session.retrieve(session_id)
+    if session.payment_status != "paid":
+        raise HTTPException(status_code=402, detail="Payment not completed")
+    order = record_paid_order(db, session_id)
+    if order is None:
+        raise HTTPException(status_code=404, detail="Checkout session not found")
     customer_email = session.customer_details.email if session.customer_details else None
-    return {"message": "Payment successful", "email": customer_email}
+    return {"message": "Payment successful", "email": customer_email, "order_id": order.id}
 
 @router.get("/cancel")
 def payment_cancel():
-    return {"message": "Payment canceled or failed"}
\ No newline at end of file
+    return {"message": "Payment canceled or failed"}
+
+# ------------------ ORDER HISTORY ------------------ #
+def encode_cursor(created_at: datetime, order_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{order_id}".encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        created_at, _, order_id = base64.urlsafe_b64decode(cursor.encode()).decode().partition("|")
+        return datetime.fromisoformat(created_at), int(order_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@router.get("/", response_model=schemas.OrderPageOut)
+def list_orders(
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    summary: bool = False,
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user_read)
+):
+    """The user's orders, newest first, a page at a time.
+
+    Keyset pagination on (created_at, id) through ix_orders_user_id_created_at,
+    so deep pages cost the same as the first. Full pages load the items and
+    their products with two batched IN queries (3 statements however many
+    orders and items); ``summary=true`` skips the items (1 statement).
+    """
+    if summary:
+        query = db.query(models.Order.id, models.Order.total_price, models.Order.created_at)
+    else:
+        query = db.query(models.Order).options(
+            selectinload(models.Order.items).selectinload(models.OrderItem.product)
+        )
+    query = query.filter(models.Order.user_id == current_user.id)
+    if cursor:
+        query = query.filter(tuple_(models.Order.created_at, models.Order.id) < tuple_(*decode_cursor(cursor)))
+    # One extra row tells whether another page follows.
+    rows = query.order_by(models.Order.created_at.desc(), models.Order.id.desc()).limit(limit + 1).all()
+
+    page = rows[:limit]
+    next_cursor = encode_cursor(page[-1].created_at, page[-1].id) if len(rows) > limit else None
+    if summary:
+        items = [schemas.OrderSummaryOut(id=row.id, total_price=row.total_price, created_at=row.created_at)
+                 for row in page]
+    else:
+        items = [schemas.OrderOut.model_validate(order) for order in page]
+    return {"items": items, "next_cursor": next_cursor}
+
+@router.get("/{order_id}", response_model=schemas.OrderOut)
+def get_order(
+    order_id: int,
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user_read)
+):
+    # One statement: the order joined to its items and their products.
+    order = (
+        db.query(models.Order)
+        .options(joinedload(models.Order.items).joinedload(models.OrderItem.product))
+        .filter(models.Order.id == order_id, models.Order.user_id == current_user.id)
+        .first()
+    )
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return order
@@ -1,27 +1,232 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
-from app import models, schemas
-from app.database import get_db
+from typing import List, Literal, Optional
+from app import facets, fuzzy, models, schemas
+from app.cache import FACETS_KEY, NearCache, get_cache, product_key
+from app.counters import product_counters
+from app.database import get_db, get_read_db
 from app.auth.dependencies import get_current_user
+from app.autocomplete import autocomplete_index
+from app.stream import MAX_STREAM_IDS, encode_event, stock_updates
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
 @router.get("/", response_model=List[schemas.ProductOut])
-def list_products(db: Session = Depends(get_db)):
-    return db.query(models.Product).all()
+def list_products(
+    after: Optional[int] = Query(None, description="Last product id of the previous page"),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db)
+):
+    """Products in id order, a page at a time.
+
+    Keyset pagination on the primary key: pass the last id of a page as
+    ``after`` for the next one, so every page is a short range read.
+    """
+    query = db.query(models.Product)
+    if after is not None:
+        query = query.filter(models.Product.id > after)
+    return query.order_by(models.Product.id).limit(limit).all()
+
+@router.get("/popular", response_model=List[schemas.PopularProductOut])
+def popular_products(
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_read_db)
+):
+    # Walks ix_product_stats_popularity from the top; products without any
+    # recorded activity are not ranked.
+    rows = (
+        db.query(models.Product, models.ProductStats)
+        .join(models.ProductStats, models.ProductStats.product_id == models.Product.id)
+        .order_by(models.ProductStats.popularity.desc(), models.ProductStats.product_id.desc())
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+    return [
+        schemas.PopularProductOut(
+            id=product.id,
+            name=product.name,
+            description=product.description,
+            price=product.price,
+            quantity=product.quantity,
+            views=stats.views,
+            cart_adds=stats.cart_adds,
+            purchases=stats.purchases,
+            popularity=stats.popularity,
+        )
+        for product, stats in rows
+    ]
+
+SEARCH_SORTS = {
+    "id": (models.Product.id,),
+    "price_asc": (models.Product.price, models.Product.id),
+    "price_desc": (models.Product.price.desc(), models.Product.id),
+    "newest": (models.Product.created_at.desc(), models.Product.id),
+}
+
+# Declared before /{product_id} so "search" is not parsed as an id.
+@router.get("/search", response_model=schemas.ProductSearchOut)
+def search_products(
+    request: Request,
+    price: List[str] = Query([], description=f"Price buckets: {', '.join(facets.PRICE_BUCKET_VALUES)}"),
+    in_stock: Optional[bool] = None,
+    sort: Literal["id", "price_asc", "price_desc", "newest"] = "id",
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_read_db),
+    cache: NearCache = Depends(get_cache)
+):
+    """Filtered page of products with price and availability facet counts.
+
+    Two statements at most: the page itself and the grouped facet counts,
+    which are cached until a product changes.
+    """
+    unknown = sorted(set(price) - set(facets.PRICE_BUCKET_VALUES))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown price bucket: {', '.join(unknown)}")
+
+    query = db.query(models.Product)
+    if price:
+        query = query.filter(facets.price_filter(price))
+    if in_stock is not None:
+        query = query.filter(facets.availability_filter(in_stock))
+    items = query.order_by(*SEARCH_SORTS[sort]).offset(offset).limit(limit).all()
+
+    counts = facets.catalog_counts(db, cache, ttl=request.app.state.settings.cache_ttl_seconds)
+    total, facet_counts = facets.facets(counts, price, in_stock)
+    return {"total": total, "items": items, "facets": facet_counts}
+
+@router.get("/autocomplete", response_model=List[schemas.AutocompleteOut])
+def autocomplete(
+    prefix: str = Query(..., min_length=1, max_length=100),
+    sort: Literal["popularity", "name"] = "popularity",
+    limit: int = Query(10, ge=1, le=20)
+):
+    # Answered from the in-memory prefix index (app.autocomplete); no
+    # database access per keystroke.
+    return autocomplete_index.search(prefix, limit=limit, sort=sort)
+
+@router.get("/fuzzy", response_model=List[schemas.FuzzyProductOut])
+def fuzzy_search(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_read_db)
+):
+    # Typo-tolerant: candidates come from the trigram index (app.fuzzy),
+    # never from comparing the query with every name.
+    rows = fuzzy.search(db, q, limit=limit, threshold=request.app.state.settings.fuzzy_search_threshold)
+    return [
+        schemas.FuzzyProductOut(
+            id=product.id,
+            name=product.name,
+            description=product.description,
+            price=product.price,
+            quantity=product.quantity,
+            score=round(score, 4),
+        )
+        for product, score in rows
+    ]
+
+@router.get("/stream")
+def stream_products(
+    ids: str = Query(..., description=f"Comma-separated product ids (at most {MAX_STREAM_IDS})"),
+    db: Session = Depends(get_read_db)
+):
+    """Server-Sent Events with the current stock and price of ``ids``, then every change."""
+    try:
+        product_ids = sorted({int(value) for value in ids.split(",") if value.strip()})
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    if not product_ids or len(product_ids) > MAX_STREAM_IDS:
+        raise HTTPException(status_code=400, detail=f"Give between 1 and {MAX_STREAM_IDS} product ids")
+
+    # Subscribed before reading the snapshot so no change falls in between.
+    subscription = stock_updates.subscribe(product_ids)
+    snapshot = [
+        encode_event({"id": product_id, "price": price, "quantity": quantity})
+        for product_id, price, quantity in db.query(
+            models.Product.id, models.Product.price, models.Product.quantity
+        ).filter(models.Product.id.in_(product_ids)).order_by(models.Product.id)
+    ]
+    # End the read transaction so the connection goes back to the pool now
+    # rather than when the stream ends (dependency teardown runs only then).
+    db.rollback()
+
+    async def events():
+        try:
+            for event in snapshot:
+                yield event
+            async for event in subscription.events():
+                yield event
+        finally:
+            stock_updates.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @router.get("/{product_id}", response_model=schemas.ProductOut)
-def get_product(product_id: int, db: Session = Depends(get_db)):
+def get_product(
+    product_id: int,
+    request: Request,
+    db: Session = Depends(get_read_db),
+    cache: NearCache = Depends(get_cache)
+):
+    key = product_key(product_id)
+    cached = cache.get_json(key)
+    if cached is not None:
+        product_counters.record(product_id, "views")
+        return cached
+
     product = db.query(models.Product).filter(models.Product.id == product_id).first()
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
-    return product
+    data = schemas.ProductOut.model_validate(product).model_dump(mode="json")
+    cache.set_json(key, data, ttl=request.app.state.settings.cache_ttl_seconds)
+    product_counters.record(product_id, "views")
+    return data
+
+@router.get("/{product_id}/related", response_model=List[schemas.RelatedProductOut])
+def related_products(
+    product_id: int,
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_read_db)
+):
+    # Precomputed by app.recommendations: one primary-key range read, no
+    # aggregation. Unknown products and products never ordered get [].
+    rows = (
+        db.query(models.Product, models.ProductRecommendation.score)
+        .join(
+            models.ProductRecommendation,
+            models.ProductRecommendation.related_product_id == models.Product.id,
+        )
+        .filter(models.ProductRecommendation.product_id == product_id)
+        .order_by(models.ProductRecommendation.rank)
+        .limit(limit)
+        .all()
+    )
+    return [
+        schemas.RelatedProductOut(
+            id=product.id,
+            name=product.name,
+            description=product.description,
+            price=product.price,
+            quantity=product.quantity,
+            score=score,
+        )
+        for product, score in rows
+    ]
 
 @router.post("/", response_model=schemas.ProductOut)
 def create_product(
     product: schemas.ProductCreate,
     db: Session = Depends(get_db),
+    cache: NearCache = Depends(get_cache),
     current_user: models.User = Depends(get_current_user)
 ):
     # simple check - later we can add an is_admin field to User
@@ -30,14 +235,19 @@ def create_product(
 
     new_product = models.Product(**product.model_dump())
     db.add(new_product)
+    db.flush()
+    fuzzy.index_product(db, new_product.id, new_product.name)
     db.commit()
     db.refresh(new_product)
+    cache.invalidate(FACETS_KEY)
+    autocomplete_index.put(new_product.id, new_product.name)
     return new_product
 
 @router.delete("/{product_id}")
 def delete_product(
     product_id: int,
     db: Session = Depends(get_db),
+    cache: NearCache = Depends(get_cache),
     current_user: models.User = Depends(get_current_user)
 ):
     if current_user.id != 1:
@@ -46,6 +256,10 @@ def delete_product(
     product = db.query(models.Product).filter(models.Product.id == product_id).first()
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
+    fuzzy.unindex_product(db, product_id)
     db.delete(product)
     db.commit()
+    cache.invalidate(product_key(product_id), FACETS_KEY)
+    autocomplete_index.remove(product_id)
+    stock_updates.publish([{"id": product_id, "deleted": True}])
     return {"message": "Product deleted"}
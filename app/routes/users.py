@@ -1,16 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 from app import models, schemas
 from app.database import get_db
-from app.auth.jwt_handler import create_access_token
+from app.auth.jwt_handler import create_user_token
 from app.auth.utils import hash_password
 from app.auth.utils import verify_password
-from app.auth.dependencies import get_current_user
+from app.auth.dependencies import get_current_user, get_current_user_read, get_token_claims
+from app.auth.revocation import revocations
+from app.ratelimit import RateLimiter, get_rate_limiter
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
 @router.post("/register", response_model=schemas.UserOut)
-def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+def create_user(
+    user: schemas.UserCreate,
+    request: Request,
+    db: Session = Depends(get_db),
+    limiter: RateLimiter = Depends(get_rate_limiter)
+):
+    # Before any DB or bcrypt work, so bursts cost almost nothing to reject.
+    limiter.enforce(request, "register", email=user.email)
     existing_user = db.query(models.User).filter(models.User.email == user.email).first()
     if existing_user:
         raise HTTPException(
@@ -31,7 +41,13 @@ def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
     return new_user
 
 @router.post("/login")
-def login_user(form_data: schemas.UserLogin, db: Session = Depends(get_db)):
+def login_user(
+    form_data: schemas.UserLogin,
+    request: Request,
+    db: Session = Depends(get_db),
+    limiter: RateLimiter = Depends(get_rate_limiter)
+):
+    limiter.enforce(request, "login", email=form_data.email)
     user = db.query(models.User).filter(models.User.email == form_data.email).first()
 
     if not user:
@@ -41,9 +57,37 @@ def login_user(form_data: schemas.UserLogin, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Invalid email or password")
 
     # Create JWT token
-    access_token = create_access_token({"sub": str(user.id)})
+    access_token = create_user_token(user)
     return {"access_token": access_token, "token_type": "bearer"}
 
+@router.post("/logout")
+def logout(claims: dict = Depends(get_token_claims), db: Session = Depends(get_db)):
+    jti = claims.get("jti")
+    if jti is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Token cannot be revoked individually; use /users/logout-all",
+        )
+    db.merge(models.RevokedToken(
+        jti=jti,
+        user_id=int(claims["sub"]),
+        expires_at=datetime.utcfromtimestamp(claims["exp"]),
+    ))
+    db.commit()
+    revocations.revoke(jti, float(claims["exp"]))
+    return {"message": "Logged out"}
+
+@router.post("/logout-all")
+def logout_all(
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    # Every token issued so far carries an older version and stops working.
+    current_user.token_version = (current_user.token_version or 0) + 1
+    db.commit()
+    revocations.set_version(current_user.id, current_user.token_version)
+    return {"message": "Logged out of all sessions"}
+
 @router.get("/me", response_model=schemas.UserOut)
-def get_me(current_user: models.User = Depends(get_current_user)):
+def get_me(current_user: models.User = Depends(get_current_user_read)):
     return current_user
\ No newline at end of file
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr
-from datetime import datetime
-from typing import Union, List
+from datetime import date, datetime
+from typing import Dict, Union, List
 
 class UserCreate(BaseModel):
     username: str
@@ -54,7 +54,8 @@ class OrderItemOut(BaseModel):
     product_id: int
     quantity: int
     price: float
-    product: ProductOut
+    # None once the product has been deleted; price is what was charged.
+    product: Union[ProductOut, None] = None
 
     class Config:
         from_attributes = True
@@ -68,6 +69,19 @@ class OrderOut(BaseModel):
     class Config:
         from_attributes = True
 
+class OrderSummaryOut(BaseModel):
+    id: int
+    total_price: float
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class OrderPageOut(BaseModel):
+    items: List[Union[OrderOut, OrderSummaryOut]]
+    # Pass as ?cursor= for the next (older) page; None on the last page.
+    next_cursor: Union[str, None] = None
+
 class ProductCreate(BaseModel):
     name: str
     description: str
@@ -88,4 +102,80 @@ class ProductOut(BaseModel):
     quantity: int
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class PopularProductOut(ProductOut):
+    views: int
+    cart_adds: int
+    purchases: int
+    popularity: int
+
+
+class RelatedProductOut(ProductOut):
+    # Orders containing both products.
+    score: int
+
+
+class SalesDayOut(BaseModel):
+    day: date
+    orders: int
+    units: int
+    revenue: float
+
+class SalesProductOut(BaseModel):
+    product_id: int
+    name: Union[str, None] = None
+    orders: int
+    units: int
+    revenue: float
+
+class SalesReportOut(BaseModel):
+    start: date
+    end: date
+    orders: int
+    units: int
+    revenue: float
+    by_day: List[SalesDayOut]
+    by_product: List[SalesProductOut]
+
+
+class CartDemandOut(BaseModel):
+    product_id: int
+    name: str
+    on_hand: int
+    # Units of the product sitting in carts, and the number of carts.
+    in_carts: int
+    carts: int
+    shortfall: int
+
+
+class FacetValueOut(BaseModel):
+    value: str
+    count: int
+
+class ProductSearchOut(BaseModel):
+    total: int
+    items: List[ProductOut]
+    # "price" and "availability" counts for the current filters.
+    facets: Dict[str, List[FacetValueOut]]
+
+class FuzzyProductOut(ProductOut):
+    # Trigram similarity to the query, 0-1.
+    score: float
+
+class AutocompleteOut(BaseModel):
+    id: int
+    name: str
+
+class JobOut(BaseModel):
+    id: int
+    kind: str
+    status: str
+    attempts: int
+    max_attempts: int
+    run_at: datetime
+    last_error: Union[str, None] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
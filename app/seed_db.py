@@ -1,56 +1,352 @@
-from app.database import sessionLocal, engine, Base
+"""Seed the database.
+
+Without size options this adds the small demo dataset (an admin, a user and
+four products). With sizes it bulk-generates a synthetic catalog, users,
+carts and order history for performance testing:
+
+    python -m app.seed_db
+    python -m app.seed_db --products 1000000 --users 100000 --carts 20000 \\
+        --orders 500000 --seed 42
+
+Generation is deterministic for a given ``--seed``, ``--history-end`` and set
+of options, on an empty database. Rows
+are written with Core ``executemany`` batches (no ORM identity map, no
+per-row refresh). Nothing is deleted unless ``--reset`` is given, and then
+only the application's tables.
+"""
+import argparse
+import math
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import event, func, insert, select, text
+
 from app import models
 from app.auth.utils import hash_password
+from app.config import Settings
+from app.database import Base, make_engine
 
-Base.metadata.create_all(bind=engine)
-
-db = sessionLocal()
+# Every table of the app's schema, children first (safe deletion order).
+# They all hold seeded rows, rows derived from them or rows referring to
+# seeded users and products, so a reset has to clear them together.
+SEEDED_TABLES = tuple(reversed(Base.metadata.sorted_tables))
 
-# Clear existing data
-db.query(models.CartItem).delete()
-db.query(models.Product).delete()
-db.query(models.User).delete()
+SYNTHETIC_PASSWORD = "password123"
 
-# Create test users
-admin = models.User(
-    username="admin",
-    email="admin@test.com",
-    hashed_password=hash_password("admin123"),
-    is_admin=True,
+_ADJECTIVES = (
+    "Compact", "Pro", "Ultra", "Classic", "Smart", "Portable", "Wireless", "Premium",
+    "Eco", "Gaming", "Rugged", "Slim", "Deluxe", "Mini", "Max", "Studio",
 )
-user = models.User(
-    username="user",
-    email="user@test.com",
-    hashed_password=hash_password("user123"),
-    is_admin=False,
+_NOUNS = (
+    "Laptop", "Monitor", "Keyboard", "Mouse", "Headphones", "Speaker", "Camera",
+    "Tablet", "Router", "Charger", "Desk Lamp", "Webcam", "Microphone", "Printer",
+    "Television", "Smartwatch", "Drive", "Controller", "Projector", "Phone",
 )
 
-# Add sample products
-product1 = models.Product(
-    name="Laptop",
-    description="High-Performance Laptop",
-    price=999.99,
-    quantity=10,
-)
-product2 = models.Product(
-    name="Desktop PC",
-    description="Desktop Personal Computer",
-    price=799.99,
-    quantity=10,
-)
-product3 = models.Product(
-    name="Monitor",
-    description="Computer Monitor",
-    price=149.99,
-    quantity=10,
-)
-product4 = models.Product(
-    name="TV",
-    description="High-End 65-inch Television",
-    price=1249.99,
-    quantity=10,
-)
 
-db.add_all([admin, user, product1, product2, product3, product4])
-db.commit()
-print("Database seeded successfully.")
+@dataclass
+class SeedConfig:
+    products: int = 0
+    users: int = 0
+    carts: int = 0
+    orders: int = 0
+    seed: int = 0
+    batch_size: int = 10_000
+    # Prices are log-normally distributed around the median.
+    price_median: float = 60.0
+    price_sigma: float = 1.0
+    max_stock: int = 500
+    out_of_stock_ratio: float = 0.05
+    max_cart_items: int = 5
+    max_order_items: int = 4
+    # Order and product timestamps are spread over ``history_days`` before
+    # ``history_end`` (default: today at midnight UTC).
+    history_days: int = 365
+    history_end: Optional[datetime] = None
+    # >1 skews cart/order picks toward low product ids (power-law popularity).
+    popularity_skew: float = 2.0
+
+
+def seed_demo(engine):
+    """Insert the demo accounts and products that are not already present."""
+    users = [
+        {"username": "admin", "email": "admin@test.com", "password": "admin123", "is_admin": True},
+        {"username": "user", "email": "user@test.com", "password": "user123", "is_admin": False},
+    ]
+    products = [
+        {"name": "Laptop", "description": "High-Performance Laptop", "price": 999.99, "quantity": 10},
+        {"name": "Desktop PC", "description": "Desktop Personal Computer", "price": 799.99, "quantity": 10},
+        {"name": "Monitor", "description": "Computer Monitor", "price": 149.99, "quantity": 10},
+        {"name": "TV", "description": "High-End 65-inch Television", "price": 1249.99, "quantity": 10},
+    ]
+    users_table = models.User.__table__
+    products_table = models.Product.__table__
+    now = datetime.utcnow()
+    added = {"users": 0, "products": 0}
+    with engine.begin() as conn:
+        existing_emails = set(conn.execute(select(users_table.c.email)).scalars())
+        existing_names = set(conn.execute(select(products_table.c.name)).scalars())
+        new_users = [
+            {
+                "username": u["username"], "email": u["email"],
+                "hashed_password": hash_password(u["password"]), "is_admin": u["is_admin"],
+            }
+            for u in users if u["email"] not in existing_emails
+        ]
+        new_products = [
+            dict(p, created_at=now) for p in products if p["name"] not in existing_names
+        ]
+        if new_users:
+            conn.execute(insert(users_table), new_users)
+        if new_products:
+            conn.execute(insert(products_table), new_products)
+        added["users"], added["products"] = len(new_users), len(new_products)
+    return added
+
+
+def reset(engine):
+    """Delete all rows from the application's tables (and only those)."""
+    with engine.begin() as conn:
+        for table in SEEDED_TABLES:
+            conn.execute(table.delete())
+
+
+def _fast_sqlite_load(engine):
+    """Relax durability on SQLite connections for the duration of a bulk load."""
+    if engine.dialect.name != "sqlite":
+        return None
+
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA synchronous = OFF")
+        cursor.execute("PRAGMA journal_mode = MEMORY")
+        cursor.execute("PRAGMA cache_size = -200000")
+        cursor.close()
+
+    engine.dispose()
+    event.listen(engine, "connect", on_connect)
+    return on_connect
+
+
+def _next_id(conn, table) -> int:
+    return (conn.execute(select(func.max(table.c.id))).scalar() or 0) + 1
+
+
+def _sync_sequences(conn, tables):
+    """Move PostgreSQL id sequences past the explicitly inserted ids.
+
+    Ids are assigned here so order items can reference their orders without
+    a round trip; the sequences are not advanced by such inserts, and the
+    next row inserted by the API would otherwise reuse id 1.
+    """
+    if conn.dialect.name != "postgresql":
+        return
+    for table in tables:
+        conn.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), max(id)) FROM {table.name} "
+            "HAVING max(id) IS NOT NULL"
+        ))
+
+
+def _batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _pick(rng, first_id, count, skew):
+    # Inverse-transform sample of a power law over [0, count): cheap enough
+    # for millions of draws, and skew=1 degenerates to uniform.
+    return first_id + min(int(count * rng.random() ** skew), count - 1)
+
+
+def generate(engine, config: SeedConfig, log=print) -> dict:
+    """Bulk-generate synthetic data; returns the number of rows inserted per table."""
+    rng = random.Random(config.seed)
+    now = config.history_end or datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    history = timedelta(days=config.history_days).total_seconds()
+    counts = {"products": 0, "users": 0, "cart_items": 0, "orders": 0, "order_items": 0}
+    mu = math.log(config.price_median)
+
+    listener = _fast_sqlite_load(engine)
+    try:
+        with engine.begin() as conn:
+            product_start = _next_id(conn, models.Product.__table__)
+            user_start = _next_id(conn, models.User.__table__)
+            order_start = _next_id(conn, models.Order.__table__)
+
+            prices = []
+
+            def product_rows():
+                # Hot loop for millions of rows: bind locals and draw with
+                # rng.random() instead of choice()/randint().
+                rand, lognorm = rng.random, rng.lognormvariate
+                sigma, max_stock, oos = config.price_sigma, config.max_stock, config.out_of_stock_ratio
+                adjectives, nouns = _ADJECTIVES, _NOUNS
+                for product_id in range(product_start, product_start + config.products):
+                    price = round(max(0.5, lognorm(mu, sigma)), 2)
+                    prices.append(price)
+                    yield {
+                        "id": product_id,
+                        "name": f"{adjectives[int(rand() * len(adjectives))]} "
+                                f"{nouns[int(rand() * len(nouns))]} #{product_id}",
+                        "description": f"Synthetic product {product_id}",
+                        "price": price,
+                        "quantity": int(rand() * max_stock) + 1 if rand() >= oos else 0,
+                        "created_at": now - timedelta(seconds=int(rand() * history)),
+                    }
+
+            counts["products"] = _load(conn, models.Product, product_rows(), config.batch_size, log)
+
+            hashed = hash_password(SYNTHETIC_PASSWORD) if config.users else None
+            user_rows = (
+                {
+                    "id": user_start + i,
+                    "username": f"seeduser{user_start + i}",
+                    "email": f"seeduser{user_start + i}@seed.example.com",
+                    "hashed_password": hashed,
+                    "is_admin": False,
+                }
+                for i in range(config.users)
+            )
+            counts["users"] = _load(conn, models.User, user_rows, config.batch_size, log)
+            _sync_sequences(conn, (models.Product.__table__, models.User.__table__))
+
+            product_total = _next_id(conn, models.Product.__table__) - 1
+            user_total = _next_id(conn, models.User.__table__) - 1
+            if product_total == 0 or user_total == 0:
+                return counts
+            if not prices:
+                prices = None
+
+            def price_of(product_id):
+                index = product_id - product_start
+                if prices is not None and 0 <= index < len(prices):
+                    return prices[index]
+                return round(max(0.5, rng.lognormvariate(mu, config.price_sigma)), 2)
+
+            def cart_rows():
+                owners = rng.sample(range(1, user_total + 1), min(config.carts, user_total))
+                for user_id in owners:
+                    chosen = {
+                        _pick(rng, 1, product_total, config.popularity_skew)
+                        for _ in range(rng.randint(1, config.max_cart_items))
+                    }
+                    for product_id in sorted(chosen):
+                        yield {"user_id": user_id, "product_id": product_id, "quantity": rng.randint(1, 3)}
+
+            counts["cart_items"] = _load(conn, models.CartItem, cart_rows(), config.batch_size, log)
+
+            order_items = []
+
+            def order_rows():
+                for i in range(config.orders):
+                    order_id = order_start + i
+                    chosen = {
+                        _pick(rng, 1, product_total, config.popularity_skew)
+                        for _ in range(rng.randint(1, config.max_order_items))
+                    }
+                    total = 0.0
+                    for product_id in sorted(chosen):
+                        quantity = rng.randint(1, 3)
+                        price = price_of(product_id)
+                        total += price * quantity
+                        order_items.append({
+                            "order_id": order_id, "product_id": product_id,
+                            "quantity": quantity, "price": price,
+                        })
+                    yield {
+                        "id": order_id,
+                        "user_id": rng.randint(1, user_total),
+                        "total_price": round(total, 2),
+                        "created_at": now - timedelta(seconds=rng.random() * history),
+                    }
+
+            for batch in _batched(order_rows(), config.batch_size):
+                conn.execute(insert(models.Order.__table__), batch)
+                conn.execute(insert(models.OrderItem.__table__), order_items)
+                counts["orders"] += len(batch)
+                counts["order_items"] += len(order_items)
+                order_items.clear()
+            _sync_sequences(conn, (models.Order.__table__,))
+            if counts["orders"]:
+                log(f"  orders: {counts['orders']} rows, order_items: {counts['order_items']} rows")
+    finally:
+        if listener is not None:
+            event.remove(engine, "connect", listener)
+            engine.dispose()
+    return counts
+
+
+def _load(conn, model, rows, batch_size, log) -> int:
+    total = 0
+    for batch in _batched(rows, batch_size):
+        conn.execute(insert(model.__table__), batch)
+        total += len(batch)
+    if total:
+        log(f"  {model.__tablename__}: {total} rows")
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.seed_db", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Defaults to DATABASE_URL / settings")
+    parser.add_argument("--products", type=int, default=0)
+    parser.add_argument("--users", type=int, default=0)
+    parser.add_argument("--carts", type=int, default=0, help="Number of users given a cart")
+    parser.add_argument("--orders", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--price-median", type=float, default=60.0)
+    parser.add_argument("--price-sigma", type=float, default=1.0)
+    parser.add_argument("--max-stock", type=int, default=500)
+    parser.add_argument("--out-of-stock-ratio", type=float, default=0.05)
+    parser.add_argument("--max-cart-items", type=int, default=5)
+    parser.add_argument("--max-order-items", type=int, default=4)
+    parser.add_argument("--history-days", type=int, default=365)
+    parser.add_argument("--history-end", type=datetime.fromisoformat,
+                        help="ISO date the history ends at (default: today)")
+    parser.add_argument("--popularity-skew", type=float, default=2.0)
+    parser.add_argument("--reset", action="store_true",
+                        help="Delete existing rows of the seeded tables first")
+    parser.add_argument("--no-demo", action="store_true",
+                        help="Do not add the demo admin/user accounts and products")
+    args = parser.parse_args(argv)
+
+    engine = make_engine(args.database_url or Settings.from_env().database_url)
+    Base.metadata.create_all(bind=engine)
+    if args.reset:
+        reset(engine)
+        print("Seeded tables cleared.")
+    if not args.no_demo:
+        added = seed_demo(engine)
+        print(f"Demo data: {added['users']} users, {added['products']} products added.")
+
+    config = SeedConfig(
+        products=args.products, users=args.users, carts=args.carts, orders=args.orders,
+        seed=args.seed, batch_size=args.batch_size, price_median=args.price_median,
+        price_sigma=args.price_sigma, max_stock=args.max_stock,
+        out_of_stock_ratio=args.out_of_stock_ratio, max_cart_items=args.max_cart_items,
+        max_order_items=args.max_order_items, history_days=args.history_days,
+        history_end=args.history_end,
+        popularity_skew=args.popularity_skew,
+    )
+    if any((config.products, config.users, config.carts, config.orders)):
+        start = time.perf_counter()
+        counts = generate(engine, config)
+        print(f"Generated {sum(counts.values())} rows in {time.perf_counter() - start:.1f}s.")
+    engine.dispose()
+    print("Database seeded successfully.")
+
+
+if __name__ == "__main__":
+    main()
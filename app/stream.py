@@ -0,0 +1,155 @@
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+from typing import AsyncIterator, Dict, Iterable, Optional, Set
+
+logger = logging.getLogger("app.stream")
+
+# Product pages follow stock and price over Server-Sent Events instead of
+# polling GET /products/{id}. A change is encoded once and the same bytes are
+# handed to every subscriber of the product.
+STREAM_CHANNEL = "catalog:stock"
+MAX_STREAM_IDS = 50
+# Comment lines keep idle connections open through proxies.
+HEARTBEAT_SECONDS = 15.0
+
+
+def encode_event(change: dict) -> bytes:
+    return f"event: stock\ndata: {json.dumps(change, separators=(',', ':'))}\n\n".encode()
+
+
+class Subscription:
+    """One client's stream: the latest pending event per subscribed product.
+
+    A slow client never queues more than one event per product (newer
+    changes replace older ones), so its buffer is bounded by ``ids``.
+    """
+
+    def __init__(self, ids: Iterable[int]):
+        self.ids = frozenset(ids)
+        self._pending: Dict[int, bytes] = {}
+        self._lock = threading.Lock()
+        # Created by events() on the client's event loop: subscriptions are
+        # made in the threadpool, where Python 3.8's asyncio.Event() would
+        # look for (and fail to find) a loop of its own.
+        self._event: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.closed = False
+
+    def push(self, product_id: int, event: bytes):
+        """Queue ``event``; safe to call from any thread."""
+        with self._lock:
+            self._pending[product_id] = event
+            loop, wakeup = self._loop, self._event
+        self._wake(loop, wakeup)
+
+    def close(self):
+        with self._lock:
+            self.closed = True
+            loop, wakeup = self._loop, self._event
+        self._wake(loop, wakeup)
+
+    def _wake(self, loop, wakeup):
+        if loop is None:
+            return  # Not streaming yet; events() picks up what is pending.
+        try:
+            loop.call_soon_threadsafe(wakeup.set)
+        except RuntimeError:
+            pass  # The client's event loop is gone; nothing to wake.
+
+    async def events(self, heartbeat: float = HEARTBEAT_SECONDS) -> AsyncIterator[bytes]:
+        wakeup = asyncio.Event()
+        with self._lock:
+            self._loop, self._event = asyncio.get_running_loop(), wakeup
+            if self._pending or self.closed:
+                wakeup.set()
+        while True:
+            try:
+                await asyncio.wait_for(wakeup.wait(), heartbeat)
+            except asyncio.TimeoutError:
+                yield b": keep-alive\n\n"
+                continue
+            wakeup.clear()
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                closed = self.closed
+            for event in pending.values():
+                yield event
+            if closed:
+                return
+
+
+class StockBroadcaster:
+    """Fans product stock/price changes out to the subscribed streams."""
+
+    def __init__(self):
+        self._subscribers: Dict[int, Set[Subscription]] = defaultdict(set)
+        self._lock = threading.Lock()
+        self._backend = None
+        self._unsubscribe = None
+
+    def subscribe(self, ids: Iterable[int]) -> Subscription:
+        subscription = Subscription(ids)
+        with self._lock:
+            for product_id in subscription.ids:
+                self._subscribers[product_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            for product_id in subscription.ids:
+                subscribers = self._subscribers.get(product_id)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[product_id]
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len({subscription for subscribers in self._subscribers.values() for subscription in subscribers})
+
+    def publish(self, changes: Iterable[dict]):
+        """Broadcast changes such as {"id": 1, "price": 9.5, "quantity": 3} to every worker."""
+        message = json.dumps(list(changes))
+        if self._backend is not None:
+            try:
+                # Delivered back to this worker too, through _deliver.
+                self._backend.publish(STREAM_CHANNEL, message.encode())
+                return
+            except Exception:
+                logger.warning("Could not broadcast stock update; delivering locally", exc_info=True)
+        self._deliver(message.encode())
+
+    def _deliver(self, message: bytes):
+        for change in json.loads(message):
+            with self._lock:
+                subscribers = list(self._subscribers.get(change["id"], ()))
+            if not subscribers:
+                continue
+            event = encode_event(change)
+            for subscription in subscribers:
+                subscription.push(change["id"], event)
+
+    def close(self):
+        """End every open stream (at shutdown)."""
+        with self._lock:
+            subscriptions = {s for subscribers in self._subscribers.values() for s in subscribers}
+            self._subscribers.clear()
+        for subscription in subscriptions:
+            subscription.close()
+
+    def attach(self, backend):
+        """Receive changes published by every worker through ``backend``."""
+        self.detach()
+        self._backend = backend
+        self._unsubscribe = backend.subscribe(STREAM_CHANNEL, self._deliver)
+
+    def detach(self):
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+        self._backend = self._unsubscribe = None
+
+
+stock_updates = StockBroadcaster()
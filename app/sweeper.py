@@ -0,0 +1,148 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Iterator, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.monitoring.metrics import CART_ROWS_RECLAIMED, CART_SWEEP_DURATION
+
+logger = logging.getLogger("app.sweeper")
+
+# Rows are deleted a batch at a time, each batch in its own short transaction,
+# so a large backlog never holds the cart_items write lock for long.
+SWEEP_BATCH_SIZE = 500
+# Stripe Checkout Sessions expire after 24 hours at most; a checkout still
+# unpaid by then was abandoned.
+CHECKOUT_MAX_AGE = timedelta(days=1)
+
+cart_items = models.CartItem.__table__
+checkout_sessions = models.CheckoutSession.__table__
+products = models.Product.__table__
+
+
+def _delete_expired(db: Session, cutoff: datetime, batch_size: int) -> int:
+    deleted = 0
+    while True:
+        # Oldest first through ix_cart_items_updated_at.
+        ids = db.execute(
+            select(cart_items.c.id)
+            .where(cart_items.c.updated_at < cutoff)
+            .order_by(cart_items.c.updated_at)
+            .limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            return deleted
+        # Re-checked so a row touched since the SELECT is kept.
+        result = db.execute(
+            delete(cart_items).where(cart_items.c.id.in_(ids), cart_items.c.updated_at < cutoff)
+        )
+        db.commit()
+        deleted += result.rowcount
+
+
+def _delete_abandoned_checkouts(db: Session, cutoff: datetime, batch_size: int) -> int:
+    deleted = 0
+    while True:
+        ids = db.execute(
+            select(checkout_sessions.c.id)
+            .where(checkout_sessions.c.created_at < cutoff)
+            .order_by(checkout_sessions.c.created_at)
+            .limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            return deleted
+        db.execute(delete(checkout_sessions).where(checkout_sessions.c.id.in_(ids)))
+        db.commit()
+        deleted += len(ids)
+
+
+def _delete_orphaned(db: Session, batch_size: int) -> int:
+    deleted, last_id = 0, 0
+    while True:
+        # Walks cart_items once in id order, resuming after the last batch.
+        ids = db.execute(
+            select(cart_items.c.id)
+            .outerjoin(products, products.c.id == cart_items.c.product_id)
+            .where(cart_items.c.id > last_id, products.c.id.is_(None))
+            .order_by(cart_items.c.id)
+            .limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            return deleted
+        db.execute(delete(cart_items).where(cart_items.c.id.in_(ids)))
+        db.commit()
+        deleted += len(ids)
+        last_id = ids[-1]
+
+
+def sweep_carts(
+    db: Session,
+    max_age: timedelta,
+    batch_size: int = SWEEP_BATCH_SIZE,
+    now: Optional[datetime] = None,
+) -> dict:
+    """Delete cart rows idle for longer than ``max_age``, rows of deleted products
+    and checkouts never paid."""
+    start = time.perf_counter()
+    now = now or datetime.utcnow()
+    result = {
+        "expired": _delete_expired(db, now - max_age, batch_size),
+        "orphaned": _delete_orphaned(db, batch_size),
+        "abandoned": _delete_abandoned_checkouts(db, now - CHECKOUT_MAX_AGE, batch_size),
+    }
+    for reason, count in result.items():
+        CART_ROWS_RECLAIMED.inc(count, reason=reason)
+    CART_SWEEP_DURATION.observe(time.perf_counter() - start)
+    return result
+
+
+class CartSweeper:
+    """Daemon thread running ``sweep_carts`` every ``interval`` seconds.
+
+    ``get_db`` is a dependency-style generator yielding a session, as for
+    ``app.counters.StatsFlusher``. An ``interval`` of 0 disables the thread.
+    """
+
+    def __init__(self, get_db: Callable[[], Iterator[Session]], interval: float, max_age: timedelta):
+        self.get_db = get_db
+        self.interval = interval
+        self.max_age = max_age
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="cart-sweeper", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sweep()
+
+    def sweep(self) -> Optional[dict]:
+        db_gen = self.get_db()
+        try:
+            result = sweep_carts(next(db_gen), self.max_age)
+        except Exception:
+            logger.warning("Cart sweep failed; retrying next interval", exc_info=True)
+            return None
+        finally:
+            db_gen.close()
+        if any(result.values()):
+            logger.info(
+                "Cart sweep reclaimed %(expired)d expired and %(orphaned)d orphaned rows "
+                "and %(abandoned)d abandoned checkouts", result
+            )
+        return result
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
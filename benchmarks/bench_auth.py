@@ -0,0 +1,43 @@
+import pytest
+from fastapi.security import HTTPAuthorizationCredentials
+from app.auth.dependencies import get_current_user, get_token_claims
+from app.auth.jwt_handler import create_access_token, verify_token
+from app.auth.utils import hash_password, verify_password
+from conftest import make_session_factory, populate
+
+@pytest.fixture(scope="module")
+def session():
+    engine, session_factory = make_session_factory()
+    populate(engine, products=1)
+    db = session_factory()
+    yield db
+    db.close()
+    engine.dispose()
+
+@pytest.fixture(scope="module")
+def token():
+    return create_access_token({"sub": "1"})
+
+def bench_create_access_token(benchmark):
+    benchmark(create_access_token, {"sub": "1"})
+
+def bench_verify_token(benchmark, token):
+    assert verify_token(token)["sub"] == "1"
+    benchmark(verify_token, token)
+
+def bench_get_token_claims(benchmark, token):
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    assert get_token_claims(credentials)["sub"] == "1"
+    benchmark(get_token_claims, credentials)
+
+def bench_get_current_user(benchmark, session, token):
+    claims = verify_token(token)
+    assert get_current_user(claims, session).id == 1
+    benchmark(get_current_user, claims, session)
+
+def bench_hash_password(benchmark):
+    benchmark(hash_password, "benchmark-password", rounds=3, number=1)
+
+def bench_verify_password(benchmark):
+    hashed = hash_password("benchmark-password")
+    benchmark(verify_password, "benchmark-password", hashed, rounds=3, number=1)
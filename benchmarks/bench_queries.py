@@ -0,0 +1,49 @@
+from types import SimpleNamespace
+
+import pytest
+from app import models
+from app.cache import InMemoryCache, NearCache, product_key
+from app.config import Settings
+from app.routes import carts, products
+from conftest import make_session_factory, populate
+
+SIZES = [100, 1000, 10000]
+
+@pytest.fixture(scope="module", params=SIZES, ids=lambda n: f"{n}_products")
+def session(request):
+    engine, session_factory = make_session_factory()
+    populate(engine, products=request.param, cart_items=min(request.param, 20))
+    db = session_factory()
+    yield db
+    db.close()
+    engine.dispose()
+
+@pytest.fixture(scope="module")
+def user(session):
+    return session.query(models.User).first()
+
+def _fresh(session, func, *args):
+    # Expire the identity map so every call pays for loading rows, not just
+    # for returning cached objects.
+    session.expire_all()
+    return func(*args)
+
+def bench_list_products(benchmark, session):
+    benchmark(_fresh, session, products.list_products, None, 20, session)
+
+def bench_get_product(benchmark, session):
+    # get_product only reads the cache TTL from the request's app settings.
+    request = SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace(settings=Settings())))
+    cache = NearCache(InMemoryCache())
+
+    def uncached():
+        # Measure the database path, not a cache hit.
+        cache.invalidate(product_key(1))
+        return products.get_product(1, request, session, cache)
+
+    assert uncached()["id"] == 1
+    benchmark(_fresh, session, uncached)
+
+def bench_view_cart(benchmark, session, user):
+    assert len(carts.view_cart(session, user)) > 0
+    benchmark(_fresh, session, carts.view_cart, session, user)
@@ -0,0 +1,27 @@
+from typing import List
+import pytest
+from pydantic import TypeAdapter
+from app import models, schemas
+from conftest import make_session_factory, populate
+
+SIZES = [10, 100, 1000]
+
+@pytest.fixture(scope="module", params=SIZES, ids=lambda n: f"{n}_products")
+def products(request):
+    engine, session_factory = make_session_factory()
+    populate(engine, products=request.param)
+    db = session_factory()
+    rows = db.query(models.Product).all()
+    db.expunge_all()
+    db.close()
+    engine.dispose()
+    return rows
+
+def bench_product_out_validate(benchmark, products):
+    """Per-object validation, as a handler building responses by hand would do."""
+    benchmark(lambda: [schemas.ProductOut.model_validate(p) for p in products])
+
+def bench_product_out_list_response(benchmark, products):
+    """The path FastAPI takes for ``response_model=List[ProductOut]``."""
+    adapter = TypeAdapter(List[schemas.ProductOut])
+    benchmark(lambda: adapter.dump_python(adapter.validate_python(products, from_attributes=True), mode="json"))
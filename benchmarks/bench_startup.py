@@ -0,0 +1,39 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter so nothing is already imported or cached.
+# Interpreter start-up itself is excluded: timing begins right before the
+# application import.
+_SCRIPT = """
+import json, os, sys, tempfile, time
+start = time.perf_counter()
+from app.config import Settings
+from app.main import create_app
+app = create_app(Settings(database_url="sqlite:///" + os.path.join(tempfile.mkdtemp(), "boot.db")))
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app) as client:
+    assert client.get("/").status_code == 200
+    first_request = time.perf_counter()
+print(json.dumps({"import": imported - start, "first_request": first_request - start}))
+"""
+
+
+def _boot():
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    result = subprocess.run(
+        [sys.executable, "-c", _SCRIPT], env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def bench_import_app(benchmark):
+    benchmark(lambda: _boot()["import"], rounds=3, self_timed=True)
+
+
+def bench_import_to_first_request(benchmark):
+    benchmark(lambda: _boot()["first_request"], rounds=3, self_timed=True)
@@ -0,0 +1,173 @@
+import json
+import os
+import statistics
+import time
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Micro-benchmark harness. Every ``bench_*`` function receives a ``benchmark``
+# callable; results are compared against a baseline file and the run fails
+# when a hot path's median per-call time regresses beyond the tolerance.
+#
+#   python -m pytest benchmarks                      # compare with baseline
+#   python -m pytest benchmarks --benchmark-save     # (re)record the baseline
+#
+# No baseline is committed (timings are machine-specific): CI records one from
+# the pull request's base commit and compares the head against it on the same
+# runner. Without a baseline file the run only reports timings.
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+MIN_ROUND_TIME = 0.01
+_results = {}
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmark")
+    group.addoption("--benchmark-baseline", default=DEFAULT_BASELINE,
+                    help="Baseline JSON file (default benchmarks/baseline.json)")
+    group.addoption("--benchmark-save", action="store_true",
+                    help="Write the measured results to the baseline file")
+    group.addoption("--benchmark-tolerance", type=float, default=0.25,
+                    help="Allowed slowdown of the median before failing (default 0.25 = 25%%)")
+    group.addoption("--benchmark-rounds", type=int, default=5,
+                    help="Timed rounds per benchmark (default 5)")
+
+
+def _load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)["benchmarks"]
+
+
+def measure(func, rounds: int = 5, number: int = None, self_timed: bool = False):
+    """Time ``func`` and return per-call statistics in seconds.
+
+    ``number`` calls are made per round; when omitted it is calibrated so a
+    round takes at least ``MIN_ROUND_TIME`` and timer resolution is irrelevant.
+    A ``self_timed`` function measures itself and returns its duration (used
+    when the interesting interval runs in a subprocess).
+    """
+    if self_timed:
+        per_call = [func() for _ in range(rounds)]
+        return {
+            "median": statistics.median(per_call),
+            "min": min(per_call),
+            "mean": statistics.fmean(per_call),
+            "rounds": rounds,
+            "number": 1,
+        }
+    func()  # warm-up (imports, caches, first-connection costs)
+    if number is None:
+        number = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(number):
+                func()
+            if time.perf_counter() - start >= MIN_ROUND_TIME or number >= 100_000:
+                break
+            number *= 10
+    per_call = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        per_call.append((time.perf_counter() - start) / number)
+    return {
+        "median": statistics.median(per_call),
+        "min": min(per_call),
+        "mean": statistics.fmean(per_call),
+        "rounds": rounds,
+        "number": number,
+    }
+
+
+@pytest.fixture
+def benchmark(request):
+    """Measure a callable and check it against the recorded baseline."""
+    config = request.config
+    baseline = _load_baseline(config.getoption("--benchmark-baseline"))
+    tolerance = config.getoption("--benchmark-tolerance")
+    default_rounds = config.getoption("--benchmark-rounds")
+    name = request.node.nodeid.split("::", 1)[-1]
+
+    def run(func, *args, rounds: int = None, number: int = None, self_timed: bool = False, **kwargs):
+        result = measure(lambda: func(*args, **kwargs), rounds or default_rounds, number, self_timed)
+        _results[name] = result
+        previous = baseline.get(name)
+        if previous and not config.getoption("--benchmark-save"):
+            limit = previous["median"] * (1 + tolerance)
+            if result["median"] > limit:
+                pytest.fail(
+                    f"{name} regressed: median {result['median'] * 1e6:.1f} us "
+                    f"> baseline {previous['median'] * 1e6:.1f} us (+{tolerance:.0%} allowed)",
+                    pytrace=False,
+                )
+        return result
+
+    return run
+
+
+def pytest_sessionfinish(session, exitstatus):
+    config = session.config
+    if not _results or not config.getoption("--benchmark-save", default=False):
+        return
+    path = config.getoption("--benchmark-baseline")
+    merged = _load_baseline(path)
+    merged.update(_results)
+    with open(path, "w") as f:
+        json.dump({"benchmarks": merged}, f, indent=2, sort_keys=True)
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    if not _results:
+        return
+    path = config.getoption("--benchmark-baseline")
+    baseline = _load_baseline(path)
+    terminalreporter.section("benchmarks (median per call)")
+    if not baseline and not config.getoption("--benchmark-save"):
+        # Nothing can regress without a baseline; say so rather than pass silently.
+        terminalreporter.write_line(f"No baseline at {path}: timings recorded, nothing compared.")
+    for name, result in sorted(_results.items()):
+        line = f"{name:<60} {result['median'] * 1e6:>12.1f} us"
+        previous = baseline.get(name)
+        if previous:
+            change = result["median"] / previous["median"] - 1
+            line += f"  ({change:+.1%} vs baseline)"
+        terminalreporter.write_line(line)
+
+
+# ------------------ SHARED DATA FIXTURES ------------------ #
+def make_session_factory():
+    """In-memory SQLite database with the application schema."""
+    from app.database import Base
+
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def populate(engine, products: int, cart_items: int = 0):
+    """Bulk-insert ``products`` products, one user and ``cart_items`` cart rows."""
+    from app import models
+
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [{
+            "username": "bench", "email": "bench@example.com",
+            "hashed_password": "x", "is_admin": False,
+        }])
+        conn.execute(insert(models.Product), [
+            {"name": f"Product {i}", "description": f"Description {i}",
+             "price": 1.0 + i % 500, "quantity": i % 50}
+            for i in range(1, products + 1)
+        ])
+        if cart_items:
+            conn.execute(insert(models.CartItem), [
+                {"user_id": 1, "product_id": i, "quantity": 1}
+                for i in range(1, cart_items + 1)
+            ])
@@ -5,9 +5,23 @@ export default function Home() {
   const [products, setProducts] = useState([]);
 
   useEffect(() => {
-    api
-      .get("http://localhost:8000/products")
-      .then((res) => setProducts(res.data))
+    // GET /products/ returns pages in id order; follow the last id until a
+    // short page marks the end of the catalog.
+    const pageSize = 100;
+    const loadAll = async () => {
+      let all = [];
+      let after = null;
+      for (;;) {
+        const params = { limit: pageSize };
+        if (after !== null) params.after = after;
+        const res = await api.get("http://localhost:8000/products/", { params });
+        all = all.concat(res.data);
+        if (res.data.length < pageSize) return all;
+        after = res.data[res.data.length - 1].id;
+      }
+    };
+    loadAll()
+      .then(setProducts)
       .catch((err) => console.error("Error fetching products:", err));
   }, []);
 
@@ -0,0 +1,109 @@
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime
+
+from loadtest.report import compare_reports, format_table, load_report, save_report
+from loadtest.runner import run_load
+from loadtest.scenarios import DEFAULT_MIX, parse_mix
+from loadtest.stripe_stub import StripeStub
+from loadtest.targets import in_process_target, remote_target
+
+
+async def _run(args) -> dict:
+    mix = parse_mix(args.mix) if args.mix else DEFAULT_MIX
+    if args.base_url:
+        target = remote_target(args.base_url, users=args.users)
+    else:
+        target = in_process_target(
+            products=args.products, users=args.users,
+            stripe_latency_ms=args.stripe_latency_ms, seed=args.seed,
+        )
+    async with target as (client, accounts, product_ids, stub):
+        report = await run_load(
+            client, accounts, product_ids, mix,
+            concurrency=args.concurrency, duration=args.duration,
+            iterations=args.iterations, seed=args.seed,
+            config={
+                "target": args.base_url or "in-process",
+                "products": len(product_ids),
+                "users": len(accounts),
+                "stripe_latency_ms": args.stripe_latency_ms,
+            },
+        )
+        if stub is not None:
+            report["stripe_stub_calls"] = dict(stub.calls)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m loadtest", description="Scenario load tests")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Run a scenario mix and report latency/throughput")
+    run.add_argument("--base-url", help="Target a running server instead of the in-process app")
+    run.add_argument("--concurrency", type=int, default=10)
+    run.add_argument("--duration", type=float, help="Seconds to run (default 30 unless --iterations)")
+    run.add_argument("--iterations", type=int, help="Total scenario journeys to run")
+    run.add_argument("--mix", help="Weights, e.g. browse=60,login=10,add_to_cart=15,view_cart=10,checkout=5")
+    run.add_argument("--products", type=int, default=200, help="Products seeded in-process")
+    run.add_argument("--users", type=int, default=20, help="Accounts shared by virtual users")
+    run.add_argument("--stripe-latency-ms", type=float, default=30.0)
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--output", help="JSON results file (default loadtest-<timestamp>.json)")
+    run.add_argument("--baseline", help="Fail if results regress against this JSON file")
+    run.add_argument("--tolerance", type=float, default=0.10)
+
+    compare = sub.add_parser("compare", help="Compare two saved result files")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--tolerance", type=float, default=0.10)
+    compare.add_argument("--metric", default="p95_ms", choices=["p50_ms", "p95_ms", "p99_ms", "mean_ms"])
+
+    stub = sub.add_parser("stripe-stub", help="Serve the Stripe stub for an external server")
+    stub.add_argument("--port", type=int, default=12111)
+    stub.add_argument("--latency-ms", type=float, default=30.0)
+    stub.add_argument("--payment-status", default="paid", choices=["paid", "unpaid"],
+                      help="payment_status of retrieved sessions (unpaid: /orders/success answers 402)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "stripe-stub":
+        with StripeStub(port=args.port, latency_ms=args.latency_ms, payment_status=args.payment_status) as server:
+            print(f"Stripe stub listening on {server.base_url} (set STRIPE_API_BASE to this)")
+            try:
+                while True:
+                    time.sleep(3600)
+            except KeyboardInterrupt:
+                return 0
+
+    if args.command == "compare":
+        regressions = compare_reports(
+            load_report(args.baseline), load_report(args.current), args.tolerance, args.metric
+        )
+        return _print_regressions(regressions)
+
+    if args.duration is None and args.iterations is None:
+        args.duration = 30.0
+    report = asyncio.run(_run(args))
+    output = args.output or f"loadtest-{datetime.utcnow():%Y%m%dT%H%M%S}.json"
+    save_report(report, output)
+    print(format_table(report))
+    print(f"\nResults written to {output}")
+    if args.baseline:
+        return _print_regressions(compare_reports(load_report(args.baseline), report, args.tolerance))
+    return 0
+
+
+def _print_regressions(regressions) -> int:
+    if not regressions:
+        print("No regressions.")
+        return 0
+    for r in regressions:
+        print(f"REGRESSION {r['scenario']} {r['metric']}: {r['baseline']} -> {r['current']}")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+import json
+import math
+import platform
+import subprocess
+from datetime import datetime
+
+
+def percentile(values, q: float) -> float:
+    """Linear-interpolated percentile of ``values`` (q in 0..100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    if low == high:
+        return ordered[low]
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(latencies, errors: int, elapsed: float) -> dict:
+    count = len(latencies)
+    return {
+        "count": count,
+        "errors": errors,
+        "rps": round(count / elapsed, 3) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies) / count * 1000, 3) if count else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(max(latencies) * 1000, 3) if count else 0.0,
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, timeout=5,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def build_report(config: dict, scenarios: dict, requests: dict, elapsed: float) -> dict:
+    return {
+        "created_at": datetime.utcnow().isoformat(),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "config": config,
+        "elapsed_s": round(elapsed, 3),
+        "scenarios": scenarios,
+        "requests": requests,
+    }
+
+
+def save_report(report: dict, path: str):
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+
+def load_report(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare_reports(baseline: dict, current: dict, tolerance: float = 0.10, metric: str = "p95_ms"):
+    """Return scenarios whose ``metric`` regressed by more than ``tolerance``.
+
+    Throughput is compared the other way round: a drop in rps beyond the
+    tolerance is a regression too.
+    """
+    regressions = []
+    for name, base in baseline["scenarios"].items():
+        now = current["scenarios"].get(name)
+        if now is None or not base["count"] or not now["count"]:
+            continue
+        if base[metric] and now[metric] > base[metric] * (1 + tolerance):
+            regressions.append({
+                "scenario": name, "metric": metric,
+                "baseline": base[metric], "current": now[metric],
+            })
+        if base["rps"] and now["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append({
+                "scenario": name, "metric": "rps",
+                "baseline": base["rps"], "current": now["rps"],
+            })
+    return regressions
+
+
+def format_table(report: dict) -> str:
+    header = f"{'scenario':<28}{'count':>8}{'err':>6}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    lines = [header, "-" * len(header)]
+    for title, section in (("", report["scenarios"]), ("  ", report["requests"])):
+        for name, row in sorted(section.items()):
+            lines.append(
+                f"{title + name:<28}{row['count']:>8}{row['errors']:>6}{row['rps']:>10.1f}"
+                f"{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}"
+            )
+    return "\n".join(lines)
@@ -0,0 +1,129 @@
+import asyncio
+import random
+import time
+from collections import defaultdict
+
+import httpx
+
+from loadtest.report import build_report, summarize
+from loadtest.scenarios import SCENARIOS, ScenarioError, login
+
+
+class VirtualUser:
+    """One simulated shopper with its own credentials and token."""
+
+    def __init__(self, client, recorder, rng, email, password, product_ids, token=None):
+        self.client = client
+        self.recorder = recorder
+        self.rng = rng
+        self.email = email
+        self.password = password
+        self.product_ids = product_ids
+        self.token = token
+
+    async def request(self, method, url, auth=False, route=None, **kwargs):
+        headers = kwargs.pop("headers", {})
+        if auth:
+            if self.token is None:
+                await login(self)
+            headers["Authorization"] = f"Bearer {self.token}"
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, headers=headers, **kwargs)
+        except httpx.HTTPError as e:
+            self.recorder.request_error(f"{method} {route or url}")
+            raise ScenarioError(f"{method} {url}: {e}") from e
+        self.recorder.request_done(f"{method} {route or url}", time.perf_counter() - start)
+        if response.status_code >= 400:
+            self.recorder.request_error(f"{method} {route or url}")
+            raise ScenarioError(f"{method} {url} returned {response.status_code}: {response.text[:200]}")
+        return response
+
+
+class Recorder:
+    def __init__(self):
+        self.scenario_latencies = defaultdict(list)
+        self.scenario_errors = defaultdict(int)
+        self.request_latencies = defaultdict(list)
+        self.request_errors = defaultdict(int)
+
+    def request_done(self, key, elapsed):
+        self.request_latencies[key].append(elapsed)
+
+    def request_error(self, key):
+        self.request_errors[key] += 1
+
+    def scenario_done(self, name, elapsed):
+        self.scenario_latencies[name].append(elapsed)
+
+    def scenario_error(self, name):
+        self.scenario_errors[name] += 1
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    accounts,
+    product_ids,
+    mix: dict,
+    concurrency: int = 10,
+    duration: float = None,
+    iterations: int = None,
+    seed: int = 0,
+    config: dict = None,
+) -> dict:
+    """Drive ``client`` with ``concurrency`` virtual users picking scenarios from ``mix``.
+
+    Stops after ``duration`` seconds or once ``iterations`` journeys have been
+    started, whichever is given. ``accounts`` is a list of
+    ``(email, password, token)`` tuples assigned round-robin to users.
+    """
+    if duration is None and iterations is None:
+        raise ValueError("Either duration or iterations is required")
+
+    recorder = Recorder()
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    remaining = [iterations]
+    deadline = time.perf_counter() + duration if duration is not None else None
+
+    def next_scenario(rng):
+        if deadline is not None and time.perf_counter() >= deadline:
+            return None
+        if remaining[0] is not None:
+            if remaining[0] <= 0:
+                return None
+            remaining[0] -= 1
+        return rng.choices(names, weights)[0]
+
+    async def worker(index):
+        rng = random.Random(seed * 1000003 + index)
+        email, password, token = accounts[index % len(accounts)]
+        user = VirtualUser(client, recorder, rng, email, password, product_ids, token)
+        while True:
+            name = next_scenario(rng)
+            if name is None:
+                return
+            start = time.perf_counter()
+            try:
+                await SCENARIOS[name](user)
+            except ScenarioError:
+                recorder.scenario_error(name)
+                continue
+            recorder.scenario_done(name, time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    scenarios = {
+        name: summarize(recorder.scenario_latencies[name], recorder.scenario_errors[name], elapsed)
+        for name in names
+    }
+    request_keys = set(recorder.request_latencies) | set(recorder.request_errors)
+    requests = {
+        key: summarize(recorder.request_latencies[key], recorder.request_errors[key], elapsed)
+        for key in request_keys
+    }
+    config = dict(config or {}, concurrency=concurrency, duration=duration,
+                  iterations=iterations, seed=seed, mix=mix)
+    return build_report(config, scenarios, requests, elapsed)
@@ -0,0 +1,84 @@
+# Scenario definitions. Each scenario is one "user journey" executed by a
+# virtual user; its latency is the wall time of the whole journey, while every
+# HTTP call inside it is also timed individually per route.
+
+DEFAULT_MIX = {
+    "browse": 60,
+    "login": 10,
+    "add_to_cart": 15,
+    "view_cart": 10,
+    "checkout": 5,
+}
+
+
+class ScenarioError(Exception):
+    pass
+
+
+async def browse(user):
+    """Anonymous catalog browsing: product list then a few product pages."""
+    await user.request("GET", "/products/", route="/products/")
+    for _ in range(3):
+        product_id = user.rng.choice(user.product_ids)
+        await user.request("GET", f"/products/{product_id}", route="/products/{product_id}")
+
+
+async def login(user):
+    """Password login (one bcrypt verification per call)."""
+    response = await user.request(
+        "POST", "/users/login",
+        json={"email": user.email, "password": user.password},
+        route="/users/login",
+    )
+    user.token = response.json()["access_token"]
+
+
+async def add_to_cart(user):
+    product_id = user.rng.choice(user.product_ids)
+    await user.request(
+        "POST", "/cart/add",
+        json={"product_id": product_id, "quantity": 1},
+        auth=True, route="/cart/add",
+    )
+
+
+async def view_cart(user):
+    await user.request("GET", "/cart/", auth=True, route="/cart/")
+
+
+async def checkout(user):
+    """Fill a small cart, check out through the Stripe stub and confirm the payment."""
+    for _ in range(user.rng.randint(1, 3)):
+        await add_to_cart(user)
+    response = await user.request("POST", "/orders/checkout", auth=True, route="/orders/checkout")
+    await user.request(
+        "GET", "/orders/success", params={"session_id": response.json()["session_id"]},
+        route="/orders/success",
+    )
+    # Start the next journey from an empty cart so carts stay realistic.
+    response = await user.request("GET", "/cart/", auth=True, route="/cart/")
+    for item in response.json():
+        await user.request(
+            "DELETE", f"/cart/{item['product_id']}", auth=True, route="/cart/{product_id}"
+        )
+
+
+SCENARIOS = {
+    "browse": browse,
+    "login": login,
+    "add_to_cart": add_to_cart,
+    "view_cart": view_cart,
+    "checkout": checkout,
+}
+
+
+def parse_mix(spec: str) -> dict:
+    """Parse ``browse=60,checkout=5`` into a weight mapping."""
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        mix[name] = float(weight or 1)
+    return mix
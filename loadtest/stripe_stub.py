@@ -0,0 +1,112 @@
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+# Local stand-in for the Stripe API so load tests never leave the machine.
+# Only the endpoints the app calls are implemented; latency is configurable to
+# model the real round trip. Retrieved sessions report ``payment_status``
+# ("paid" by default) so the payment confirmation path records orders.
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    server_version = "StripeStub/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("Request-Id", f"req_{uuid.uuid4().hex[:14]}")
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _session(self, session_id, line_item_count=0, payment_status="unpaid"):
+        return {
+            "id": session_id,
+            "object": "checkout.session",
+            "mode": "payment",
+            "payment_status": payment_status,
+            "url": f"{self.server.base_url}/pay/{session_id}",
+            "customer_details": {"email": "loadtest@example.com"},
+            "metadata": {"line_item_count": str(line_item_count)},
+        }
+
+    def do_POST(self):
+        self.server.simulate_latency()
+        if self.path.rstrip("/") != "/v1/checkout/sessions":
+            self._reply(404, {"error": {"type": "invalid_request_error", "message": "Unknown path"}})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        form = parse_qs(self.rfile.read(length).decode())
+        line_items = {key.split("]")[0] for key in form if key.startswith("line_items[")}
+        self.server.record("checkout.session.create")
+        self._reply(200, self._session(f"cs_test_{uuid.uuid4().hex}", len(line_items)))
+
+    def do_GET(self):
+        self.server.simulate_latency()
+        prefix = "/v1/checkout/sessions/"
+        if not self.path.startswith(prefix):
+            self._reply(404, {"error": {"type": "invalid_request_error", "message": "Unknown path"}})
+            return
+        self.server.record("checkout.session.retrieve")
+        session_id = self.path[len(prefix):].split("?")[0]
+        self._reply(200, self._session(session_id, payment_status=self.server.payment_status))
+
+
+class StripeStub(ThreadingHTTPServer):
+    """Threaded HTTP server answering the Stripe Checkout endpoints."""
+
+    daemon_threads = True
+
+    def __init__(
+        self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0.0, payment_status: str = "paid"
+    ):
+        super().__init__((host, port), _StubHandler)
+        self.latency_ms = latency_ms
+        self.payment_status = payment_status
+        self.calls = {}
+        self._calls_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def simulate_latency(self):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+    def record(self, operation: str):
+        with self._calls_lock:
+            self.calls[operation] = self.calls.get(operation, 0) + 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name="stripe-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def point_stripe_at(stub: StripeStub):
+    """Route the app's Stripe calls in this process to the stub."""
+    from app import payments
+
+    payments.configure(api_key="sk_test_loadtest_stub", api_base=stub.base_url)
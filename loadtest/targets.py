@@ -0,0 +1,114 @@
+import os
+import random
+import tempfile
+import uuid
+from contextlib import asynccontextmanager
+
+import httpx
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from loadtest.stripe_stub import StripeStub, point_stripe_at
+
+LOADTEST_PASSWORD = "loadtest-password"
+
+
+@asynccontextmanager
+async def in_process_target(products: int = 200, users: int = 20, stripe_latency_ms: float = 30.0,
+                            db_path: str = None, seed: int = 0):
+    """Serve the app in-process over ASGI against a freshly seeded SQLite file.
+
+    Stripe is replaced by a local :class:`StripeStub`; nothing leaves the host.
+    """
+    from app import models
+    from app.auth.utils import hash_password
+    from app.database import Base, get_db, get_read_db
+    from app.main import app
+
+    owns_db = db_path is None
+    if owns_db:
+        fd, db_path = tempfile.mkstemp(prefix="loadtest-", suffix=".db")
+        os.close(fd)
+    engine = create_engine(
+        f"sqlite:///{db_path}", connect_args={"check_same_thread": False, "timeout": 30}
+    )
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    rng = random.Random(seed)
+    # One bcrypt hash shared by every synthetic user keeps setup fast.
+    hashed = hash_password(LOADTEST_PASSWORD)
+    with engine.begin() as conn:
+        conn.execute(insert(models.Product), [
+            {
+                "name": f"Load Product {i}",
+                "description": f"Synthetic product {i}",
+                "price": round(rng.uniform(5, 500), 2),
+                "quantity": 1_000_000,
+            }
+            for i in range(products)
+        ])
+        conn.execute(insert(models.User), [
+            {
+                "username": f"loaduser{i}",
+                "email": f"loaduser{i}@loadtest.local",
+                "hashed_password": hashed,
+                "is_admin": False,
+            }
+            for i in range(users)
+        ])
+        product_ids = [row[0] for row in conn.execute(models.Product.__table__.select().with_only_columns(models.Product.id))]
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    stub = StripeStub(latency_ms=stripe_latency_ms).start()
+    point_stripe_at(stub)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    # Every virtual user shares one client address; login limits would dominate.
+    rate_limiting = app.state.rate_limiter.enabled
+    app.state.rate_limiter.enabled = False
+    accounts = [(f"loaduser{i}@loadtest.local", LOADTEST_PASSWORD, None) for i in range(users)]
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=60) as client:
+            yield client, accounts, product_ids, stub
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        app.dependency_overrides.pop(get_read_db, None)
+        app.state.rate_limiter.enabled = rate_limiting
+        stub.stop()
+        engine.dispose()
+        if owns_db:
+            os.remove(db_path)
+
+
+@asynccontextmanager
+async def remote_target(base_url: str, users: int = 20):
+    """Drive an already running server.
+
+    Registers throwaway users for this run and reads the catalog to pick
+    products; start the server with ``STRIPE_API_BASE`` pointing at a running
+    stub (``python -m loadtest stripe-stub``) so checkouts stay local.
+    """
+    run_id = uuid.uuid4().hex[:8]
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        accounts = []
+        for i in range(users):
+            email = f"load-{run_id}-{i}@loadtest.local"
+            response = await client.post("/users/register", json={
+                "username": f"load-{run_id}-{i}", "email": email, "password": LOADTEST_PASSWORD,
+            })
+            response.raise_for_status()
+            accounts.append((email, LOADTEST_PASSWORD, None))
+        response = await client.get("/products/?limit=100")
+        response.raise_for_status()
+        product_ids = [product["id"] for product in response.json()]
+        if not product_ids:
+            raise RuntimeError("Target has no products; seed it first (python -m app.seed_db)")
+        yield client, accounts, product_ids, None
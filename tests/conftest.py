@@ -4,10 +4,13 @@ from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from app.main import app
-from app.database import get_db, Base
+from app.database import get_db, get_read_db, Base
 from app.auth.jwt_handler import create_access_token
+from app.auth.revocation import revocations
+from app.counters import product_counters
 from app import models
 from app.auth.utils import hash_password
+from app.monitoring.sql import capture_requests
 
 # Test database URL
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -19,6 +22,50 @@ engine = create_engine(
 
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "query_budget(max_statements, route=None): fail the test if any request "
+        "(optionally only those matching a route template) issues more SQL statements",
+    )
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    """Enforce ``@pytest.mark.query_budget`` on every request made by the test."""
+    marker = item.get_closest_marker("query_budget")
+    if marker is None:
+        yield
+        return
+
+    max_statements = marker.args[0] if marker.args else marker.kwargs["max_statements"]
+    route = marker.kwargs.get("route")
+    with capture_requests() as captured:
+        outcome = yield
+    if outcome.excinfo is not None:
+        return  # The test failed on its own; report that instead.
+
+    over_budget = [
+        stats for stats in captured
+        if (route is None or stats.route == route) and stats.statement_count > max_statements
+    ]
+    if over_budget:
+        lines = [
+            f"{stats.method} {stats.path} ({stats.route}): {stats.statement_count} statements"
+            for stats in over_budget
+        ]
+        for stats in over_budget:
+            lines.extend(f"    {statement}" for statement, _ in stats.statements)
+        pytest.fail(
+            f"Query budget of {max_statements} exceeded:\n" + "\n".join(lines),
+            pytrace=False,
+        )
+
+@pytest.fixture
+def query_log():
+    """Record SQL statistics (and statements) of every request made during the test."""
+    with capture_requests() as captured:
+        yield captured
+
 @pytest.fixture(scope="function")
 def db_session():
     """Create a fresh database for each test."""
@@ -40,6 +87,17 @@ def client(db_session):
             pass
     
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    # Ids are reused once the test database is dropped: start with a cold cache.
+    app.state.cache.clear()
+    app.state.rate_limiter.backend.clear()
+    revocations.clear()
+    product_counters.clear()
+    # No background flushes, sweeps or jobs racing the test on its session;
+    # tests run them explicitly (and shutdown flushes whatever is left).
+    app.state.settings.stats_flush_interval_seconds = 0
+    app.state.settings.cart_sweep_interval_seconds = 0
+    app.state.settings.job_workers = 0
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
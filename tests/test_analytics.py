@@ -0,0 +1,162 @@
+import itertools
+import re
+from datetime import datetime
+from unittest.mock import patch, MagicMock
+import pytest
+from fastapi import status
+from sqlalchemy import func, select
+from app import models
+from app.analytics import backfill, main
+from app.auth.jwt_handler import create_user_token
+from app.jobs import run_pending
+from app.database import Base, make_engine
+from app.seed_db import SeedConfig, generate
+
+@pytest.fixture
+def shelf(db_session):
+    """Two products to buy."""
+    products = [
+        models.Product(name="Pen", description="Pen", price=2.5, quantity=100),
+        models.Product(name="Pad", description="Pad", price=4.0, quantity=100),
+    ]
+    db_session.add_all(products)
+    db_session.commit()
+    return products
+
+_session_ids = itertools.count()
+
+def _checkout(client, db_session, headers, *items):
+    for product, quantity in items:
+        client.post("/cart/add", json={"product_id": product.id, "quantity": quantity}, headers=headers)
+    session = MagicMock()
+    session.id = f"cs_test_{next(_session_ids)}"
+    session.url = "https://checkout.stripe.com/test"
+    session.payment_status = "paid"
+    with patch("stripe.checkout.Session.create", return_value=session):
+        client.post("/orders/checkout", headers=headers)
+    # Only a confirmed payment records the order.
+    with patch("stripe.checkout.Session.retrieve", return_value=session):
+        response = client.get(f"/orders/success?session_id={session.id}")
+    run_pending(db_session)
+    return response
+
+def _rollups(engine):
+    with engine.connect() as conn:
+        return (
+            conn.execute(select(models.SalesDaily.__table__).order_by("day")).all(),
+            conn.execute(select(models.SalesDailyProduct.__table__).order_by("day", "product_id")).all(),
+        )
+
+class TestOrderRecording:
+    """Test checkout persists orders and updates the rollups."""
+
+    def test_checkout_persists_order(self, client, db_session, auth_headers, shelf):
+        """Test the order and its items are stored at the charged prices."""
+        pen, pad = shelf
+        response = _checkout(client, db_session, auth_headers, (pen, 2), (pad, 1))
+        order = db_session.get(models.Order, response.json()["order_id"])
+        assert order.total_price == 9.0
+        assert sorted((item.product_id, item.quantity, item.price) for item in order.items) == [
+            (pen.id, 2, 2.5), (pad.id, 1, 4.0),
+        ]
+
+    def test_rollups_follow_orders(self, client, db_session, auth_headers, shelf):
+        """Test each order is added to the daily and per-product rollups."""
+        pen, pad = shelf
+        _checkout(client, db_session, auth_headers, (pen, 2), (pad, 1))
+        _checkout(client, db_session, auth_headers, (pen, 1))
+        (day,), products = _rollups(db_session.get_bind())
+        assert (day.orders, day.units, day.revenue) == (2, 4, 11.5)
+        assert [(row.product_id, row.orders, row.units, row.revenue) for row in products] == [
+            (pen.id, 2, 3, 7.5), (pad.id, 1, 1, 4.0),
+        ]
+
+    def test_unpaid_checkout_not_counted(self, client, db_session, auth_headers, shelf):
+        """Test abandoned or repeated checkouts never reach the orders or rollups."""
+        pen, _ = shelf
+        client.post("/cart/add", json={"product_id": pen.id, "quantity": 2}, headers=auth_headers)
+        for session_id in ("cs_abandoned_1", "cs_abandoned_2"):
+            session = MagicMock(id=session_id, url="https://checkout.stripe.com/test")
+            with patch("stripe.checkout.Session.create", return_value=session):
+                client.post("/orders/checkout", headers=auth_headers)
+        run_pending(db_session)
+        assert db_session.query(models.Order).count() == 0
+        assert _rollups(db_session.get_bind()) == ([], [])
+
+    def test_backfill_matches_incremental(self, client, db_session, auth_headers, shelf):
+        """Test rebuilding from history gives the incrementally maintained rows."""
+        pen, pad = shelf
+        _checkout(client, db_session, auth_headers, (pen, 2), (pad, 1))
+        _checkout(client, db_session, auth_headers, (pad, 3))
+        engine = db_session.get_bind()
+        incremental = _rollups(engine)
+        backfill(engine)
+        assert _rollups(engine) == incremental
+
+class TestBackfill:
+    """Test rebuilding the rollups in bulk."""
+
+    def test_backfill_synthetic_history(self, tmp_path):
+        """Test rollup totals equal the order tables they summarize."""
+        engine = make_engine(f"sqlite:///{tmp_path / 'sales.db'}")
+        Base.metadata.create_all(bind=engine)
+        generate(engine, SeedConfig(products=30, users=5, orders=200, seed=5,
+                                    history_days=20, history_end=datetime(2026, 1, 1)),
+                 log=lambda message: None)
+        result = backfill(engine)
+        assert 0 < result["days"] <= 21
+        with engine.connect() as conn:
+            orders, revenue = conn.execute(
+                select(func.count(), func.sum(models.Order.total_price))
+            ).one()
+            rolled = conn.execute(
+                select(func.sum(models.SalesDaily.orders), func.sum(models.SalesDaily.revenue))
+            ).one()
+        assert rolled[0] == orders
+        assert rolled[1] == pytest.approx(revenue, abs=0.05)
+        engine.dispose()
+
+    def test_cli(self, tmp_path, capsys):
+        """Test the command line entry point."""
+        main(["backfill", "--database-url", f"sqlite:///{tmp_path / 'cli.db'}"])
+        assert "Sales rollups rebuilt: 0 days" in capsys.readouterr().out
+
+class TestSalesEndpoint:
+    """Test the admin sales report."""
+
+    def test_report(self, client, db_session, auth_headers, test_admin, shelf, query_log):
+        """Test totals, days and top products are read from the rollups alone."""
+        pen, pad = shelf
+        _checkout(client, db_session, auth_headers, (pen, 2), (pad, 1))
+        _checkout(client, db_session, auth_headers, (pad, 2))
+        query_log.clear()
+        headers = {"Authorization": f"Bearer {create_user_token(test_admin)}"}
+        response = client.get("/admin/analytics/sales", headers=headers)
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert (data["orders"], data["units"], data["revenue"]) == (2, 5, 17.0)
+        assert data["by_day"] == [
+            {"day": datetime.utcnow().date().isoformat(), "orders": 2, "units": 5, "revenue": 17.0}
+        ]
+        assert [(item["name"], item["revenue"]) for item in data["by_product"]] == [("Pad", 12.0), ("Pen", 5.0)]
+        (stats,) = query_log
+        assert not any(
+            re.search(r"\b(FROM|JOIN) (orders|order_items)\b", statement) for statement, _ in stats.statements
+        )
+
+    def test_date_range(self, client, db_session, admin_headers, auth_headers, shelf):
+        """Test days outside the requested range are excluded."""
+        _checkout(client, db_session, auth_headers, (shelf[0], 1))
+        response = client.get("/admin/analytics/sales?start=2020-01-01&end=2020-01-31", headers=admin_headers)
+        data = response.json()
+        assert (data["orders"], data["by_day"], data["by_product"]) == (0, [], [])
+
+    def test_invalid_range(self, client, admin_headers):
+        """Test a start after the end is rejected."""
+        response = client.get("/admin/analytics/sales?start=2026-02-01&end=2026-01-01", headers=admin_headers)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_admin_only(self, client, auth_headers):
+        """Test regular users cannot read sales figures."""
+        response = client.get("/admin/analytics/sales", headers=auth_headers)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
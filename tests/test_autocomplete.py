@@ -0,0 +1,146 @@
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from app import models
+from app.autocomplete import PrefixIndex, autocomplete_index, load_index
+from app.cache import InMemoryCache
+from app.counters import product_counters
+from app.database import get_db, get_read_db
+from app.main import app
+
+@pytest.fixture
+def catalog(client, db_session):
+    """Products with recorded popularity, indexed after the client started."""
+    products = [
+        models.Product(name=name, description=name, price=1.0, quantity=1)
+        for name in ("Laptop Stand", "Laptop Pro", "Lamp", "Pro Mouse", "Desk")
+    ]
+    db_session.add_all(products)
+    db_session.commit()
+    stand, pro, lamp, mouse, desk = products
+    product_counters.record(pro.id, "purchases")
+    product_counters.record(lamp.id, "views", 3)
+    product_counters.record(stand.id, "views")
+    product_counters.flush(db_session)
+    load_index(autocomplete_index, db_session)
+    return products
+
+def _names(response):
+    return [item["name"] for item in response.json()]
+
+class TestAutocompleteEndpoint:
+    """Test typeahead over product names."""
+
+    def test_ranked_by_popularity(self, client, catalog):
+        """Test matches come most popular first, case-insensitively."""
+        response = client.get("/products/autocomplete?prefix=LA")
+        assert response.status_code == status.HTTP_200_OK
+        assert _names(response) == ["Laptop Pro", "Lamp", "Laptop Stand"]
+
+    def test_ranked_by_name_with_limit(self, client, catalog):
+        """Test name ordering and the result limit."""
+        response = client.get("/products/autocomplete?prefix=la&sort=name&limit=2")
+        assert _names(response) == ["Lamp", "Laptop Pro"]
+
+    def test_matches_any_word(self, client, catalog):
+        """Test a prefix matches the start of any word in the name."""
+        assert _names(client.get("/products/autocomplete?prefix=pro")) == ["Laptop Pro", "Pro Mouse"]
+
+    def test_no_database_access(self, client, catalog, query_log):
+        """Test keystrokes are answered from memory."""
+        client.get("/products/autocomplete?prefix=l")
+        assert [stats.statement_count for stats in query_log] == [0]
+
+    def test_prefix_required(self, client):
+        """Test an empty prefix is rejected."""
+        response = client.get("/products/autocomplete?prefix=")
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    def test_admin_writes_update_index(self, client, catalog, admin_headers):
+        """Test created, renamed and deleted products are reflected immediately."""
+        created = client.post("/admin/products", json={
+            "name": "Lantern", "description": "Lantern", "price": 9.0, "quantity": 3,
+        }, headers=admin_headers).json()
+        assert "Lantern" in _names(client.get("/products/autocomplete?prefix=lan"))
+        client.put(f"/admin/products/{created['id']}", json={"name": "Torch"}, headers=admin_headers)
+        assert _names(client.get("/products/autocomplete?prefix=lan")) == []
+        assert _names(client.get("/products/autocomplete?prefix=tor")) == ["Torch"]
+        client.delete(f"/admin/products/{catalog[2].id}", headers=admin_headers)
+        assert "Lamp" not in _names(client.get("/products/autocomplete?prefix=la"))
+
+    def test_built_at_startup(self, db_session):
+        """Test the index is loaded from the catalog when the app starts."""
+        db_session.add(models.Product(name="Startup Widget", description="W", price=1.0, quantity=1))
+        db_session.commit()
+
+        def override_get_db():
+            yield db_session
+
+        app.dependency_overrides[get_db] = app.dependency_overrides[get_read_db] = override_get_db
+        try:
+            with TestClient(app) as client:
+                assert _names(client.get("/products/autocomplete?prefix=wid")) == ["Startup Widget"]
+        finally:
+            app.dependency_overrides.clear()
+
+class TestPrefixIndex:
+    """Test the prefix index directly."""
+
+    def test_bounded_by_popularity(self):
+        """Test only the most popular products are kept once full."""
+        index = PrefixIndex(max_products=2)
+        index.load([(1, "Alpha", 10), (2, "Beta", 5), (3, "Gamma", 1)])
+        assert len(index) == 2
+        index.put(4, "Delta")
+        assert index.search("d") == []
+        index.add_popularity({4: 0, 2: -5})
+        index.remove(1)
+        index.put(4, "Delta")
+        assert [item["name"] for item in index.search("d")] == ["Delta"]
+
+    def test_load_keeps_counted_products_over_uncounted(self, db_session):
+        """Test products without stats rank below counted ones when the index is full."""
+        products = [
+            models.Product(name=name, description=name, price=1.0, quantity=1)
+            for name in ("Counted", "Uncounted One", "Uncounted Two")
+        ]
+        db_session.add_all(products)
+        db_session.commit()
+        product_counters.record(products[0].id, "views")
+        product_counters.flush(db_session)
+        index = PrefixIndex(max_products=2)
+        load_index(index, db_session)
+        assert [item["name"] for item in index.search("c")] == ["Counted"]
+        assert len(index) == 2
+
+    def test_popularity_updates_reorder(self):
+        """Test flushed popularity changes the ranking."""
+        index = PrefixIndex()
+        index.load([(1, "Cable A", 5), (2, "Cable B", 1)])
+        index.add_popularity({2: 10})
+        assert [item["id"] for item in index.search("cable")] == [2, 1]
+
+    def test_walk_matches_full_ranking(self):
+        """Test the popularity walk for short prefixes agrees with ranking every match."""
+        rows = [(i, f"{'ab'[i % 2]}item {i}", (i * 7919) % 101) for i in range(300)]
+        walking, ranking = PrefixIndex(), PrefixIndex()
+        walking.WALK_THRESHOLD, ranking.WALK_THRESHOLD = 0, 10 ** 9
+        walking.load(rows)
+        ranking.load(rows)
+        for prefix in ("a", "b", "i", "item 1"):
+            assert walking.search(prefix, limit=20) == ranking.search(prefix, limit=20)
+
+    def test_remote_updates(self):
+        """Test writes published by one worker are applied by another."""
+        backend = InMemoryCache()
+        first, second = PrefixIndex(), PrefixIndex()
+        first.attach(backend)
+        second.attach(backend)
+        try:
+            first.put(1, "Shared Item")
+            assert second.search("shared") == [{"id": 1, "name": "Shared Item"}]
+            first.remove(1)
+            assert second.search("shared") == []
+        finally:
+            first.detach()
+            second.detach()
@@ -0,0 +1,166 @@
+import socket
+import pytest
+from fastapi import status
+from app.cache import (
+    CacheBackend, CacheError, FakeCacheServer, InMemoryCache, NearCache, RedisCache,
+    RespConnection, create_backend, product_key,
+)
+from app.main import app
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class BrokenBackend(CacheBackend):
+    def _fail(self, *args, **kwargs):
+        raise CacheError("connection refused")
+
+    get = set = delete = publish = consume_tokens = _fail
+
+    def subscribe(self, channel, callback):
+        return lambda: None
+
+class TestInMemoryCache:
+    """Test the process-local backend."""
+
+    def test_ttl_expiry(self):
+        """Test entries disappear once their TTL has passed."""
+        clock = FakeClock()
+        cache = InMemoryCache(clock=clock)
+        cache.set("key", b"value", ttl=10)
+        assert cache.get("key") == b"value"
+        clock.now = 10
+        assert cache.get("key") is None
+
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted first."""
+        cache = InMemoryCache(max_entries=2)
+        cache.set("a", b"1")
+        cache.set("b", b"2")
+        cache.get("a")
+        cache.set("c", b"3")
+        assert cache.get("b") is None
+        assert cache.get("a") == b"1"
+
+    def test_incr_keeps_first_ttl(self):
+        """Test counters start at the amount and expire with their first TTL."""
+        clock = FakeClock()
+        cache = InMemoryCache(clock=clock)
+        assert cache.incr("hits", ttl=5) == 1
+        clock.now = 3
+        assert cache.incr("hits", ttl=5) == 2
+        clock.now = 5
+        assert cache.incr("hits", ttl=5) == 1
+
+    def test_pubsub(self):
+        """Test subscribers receive published messages until they unsubscribe."""
+        cache = InMemoryCache()
+        received = []
+        unsubscribe = cache.subscribe("news", received.append)
+        cache.publish("news", b"one")
+        unsubscribe()
+        cache.publish("news", b"two")
+        assert received == [b"one"]
+
+class TestNearCache:
+    """Test the per-worker layer over a shared backend."""
+
+    def test_local_copy_avoids_backend(self):
+        """Test repeated reads are served locally."""
+        server = FakeCacheServer()
+        cache = NearCache(server.client(), local_ttl=5)
+        cache.set_json("k", {"v": 1})
+        server.commands.clear()
+        assert cache.get_json("k") == {"v": 1}
+        assert server.commands == []
+
+    def test_invalidation_reaches_other_workers(self):
+        """Test invalidating on one worker evicts the other's local copy."""
+        server = FakeCacheServer()
+        first = NearCache(server.client(), local_ttl=60)
+        second = NearCache(server.client(), local_ttl=60)
+        first.set_json("k", {"v": 1})
+        assert second.get_json("k") == {"v": 1}
+        first.invalidate("k")
+        assert second.get_json("k") is None
+        assert ("PUBLISH", "cache:invalidate") in server.commands
+
+    def test_backend_failure_is_a_miss(self):
+        """Test an unreachable backend degrades to cache misses."""
+        cache = NearCache(BrokenBackend(), local_ttl=0)
+        cache.set_json("k", {"v": 1})
+        assert cache.get_json("k") is None
+        cache.invalidate("k")
+
+    def test_create_backend(self):
+        """Test backends are selected by URL scheme."""
+        assert isinstance(create_backend("memory://"), InMemoryCache)
+        redis = create_backend("redis://:secret@cache.internal:6380/2")
+        assert isinstance(redis, RedisCache)
+        assert (redis.host, redis.port, redis.db, redis.password) == ("cache.internal", 6380, 2, "secret")
+        with pytest.raises(ValueError):
+            create_backend("memcached://localhost")
+
+class TestRespProtocol:
+    """Test RESP encoding and reply parsing."""
+
+    def test_encode(self):
+        """Test commands are encoded as arrays of bulk strings."""
+        assert RespConnection.encode("SET", "k", b"v", 10) == (
+            b"*4\r\n$3\r\nSET\r\n$1\r\nk\r\n$1\r\nv\r\n$2\r\n10\r\n"
+        )
+
+    def test_read_replies(self):
+        """Test each reply type is parsed."""
+        server, client = socket.socketpair()
+        connection = RespConnection.__new__(RespConnection)
+        connection.sock = client
+        connection._reader = client.makefile("rb")
+        server.sendall(b"+OK\r\n:42\r\n$3\r\nbar\r\n$-1\r\n*2\r\n$1\r\na\r\n:1\r\n-ERR wrong\r\n")
+        assert connection.read_reply() == "OK"
+        assert connection.read_reply() == 42
+        assert connection.read_reply() == b"bar"
+        assert connection.read_reply() is None
+        assert connection.read_reply() == [b"a", 1]
+        with pytest.raises(CacheError):
+            connection.read_reply()
+        connection.close()
+        server.close()
+
+    def test_unreachable_server_raises_cache_error(self):
+        """Test connection failures surface as CacheError."""
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        with pytest.raises(CacheError):
+            RedisCache(port=port, timeout=0.5).get("k")
+
+class TestProductCache:
+    """Test catalog lookups go through the shared cache."""
+
+    def test_second_read_is_cached(self, client, test_product, query_log):
+        """Test a cached product is served without touching the database."""
+        first = client.get(f"/products/{test_product.id}")
+        second = client.get(f"/products/{test_product.id}")
+        assert first.json() == second.json()
+        assert [stats.statement_count for stats in query_log] == [1, 0]
+        assert app.state.cache.get_json(product_key(test_product.id))["name"] == "Test Product"
+
+    def test_admin_update_invalidates(self, client, test_product, admin_headers):
+        """Test updating a product through the admin routes evicts it."""
+        client.get(f"/products/{test_product.id}")
+        response = client.put(
+            f"/admin/products/{test_product.id}", json={"price": 5.0}, headers=admin_headers
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert client.get(f"/products/{test_product.id}").json()["price"] == 5.0
+
+    def test_admin_delete_invalidates(self, client, test_product, admin_headers):
+        """Test a deleted product is not served from the cache."""
+        client.get(f"/products/{test_product.id}")
+        client.delete(f"/admin/products/{test_product.id}", headers=admin_headers)
+        response = client.get(f"/products/{test_product.id}")
+        assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,126 @@
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+import pytest
+from sqlalchemy import func, select, update
+from app import models
+from app.monitoring.metrics import CART_ROWS_RECLAIMED
+from app.sweeper import CartSweeper, sweep_carts
+
+@pytest.fixture
+def carts(db_session, test_user, test_admin):
+    """Fresh, stale and orphaned cart rows."""
+    products = [
+        models.Product(name=f"Sweep {i}", description="Sweep", price=1.0, quantity=10) for i in range(3)
+    ]
+    db_session.add_all(products)
+    db_session.commit()
+    old = datetime.utcnow() - timedelta(days=40)
+    fresh = models.CartItem(user_id=test_user.id, product_id=products[0].id, quantity=1)
+    stale = [
+        models.CartItem(user_id=user.id, product_id=products[1].id, quantity=1, created_at=old, updated_at=old)
+        for user in (test_user, test_admin)
+    ]
+    orphan = models.CartItem(user_id=test_admin.id, product_id=products[2].id, quantity=2)
+    db_session.add_all([fresh, *stale, orphan])
+    db_session.commit()
+    db_session.delete(products[2])
+    db_session.commit()
+    return fresh, stale, orphan
+
+def _remaining(db_session):
+    return db_session.execute(select(models.CartItem.id).order_by(models.CartItem.id)).scalars().all()
+
+class TestCartTimestamps:
+    """Test cart rows record when they were added and changed."""
+
+    def test_quantity_change_bumps_updated_at(self, client, db_session, auth_headers, carts):
+        """Test adding to an existing row refreshes ``updated_at`` only."""
+        stale = carts[1][0]
+        created_at = stale.created_at
+        client.post("/cart/add", json={"product_id": stale.product_id, "quantity": 1}, headers=auth_headers)
+        db_session.refresh(stale)
+        assert stale.quantity == 2
+        assert stale.created_at == created_at
+        assert stale.updated_at > datetime.utcnow() - timedelta(minutes=1)
+
+class TestSweepCarts:
+    """Test deleting expired and orphaned cart rows."""
+
+    def test_deletes_expired_and_orphaned(self, db_session, carts):
+        """Test only stale rows and rows of deleted products are removed."""
+        fresh, _, _ = carts
+        before = CART_ROWS_RECLAIMED.value(reason="expired")
+        assert sweep_carts(db_session, timedelta(days=30)) == {"expired": 2, "orphaned": 1, "abandoned": 0}
+        assert _remaining(db_session) == [fresh.id]
+        assert CART_ROWS_RECLAIMED.value(reason="expired") == before + 2
+
+    def test_row_touched_during_batch_is_kept(self, db_session, carts, monkeypatch):
+        """Test a row refreshed between selecting and deleting a batch survives."""
+        _, stale, _ = carts
+        touched_id, expired_id = (item.id for item in stale)
+        execute = db_session.execute
+
+        def touch_before_delete(statement, *args, **kwargs):
+            if statement.is_delete and statement.table.name == "cart_items":
+                execute(
+                    update(models.CartItem)
+                    .where(models.CartItem.id == touched_id)
+                    .values(updated_at=datetime.utcnow())
+                )
+            return execute(statement, *args, **kwargs)
+        monkeypatch.setattr(db_session, "execute", touch_before_delete)
+        assert sweep_carts(db_session, timedelta(days=30))["expired"] == 1
+        monkeypatch.undo()
+        remaining = _remaining(db_session)
+        assert touched_id in remaining and expired_id not in remaining
+
+    def test_bounded_batches(self, db_session, carts):
+        """Test each batch is its own short transaction."""
+        db_session.commit = MagicMock(wraps=db_session.commit)
+        sweep_carts(db_session, timedelta(days=30), batch_size=1)
+        # Two expired rows and one orphan, one row per batch.
+        assert db_session.commit.call_count == 3
+
+    def test_nothing_to_reclaim(self, db_session, carts):
+        """Test a second sweep finds nothing."""
+        sweep_carts(db_session, timedelta(days=30))
+        assert sweep_carts(db_session, timedelta(days=30)) == {"expired": 0, "orphaned": 0, "abandoned": 0}
+
+    def test_deletes_abandoned_checkouts(self, db_session, test_user):
+        """Test checkouts unpaid for over a day are deleted."""
+        old = datetime.utcnow() - timedelta(days=2)
+        db_session.add_all([
+            models.CheckoutSession(id="cs_old", user_id=test_user.id, total_price=1.0, items="[]", created_at=old),
+            models.CheckoutSession(id="cs_new", user_id=test_user.id, total_price=1.0, items="[]"),
+        ])
+        db_session.commit()
+        assert sweep_carts(db_session, timedelta(days=30))["abandoned"] == 1
+        assert db_session.execute(select(models.CheckoutSession.id)).scalars().all() == ["cs_new"]
+
+    def test_expiry_is_relative(self, db_session, carts):
+        """Test rows younger than the expiry are kept."""
+        assert sweep_carts(db_session, timedelta(days=60))["expired"] == 0
+        assert db_session.execute(select(func.count()).select_from(models.CartItem)).scalar() == 3
+
+class TestCartSweeper:
+    """Test the background sweeper thread."""
+
+    def test_sweep_uses_session_factory(self, db_session, carts):
+        """Test a sweep runs on the session the factory yields."""
+        def get_db():
+            yield db_session
+
+        sweeper = CartSweeper(get_db, interval=0, max_age=timedelta(days=30))
+        sweeper.start()
+        assert sweeper._thread is None
+        assert sweeper.sweep() == {"expired": 2, "orphaned": 1, "abandoned": 0}
+
+    def test_failures_are_logged(self, caplog):
+        """Test a failing sweep is logged instead of killing the thread."""
+        def get_db():
+            session = MagicMock()
+            session.execute.side_effect = RuntimeError("database down")
+            yield session
+
+        assert CartSweeper(get_db, interval=0, max_age=timedelta(days=30)).sweep() is None
+        assert "Cart sweep failed" in caplog.text
@@ -0,0 +1,98 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+from unittest.mock import patch
+import pytest
+from fastapi import status
+from app import export, models
+
+@pytest.fixture
+def orders(db_session, test_user, test_admin):
+    """Three days of orders with two lines each; one product is later deleted."""
+    products = [models.Product(name=f"Export {i}", description="Export", price=5.0, quantity=10) for i in range(2)]
+    db_session.add_all(products)
+    db_session.commit()
+    start = datetime(2024, 3, 1, 12)
+    placed = []
+    for day in range(3):
+        order = models.Order(user_id=(test_user, test_admin)[day % 2].id, total_price=15.0,
+                             created_at=start + timedelta(days=day))
+        order.items = [
+            models.OrderItem(product_id=products[0].id, quantity=1, price=5.0),
+            models.OrderItem(product_id=products[1].id, quantity=2, price=5.0),
+        ]
+        placed.append(order)
+    db_session.add_all(placed)
+    db_session.commit()
+    db_session.delete(products[1])
+    db_session.commit()
+    return placed
+
+def _csv(response):
+    return list(csv.DictReader(io.StringIO(response.text)))
+
+class TestOrderExport:
+    """Test streaming order lines to accounting."""
+
+    def test_csv_range(self, client, admin_headers, orders):
+        """Test only lines of orders within the inclusive date range are exported, oldest first."""
+        response = client.get("/admin/orders/export?from=2024-03-02&to=2024-03-03", headers=admin_headers)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/csv")
+        assert "orders-2024-03-02-2024-03-03.csv" in response.headers["content-disposition"]
+        rows = _csv(response)
+        assert [int(row["order_id"]) for row in rows] == [orders[1].id] * 2 + [orders[2].id] * 2
+        assert (rows[0]["product_name"], rows[0]["quantity"], rows[0]["price"]) == ("Export 0", "1", "5.0")
+        # The second product was deleted; its lines are kept.
+        assert rows[1]["product_name"] == ""
+
+    def test_ndjson(self, client, admin_headers, orders):
+        """Test NDJSON output has one object per order line."""
+        response = client.get("/admin/orders/export?from=2024-03-01&to=2024-03-01&format=ndjson",
+                              headers=admin_headers)
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["quantity"] for line in lines] == [1, 2]
+        assert lines[0] == {
+            "order_id": orders[0].id, "user_id": orders[0].user_id, "created_at": "2024-03-01T12:00:00",
+            "order_total": 15.0, "product_id": lines[0]["product_id"], "product_name": "Export 0",
+            "quantity": 1, "price": 5.0,
+        }
+
+    def test_empty_range(self, client, admin_headers, orders):
+        """Test a range without orders yields just the header."""
+        response = client.get("/admin/orders/export?from=2020-01-01&to=2020-01-31", headers=admin_headers)
+        assert response.text.splitlines() == [",".join(export.EXPORT_COLUMNS)]
+
+    def test_validation(self, client, admin_headers):
+        """Test missing or reversed dates and unknown formats are rejected."""
+        assert client.get("/admin/orders/export?from=2024-03-02", headers=admin_headers).status_code == \
+            status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert client.get("/admin/orders/export?from=2024-03-02&to=2024-03-01", headers=admin_headers).status_code == \
+            status.HTTP_400_BAD_REQUEST
+        assert client.get("/admin/orders/export?from=2024-03-01&to=2024-03-02&format=xml",
+                          headers=admin_headers).status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    def test_admin_only(self, client, auth_headers):
+        """Test regular users cannot export orders."""
+        response = client.get("/admin/orders/export?from=2024-03-01&to=2024-03-02", headers=auth_headers)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+class TestChunking:
+    """Test rows are written out in bounded chunks."""
+
+    def test_header_before_rows(self):
+        """Test the CSV header is produced before any row is read."""
+        def batches():
+            raise AssertionError("rows read before the header was sent")
+            yield
+
+        assert next(export.csv_chunks(batches())).decode().strip() == ",".join(export.EXPORT_COLUMNS)
+
+    def test_chunks_are_bounded(self, db_session, orders):
+        """Test each chunk holds at most one batch of rows."""
+        with patch.object(export, "EXPORT_BATCH_SIZE", 2):
+            batches = export.export_batches(db_session, datetime(2024, 3, 1).date(), datetime(2024, 3, 3).date())
+            chunks = [chunk.decode().splitlines() for chunk in export.ndjson_chunks(batches)]
+        assert [len(chunk) for chunk in chunks] == [2, 2, 2]
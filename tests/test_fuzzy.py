@@ -0,0 +1,99 @@
+import pytest
+from fastapi import status
+from sqlalchemy import func, select
+from app import models
+from app.database import Base, make_engine
+from app.fuzzy import main, rebuild, trigrams, word_trigrams
+from app.seed_db import SeedConfig, generate
+
+@pytest.fixture
+def catalog(db_session):
+    """Products with trigrams indexed as the routes would."""
+    products = [
+        models.Product(name=name, description=name, price=1.0, quantity=1)
+        for name in ("Laptop", "Laptop Stand", "Desk Lamp", "Wireless Mouse", "Tablet")
+    ]
+    db_session.add_all(products)
+    db_session.commit()
+    rebuild(db_session.get_bind())
+    return products
+
+def _names(response):
+    return [item["name"] for item in response.json()]
+
+class TestTrigrams:
+    """Test trigram extraction."""
+
+    def test_pg_trgm_padding(self):
+        """Test words are lower-cased and padded like pg_trgm."""
+        assert trigrams("Cat") == {"  c", " ca", "cat", "at "}
+
+    def test_words(self):
+        """Test punctuation separates words."""
+        assert word_trigrams("USB-C hub") == [trigrams("usb"), trigrams("c"), trigrams("hub")]
+
+class TestFuzzySearch:
+    """Test typo-tolerant product search."""
+
+    def test_misspelling(self, client, catalog):
+        """Test a misspelled query finds the product, best match first."""
+        response = client.get("/products/fuzzy?q=labtop")
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert [item["name"] for item in data] == ["Laptop", "Laptop Stand"]
+        assert data[0]["score"] == pytest.approx(0.4)
+        assert data[0]["score"] == data[1]["score"]
+
+    def test_ranked_by_similarity(self, client, catalog):
+        """Test closer matches rank higher and unrelated names are dropped."""
+        assert _names(client.get("/products/fuzzy?q=lamp")) == ["Desk Lamp"]
+        assert _names(client.get("/products/fuzzy?q=wireles mous"))[0] == "Wireless Mouse"
+
+    def test_limit(self, client, catalog):
+        """Test results are capped per query."""
+        assert len(client.get("/products/fuzzy?q=laptop&limit=1").json()) == 1
+        response = client.get("/products/fuzzy?q=laptop&limit=51")
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    def test_no_words(self, client, catalog):
+        """Test a query without letters or digits matches nothing."""
+        assert client.get("/products/fuzzy?q=--").json() == []
+
+    def test_single_indexed_query(self, client, catalog, query_log):
+        """Test one statement, with candidates read from the trigram index."""
+        client.get("/products/fuzzy?q=labtop")
+        (stats,) = query_log
+        assert stats.statement_count == 1
+        assert "product_name_trigrams" in stats.statements[0][0]
+
+    def test_route_writes_maintain_index(self, client, catalog, admin_headers):
+        """Test created, renamed and deleted products are reindexed."""
+        created = client.post("/admin/products", json={
+            "name": "Keyboard", "description": "Keyboard", "price": 20.0, "quantity": 3,
+        }, headers=admin_headers).json()
+        assert _names(client.get("/products/fuzzy?q=keybord")) == ["Keyboard"]
+        client.put(f"/admin/products/{created['id']}", json={"name": "Monitor"}, headers=admin_headers)
+        assert _names(client.get("/products/fuzzy?q=keybord")) == []
+        assert _names(client.get("/products/fuzzy?q=monitr")) == ["Monitor"]
+        client.delete(f"/admin/products/{created['id']}", headers=admin_headers)
+        assert _names(client.get("/products/fuzzy?q=monitr")) == []
+
+class TestRebuild:
+    """Test rebuilding the trigram table."""
+
+    def test_rebuild_seeded_catalog(self, tmp_path):
+        """Test every word of every name is indexed."""
+        engine = make_engine(f"sqlite:///{tmp_path / 'fuzzy.db'}")
+        Base.metadata.create_all(bind=engine)
+        generate(engine, SeedConfig(products=40, users=2, orders=0, seed=3), log=lambda message: None)
+        written = rebuild(engine)
+        with engine.connect() as conn:
+            names = conn.execute(select(models.Product.name)).scalars().all()
+            stored = conn.execute(select(func.count()).select_from(models.ProductNameTrigram)).scalar()
+        assert written == stored == sum(len(grams) for name in names for grams in word_trigrams(name))
+        engine.dispose()
+
+    def test_cli(self, tmp_path, capsys):
+        """Test the command line entry point."""
+        main(["rebuild", "--database-url", f"sqlite:///{tmp_path / 'cli.db'}"])
+        assert "Trigram index rebuilt: 0 trigrams" in capsys.readouterr().out
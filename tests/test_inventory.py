@@ -0,0 +1,72 @@
+import pytest
+from fastapi import status
+from app import models
+
+@pytest.fixture
+def stock(db_session, test_user, test_admin):
+    """Products with varied stock and carts holding some of them."""
+    products = [
+        models.Product(name=f"Stock {quantity}", description="Stock", price=1.0, quantity=quantity)
+        for quantity in (0, 3, 8, 50)
+    ]
+    db_session.add_all(products)
+    db_session.commit()
+    empty, low, medium, plenty = products
+    db_session.add_all([
+        models.CartItem(user_id=test_user.id, product_id=low.id, quantity=2),
+        models.CartItem(user_id=test_admin.id, product_id=low.id, quantity=4),
+        models.CartItem(user_id=test_user.id, product_id=empty.id, quantity=1),
+        models.CartItem(user_id=test_user.id, product_id=plenty.id, quantity=5),
+    ])
+    db_session.commit()
+    return products
+
+class TestLowStock:
+    """Test the low-stock report."""
+
+    def test_low_stock(self, client, admin_headers, stock):
+        """Test products at or under the threshold are listed, emptiest first."""
+        response = client.get("/admin/inventory/low-stock?threshold=5", headers=admin_headers)
+        assert response.status_code == status.HTTP_200_OK
+        assert [item["quantity"] for item in response.json()] == [0, 3]
+
+    def test_default_threshold_and_limit(self, client, admin_headers, stock):
+        """Test the default threshold of 10 and the limit."""
+        response = client.get("/admin/inventory/low-stock?limit=2", headers=admin_headers)
+        assert [item["quantity"] for item in response.json()] == [0, 3]
+        assert len(client.get("/admin/inventory/low-stock", headers=admin_headers).json()) == 3
+
+    def test_admin_only(self, client, auth_headers):
+        """Test regular users are refused."""
+        response = client.get("/admin/inventory/low-stock", headers=auth_headers)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+class TestCartDemand:
+    """Test the cart demand report."""
+
+    def test_demand_versus_stock(self, client, admin_headers, stock):
+        """Test units in carts are compared with stock, largest shortfall first."""
+        empty, low, medium, plenty = stock
+        response = client.get("/admin/inventory/cart-demand", headers=admin_headers)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == [
+            {"product_id": low.id, "name": "Stock 3", "on_hand": 3, "in_carts": 6, "carts": 2, "shortfall": 3},
+            {"product_id": empty.id, "name": "Stock 0", "on_hand": 0, "in_carts": 1, "carts": 1, "shortfall": 1},
+            {"product_id": plenty.id, "name": "Stock 50", "on_hand": 50, "in_carts": 5, "carts": 1, "shortfall": -45},
+        ]
+
+    def test_short_only(self, client, admin_headers, stock):
+        """Test ``short_only`` keeps products whose carts exceed the stock."""
+        response = client.get("/admin/inventory/cart-demand?short_only=true", headers=admin_headers)
+        assert [item["name"] for item in response.json()] == ["Stock 3", "Stock 0"]
+
+    def test_single_grouped_query(self, client, admin_headers, stock, query_log):
+        """Test the report is one statement and is then served from the cache."""
+        client.get("/admin/inventory/cart-demand", headers=admin_headers)
+        client.get("/admin/inventory/cart-demand", headers=admin_headers)
+        report_statements = [
+            [statement for statement, _ in stats.statements if "cart_items" in statement]
+            for stats in query_log
+        ]
+        assert [len(statements) for statements in report_statements] == [1, 0]
+        assert "GROUP BY" in report_statements[0][0]
@@ -0,0 +1,144 @@
+import json
+import threading
+from datetime import datetime, timedelta
+import pytest
+from fastapi import status
+from app import jobs, models
+from app.database import sessionLocal
+from app.jobs import JobWorkers, enqueue, handler, retry_delay, run_next, run_pending
+
+CALLS = []
+
+@handler("test.record")
+def _record(db, payload):
+    CALLS.append(payload)
+
+@handler("test.fail")
+def _fail(db, payload):
+    raise RuntimeError("boom")
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    CALLS.clear()
+
+def _jobs(db_session):
+    db_session.expire_all()
+    return db_session.query(models.Job).order_by(models.Job.id).all()
+
+class TestQueue:
+    """Test enqueueing and running jobs."""
+
+    def test_runs_after_commit_and_is_deleted(self, db_session):
+        """Test a committed job runs once and leaves no row behind."""
+        enqueue(db_session, "test.record", {"n": 1})
+        db_session.commit()
+        assert run_pending(db_session) == 1
+        assert CALLS == [{"n": 1}]
+        assert _jobs(db_session) == []
+
+    def test_uncommitted_job_never_runs(self, db_session):
+        """Test a job rolled back with its request is discarded."""
+        enqueue(db_session, "test.record", {"n": 1})
+        db_session.rollback()
+        assert run_pending(db_session) == 0
+
+    def test_delayed_job_waits(self, db_session):
+        """Test jobs only run once due."""
+        enqueue(db_session, "test.record", {}, delay=60)
+        db_session.commit()
+        assert run_next(db_session) is False
+
+    def test_unknown_kind(self, db_session):
+        """Test enqueueing a kind without a handler is rejected."""
+        with pytest.raises(ValueError):
+            enqueue(db_session, "test.missing")
+
+    def test_retries_with_backoff_then_fails(self, db_session):
+        """Test failures are rescheduled with growing delays, then marked failed."""
+        enqueue(db_session, "test.fail", max_attempts=2)
+        db_session.commit()
+        assert run_next(db_session) is True
+        (job,) = _jobs(db_session)
+        assert (job.status, job.attempts) == ("queued", 1)
+        assert job.run_at > datetime.utcnow() + timedelta(seconds=retry_delay(1) - 1)
+        assert "boom" in job.last_error
+        job.run_at = datetime.utcnow()
+        db_session.commit()
+        run_next(db_session)
+        (job,) = _jobs(db_session)
+        assert (job.status, job.attempts) == ("failed", 2)
+        assert run_next(db_session) is False
+        assert retry_delay(3) == 4 * retry_delay(1)
+
+    def test_stale_running_job_is_reclaimed(self, db_session):
+        """Test a job left running by a dead worker is claimed again after the timeout."""
+        job = enqueue(db_session, "test.record", {"n": 2})
+        job.status, job.attempts = "running", 1
+        job.locked_at = datetime.utcnow() - timedelta(seconds=jobs.JOB_TIMEOUT_SECONDS + 1)
+        db_session.commit()
+        assert run_pending(db_session) == 1
+        assert CALLS == [{"n": 2}]
+
+class TestWorkers:
+    """Test the worker threads."""
+
+    def test_workers_drain_queue(self, db_session):
+        """Test each job runs exactly once across several threads."""
+        for n in range(20):
+            enqueue(db_session, "test.record", {"n": n})
+        db_session.commit()
+        bind = db_session.get_bind()
+
+        def get_db():
+            db = sessionLocal(bind=bind)
+            try:
+                yield db
+            finally:
+                db.close()
+
+        workers = JobWorkers(get_db, concurrency=3, poll_interval=0.01)
+        workers.start()
+        deadline = datetime.utcnow() + timedelta(seconds=10)
+        while len(CALLS) < 20 and datetime.utcnow() < deadline:
+            threading.Event().wait(0.02)
+        workers.stop(timeout=5)
+        assert sorted(call["n"] for call in CALLS) == list(range(20))
+        assert _jobs(db_session) == []
+
+    def test_disabled(self):
+        """Test no threads start without workers."""
+        workers = JobWorkers(lambda: iter(()), concurrency=0, poll_interval=1)
+        workers.start()
+        assert workers._threads == []
+        workers.stop()
+
+class TestJobRoutes:
+    """Test queueing and inspecting jobs through the admin API."""
+
+    def test_refresh_recommendations_is_queued(self, client, db_session, admin_headers):
+        """Test the request returns 202 with the queued job, which a worker then runs."""
+        response = client.post("/admin/recommendations/refresh?top_k=5", headers=admin_headers)
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert (response.json()["kind"], response.json()["status"]) == ("recommendations.update", "queued")
+        (job,) = _jobs(db_session)
+        assert json.loads(job.payload) == {"top_k": 5}
+        assert run_pending(db_session) == 1
+        assert _jobs(db_session) == []
+
+    def test_list_and_retry_failed(self, client, db_session, admin_headers):
+        """Test failed jobs are listed and can be queued again."""
+        enqueue(db_session, "test.fail", max_attempts=1)
+        db_session.commit()
+        run_pending(db_session)
+        failed = client.get("/admin/jobs?status=failed", headers=admin_headers).json()
+        assert [job["kind"] for job in failed] == ["test.fail"]
+        response = client.post(f"/admin/jobs/{failed[0]['id']}/retry", headers=admin_headers)
+        assert (response.json()["status"], response.json()["attempts"]) == ("queued", 0)
+        assert client.post(f"/admin/jobs/{failed[0]['id']}/retry", headers=admin_headers).status_code == \
+            status.HTTP_400_BAD_REQUEST
+
+    def test_admin_only(self, client, auth_headers):
+        """Test regular users cannot queue or list jobs."""
+        assert client.get("/admin/jobs", headers=auth_headers).status_code == status.HTTP_403_FORBIDDEN
+        response = client.post("/admin/recommendations/refresh", headers=auth_headers)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
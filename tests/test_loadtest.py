@@ -0,0 +1,64 @@
+import asyncio
+import pytest
+from loadtest.report import compare_reports, percentile
+from loadtest.runner import run_load
+from loadtest.scenarios import parse_mix
+from loadtest.targets import in_process_target
+
+def _report(p95, rps):
+    return {"scenarios": {"browse": {"count": 10, "p95_ms": p95, "rps": rps}}}
+
+class TestLoadTestReport:
+    """Test latency percentiles and regression comparison."""
+
+    def test_percentile_interpolates(self):
+        """Test percentiles interpolate between ranks."""
+        values = [1, 2, 3, 4]
+        assert percentile(values, 50) == 2.5
+        assert percentile(values, 100) == 4
+        assert percentile([], 99) == 0.0
+
+    def test_latency_regression_detected(self):
+        """Test a p95 increase beyond tolerance is a regression."""
+        regressions = compare_reports(_report(100, 50), _report(120, 50), tolerance=0.1)
+        assert [r["metric"] for r in regressions] == ["p95_ms"]
+
+    def test_throughput_regression_detected(self):
+        """Test a throughput drop beyond tolerance is a regression."""
+        regressions = compare_reports(_report(100, 50), _report(100, 40), tolerance=0.1)
+        assert [r["metric"] for r in regressions] == ["rps"]
+
+    def test_within_tolerance(self):
+        """Test small changes are not flagged."""
+        assert compare_reports(_report(100, 50), _report(105, 48), tolerance=0.1) == []
+
+    def test_parse_mix_rejects_unknown_scenario(self):
+        """Test the mix parser validates scenario names."""
+        assert parse_mix("browse=3,checkout=1") == {"browse": 3.0, "checkout": 1.0}
+        with pytest.raises(ValueError):
+            parse_mix("shoplift=1")
+
+class TestLoadTestRun:
+    """Smoke-test a short in-process run against the Stripe stub."""
+
+    def test_in_process_run(self, tmp_path):
+        """Test every scenario runs without errors and each checkout is paid through the stub."""
+        async def run():
+            async with in_process_target(
+                products=10, users=2, stripe_latency_ms=0, db_path=str(tmp_path / "load.db")
+            ) as (client, accounts, product_ids, stub):
+                report = await run_load(
+                    client, accounts, product_ids,
+                    {"browse": 1, "add_to_cart": 1, "view_cart": 1, "checkout": 1},
+                    concurrency=2, iterations=12, seed=1,
+                )
+                return report, dict(stub.calls)
+
+        report, stub_calls = asyncio.run(run())
+        scenarios = report["scenarios"]
+        assert sum(s["count"] for s in scenarios.values()) == 12
+        assert all(s["errors"] == 0 for s in scenarios.values())
+        assert {"p50_ms", "p95_ms", "p99_ms", "rps"} <= set(scenarios["browse"])
+        assert stub_calls.get("checkout.session.create", 0) == scenarios["checkout"]["count"]
+        assert stub_calls.get("checkout.session.retrieve", 0) == scenarios["checkout"]["count"]
+        assert report["requests"]["GET /orders/success"]["count"] == scenarios["checkout"]["count"]
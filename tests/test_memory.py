@@ -0,0 +1,92 @@
+import tracemalloc
+import pytest
+from fastapi import status
+from app.monitoring import memory
+from app.monitoring.memory import memory_tracker
+
+@pytest.fixture
+def tracing():
+    """Enable tracemalloc for the duration of a test."""
+    memory_tracker.reset()
+    already_tracing = tracemalloc.is_tracing()
+    memory.start(frames=5)
+    yield
+    if not already_tracing:
+        memory.stop()
+    memory_tracker.reset()
+
+class TestMemoryTrackingDisabled:
+    """Test behaviour while tracemalloc is off."""
+
+    def test_overview_reports_disabled(self, client, admin_headers):
+        """Test the overview works but reports tracking as off."""
+        response = client.get("/admin/memory", headers=admin_headers)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["enabled"] is False
+
+    def test_snapshot_requires_tracing(self, client, admin_headers):
+        """Test snapshots are refused while tracing is off."""
+        response = client.post("/admin/memory/snapshots", headers=admin_headers)
+        assert response.status_code == status.HTTP_409_CONFLICT
+
+    def test_regular_user_forbidden(self, client, auth_headers):
+        """Test memory endpoints are admin-only."""
+        response = client.get("/admin/memory", headers=auth_headers)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+class TestMemoryTracking:
+    """Test per-route accounting, top sites and snapshot diffs."""
+
+    def test_per_route_accounting(self, client, admin_headers, test_product, tracing):
+        """Test peak and net bytes are recorded against route templates."""
+        client.get("/products/")
+        client.get(f"/products/{test_product.id}")
+        routes = client.get("/admin/memory", headers=admin_headers).json()["routes"]
+        assert routes["/products/"]["requests"] == 1
+        assert routes["/products/"]["max_peak_bytes"] > 0
+        assert "/products/{product_id}" in routes
+
+    def test_per_route_accounting_without_reset_peak(self, client, admin_headers, tracing, monkeypatch):
+        """Test requests are still accounted where tracemalloc.reset_peak is missing (Python 3.8)."""
+        monkeypatch.setattr(memory, "_reset_peak", None)
+        for _ in range(2):
+            response = client.get("/products/")
+            assert response.status_code == status.HTTP_200_OK
+        routes = client.get("/admin/memory", headers=admin_headers).json()["routes"]
+        assert routes["/products/"]["requests"] == 2
+        assert routes["/products/"]["max_peak_bytes"] >= 0
+
+    def test_top_allocation_sites(self, client, admin_headers, tracing):
+        """Test the top allocation sites are returned."""
+        response = client.get("/admin/memory/top?limit=5", headers=admin_headers)
+        assert response.status_code == status.HTTP_200_OK
+        sites = response.json()
+        assert 0 < len(sites) <= 5
+        assert sites[0]["size_bytes"] >= sites[-1]["size_bytes"]
+
+    def test_invalid_group_by(self, client, admin_headers, tracing):
+        """Test unknown grouping keys are rejected."""
+        response = client.get("/admin/memory/top?group_by=module", headers=admin_headers)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_snapshot_diff(self, client, admin_headers, tracing):
+        """Test diffing two snapshots surfaces memory retained in between."""
+        first = client.post("/admin/memory/snapshots?label=before", headers=admin_headers).json()
+        retained = [bytearray(1024) for _ in range(200)]
+        second = client.post("/admin/memory/snapshots?label=after", headers=admin_headers).json()
+
+        listing = client.get("/admin/memory/snapshots", headers=admin_headers).json()
+        assert [s["label"] for s in listing] == ["before", "after"]
+
+        response = client.get(
+            f"/admin/memory/snapshots/{first['id']}/diff/{second['id']}", headers=admin_headers
+        )
+        assert response.status_code == status.HTTP_200_OK
+        growth = [d for d in response.json() if "test_memory.py" in d["traceback"][0]]
+        assert growth and growth[0]["size_diff_bytes"] >= 200 * 1024
+        del retained
+
+    def test_diff_unknown_snapshot(self, client, admin_headers, tracing):
+        """Test diffing a missing snapshot returns 404."""
+        response = client.get("/admin/memory/snapshots/a/diff/b", headers=admin_headers)
+        assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,97 @@
+import pytest
+from fastapi import status
+from app.monitoring import metrics
+from app.monitoring.metrics import Registry
+
+class TestMetricsRegistry:
+    """Test the Prometheus text exposition of the metrics registry."""
+
+    def test_counter_render(self):
+        """Test counters render one sample per label set."""
+        registry = Registry()
+        counter = registry.counter("jobs_total", "Jobs processed.", ("kind",))
+        counter.inc(kind="email")
+        counter.inc(2, kind="email")
+        text = registry.render()
+        assert "# TYPE jobs_total counter" in text
+        assert 'jobs_total{kind="email"} 3' in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test histogram buckets, sum and count."""
+        registry = Registry()
+        histogram = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+        histogram.observe(0.05)
+        histogram.observe(0.1)
+        histogram.observe(5)
+        text = registry.render()
+        assert 'latency_seconds_bucket{le="0.1"} 2' in text
+        assert 'latency_seconds_bucket{le="1"} 2' in text
+        assert 'latency_seconds_bucket{le="+Inf"} 3' in text
+        assert "latency_seconds_count 3" in text
+        assert "latency_seconds_sum 5.15" in text
+
+    def test_label_values_are_escaped(self):
+        """Test label values containing quotes are escaped."""
+        registry = Registry()
+        counter = registry.counter("paths_total", "Paths.", ("path",))
+        counter.inc(path='a"b')
+        assert 'paths_total{path="a\\"b"} 1' in registry.render()
+
+    def test_wrong_labels_rejected(self):
+        """Test updating a metric with unexpected labels fails loudly."""
+        registry = Registry()
+        counter = registry.counter("things_total", "Things.", ("kind",))
+        with pytest.raises(ValueError):
+            counter.inc(other="x")
+
+    def test_duplicate_registration_rejected(self):
+        """Test registering the same metric name twice fails."""
+        registry = Registry()
+        registry.counter("dup_total", "Dup.")
+        with pytest.raises(ValueError):
+            registry.counter("dup_total", "Dup.")
+
+class TestMetricsEndpoint:
+    """Test request instrumentation and the /metrics endpoint."""
+
+    def test_metrics_endpoint_format(self, client):
+        """Test /metrics returns Prometheus text format."""
+        response = client.get("/metrics")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert "# TYPE http_request_duration_seconds histogram" in response.text
+        assert "db_pool_checked_out_connections" in response.text
+
+    def test_requests_labelled_by_route_template(self, client, test_product):
+        """Test latency is recorded against the route template, not the raw path."""
+        route = "/products/{product_id}"
+        before = metrics.HTTP_REQUEST_DURATION.count(method="GET", route=route)
+        client.get(f"/products/{test_product.id}")
+        client.get("/products/999")
+        assert metrics.HTTP_REQUEST_DURATION.count(method="GET", route=route) == before + 2
+        assert metrics.HTTP_REQUESTS.value(method="GET", route=route, status="404") >= 1
+        assert f'route="/products/{test_product.id}"' not in client.get("/metrics").text
+
+    def test_sql_statements_counted_per_request(self, client, test_product):
+        """Test SQL statements issued by a handler are attributed to its route."""
+        route = "/products/{product_id}"
+        before = metrics.DB_STATEMENTS_PER_REQUEST.sum(route=route)
+        client.get(f"/products/{test_product.id}")
+        assert metrics.DB_STATEMENTS_PER_REQUEST.sum(route=route) >= before + 1
+
+    def test_password_hash_latency_recorded(self, client):
+        """Test bcrypt calls made during registration are timed."""
+        before = metrics.PASSWORD_HASH_DURATION.count(operation="hash")
+        client.post("/users/register", json={
+            "username": "metrics",
+            "email": "metrics@example.com",
+            "password": "password123"
+        })
+        assert metrics.PASSWORD_HASH_DURATION.count(operation="hash") == before + 1
+
+    def test_unmatched_paths_share_one_label(self, client):
+        """Test unknown paths do not create a label per raw path."""
+        client.get("/does-not-exist/123")
+        text = client.get("/metrics").text
+        assert 'route="unmatched"' in text
+        assert "/does-not-exist/123" not in text
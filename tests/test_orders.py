@@ -1,6 +1,8 @@
 import pytest
+from datetime import datetime, timedelta
 from unittest.mock import patch, MagicMock
 from fastapi import status
+from app import models
 
 class TestOrderCheckout:
     """Test order checkout functionality."""
@@ -21,6 +23,7 @@ class TestOrderCheckout:
         """Test successful checkout with items in cart."""
         # Mock Stripe response
         mock_session = MagicMock()
+        mock_session.id = "cs_test_1"
         mock_session.url = "https://checkout.stripe.com/test"
         mock_stripe_create.return_value = mock_session
         
@@ -125,6 +128,7 @@ class TestOrderCheckout:
         
         # Mock Stripe response
         mock_session = MagicMock()
+        mock_session.id = "cs_test_1"
         mock_session.url = "https://checkout.stripe.com/test"
         mock_stripe_create.return_value = mock_session
         
@@ -146,48 +150,77 @@ class TestOrderCheckout:
         call_args = mock_stripe_create.call_args
         assert len(call_args[1]["line_items"]) == 3
 
+def _stripe_session(session_id="cs_test_1", payment_status="paid", email="customer@example.com"):
+    session = MagicMock()
+    session.id = session_id
+    session.url = "https://checkout.stripe.com/test"
+    session.payment_status = payment_status
+    session.customer_details = MagicMock(email=email) if email else None
+    return session
+
+def _checkout(client, headers, session):
+    with patch("stripe.checkout.Session.create", return_value=session):
+        return client.post("/orders/checkout", headers=headers)
+
+def _confirm(client, session):
+    with patch("stripe.checkout.Session.retrieve", return_value=session) as retrieve:
+        response = client.get(f"/orders/success?session_id={session.id}")
+    retrieve.assert_called_once_with(session.id)
+    return response
+
 class TestPaymentSuccess:
     """Test payment success endpoint."""
-    
-    @patch('stripe.checkout.Session.retrieve')
-    def test_payment_success(self, mock_stripe_retrieve):
-        """Test payment success endpoint."""
-        # Mock Stripe session
-        mock_session = MagicMock()
-        mock_customer_details = MagicMock()
-        mock_customer_details.email = "customer@example.com"
-        mock_session.customer_details = mock_customer_details
-        mock_stripe_retrieve.return_value = mock_session
-        
-        # This would normally be called by the frontend after Stripe redirect
-        # We'll test it directly
-        from fastapi.testclient import TestClient
-        from app.main import app
-        
-        with TestClient(app) as client:
-            response = client.get("/orders/success?session_id=test_session_id")
-            assert response.status_code == status.HTTP_200_OK
-            data = response.json()
-            assert "Payment successful" in data["message"]
-            assert data["email"] == "customer@example.com"
-    
-    @patch('stripe.checkout.Session.retrieve')
-    def test_payment_success_no_customer_email(self, mock_stripe_retrieve):
+
+    @pytest.fixture
+    def checked_out(self, client, db_session, test_product, auth_headers):
+        """A checkout of two units of the test product, not yet paid."""
+        client.post("/cart/add", json={"product_id": test_product.id, "quantity": 2}, headers=auth_headers)
+        session = _stripe_session()
+        assert _checkout(client, auth_headers, session).json()["session_id"] == session.id
+        return session
+
+    def test_checkout_records_no_order(self, db_session, checked_out):
+        """Test nothing is ordered until the payment is confirmed."""
+        assert db_session.query(models.Order).count() == 0
+        assert db_session.get(models.CheckoutSession, checked_out.id).total_price == 199.98
+
+    def test_payment_success(self, client, db_session, auth_headers, test_product, checked_out):
+        """Test a paid session becomes an order and leaves the cart."""
+        response = _confirm(client, checked_out)
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert "Payment successful" in data["message"]
+        assert data["email"] == "customer@example.com"
+        order = db_session.get(models.Order, data["order_id"])
+        assert (order.stripe_session_id, order.total_price) == (checked_out.id, 199.98)
+        assert [(item.product_id, item.quantity, item.price) for item in order.items] == [(test_product.id, 2, 99.99)]
+        assert db_session.get(models.CheckoutSession, checked_out.id) is None
+        assert client.get("/cart/", headers=auth_headers).json() == []
+
+    def test_payment_success_no_customer_email(self, client, checked_out):
         """Test payment success when customer email is not available."""
-        # Mock Stripe session without customer details
-        mock_session = MagicMock()
-        mock_session.customer_details = None
-        mock_stripe_retrieve.return_value = mock_session
-        
-        from fastapi.testclient import TestClient
-        from app.main import app
-        
-        with TestClient(app) as client:
-            response = client.get("/orders/success?session_id=test_session_id")
-            assert response.status_code == status.HTTP_200_OK
-            data = response.json()
-            assert "Payment successful" in data["message"]
-            assert data["email"] is None
+        checked_out.customer_details = None
+        response = _confirm(client, checked_out)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["email"] is None
+
+    def test_repeated_confirmation_records_one_order(self, client, db_session, checked_out):
+        """Test reloading the success page returns the same order."""
+        first = _confirm(client, checked_out).json()["order_id"]
+        assert _confirm(client, checked_out).json()["order_id"] == first
+        assert db_session.query(models.Order).count() == 1
+        assert db_session.query(models.Job).count() == 1
+
+    def test_unpaid_session(self, client, db_session, checked_out):
+        """Test an unpaid session is not recorded."""
+        checked_out.payment_status = "unpaid"
+        assert _confirm(client, checked_out).status_code == status.HTTP_402_PAYMENT_REQUIRED
+        assert db_session.query(models.Order).count() == 0
+
+    def test_unknown_session(self, client):
+        """Test a paid session that was not checked out here is not found."""
+        response = _confirm(client, _stripe_session("cs_unknown"))
+        assert response.status_code == status.HTTP_404_NOT_FOUND
 
 class TestPaymentCancel:
     """Test payment cancel endpoint."""
@@ -211,6 +244,7 @@ class TestOrderIntegration:
         """Test complete order flow from cart to checkout."""
         # Mock Stripe response
         mock_session = MagicMock()
+        mock_session.id = "cs_test_1"
         mock_session.url = "https://checkout.stripe.com/test"
         mock_stripe_create.return_value = mock_session
         
@@ -258,3 +292,90 @@ class TestOrderIntegration:
         # Note: In a real application, you'd want to clear the cart after successful checkout
         # For now, we're just testing that the checkout process works
         # The cart clearing would be handled in the success callback
+
+@pytest.fixture
+def order_history(db_session, test_user, test_admin, test_product):
+    """Five orders for the test user (one item each, oldest first) and one for the admin."""
+    start = datetime(2024, 1, 1)
+    orders = []
+    for i in range(5):
+        order = models.Order(user_id=test_user.id, total_price=10.0 * (i + 1), created_at=start + timedelta(days=i))
+        order.items = [models.OrderItem(product_id=test_product.id, quantity=i + 1, price=10.0)]
+        orders.append(order)
+    other = models.Order(user_id=test_admin.id, total_price=1.0, created_at=start)
+    db_session.add_all([*orders, other])
+    db_session.commit()
+    return orders, other
+
+class TestOrderHistory:
+    """Test listing and fetching the user's orders."""
+
+    def test_unauthorized(self, client):
+        """Test order history requires a login."""
+        assert client.get("/orders/").status_code in (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN)
+
+    def test_newest_first_with_items(self, client, auth_headers, order_history, test_product):
+        """Test a page lists only the user's orders, newest first, with products."""
+        orders, _ = order_history
+        data = client.get("/orders/", headers=auth_headers).json()
+        assert [order["id"] for order in data["items"]] == [order.id for order in reversed(orders)]
+        assert data["next_cursor"] is None
+        item = data["items"][0]["items"][0]
+        assert (item["quantity"], item["product"]["name"]) == (5, test_product.name)
+
+    def test_cursor_pages(self, client, auth_headers, order_history):
+        """Test following next_cursor walks every order exactly once."""
+        orders, _ = order_history
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            data = client.get("/orders/", params=params, headers=auth_headers).json()
+            assert len(data["items"]) <= 2
+            seen += [order["id"] for order in data["items"]]
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+        assert seen == [order.id for order in reversed(orders)]
+
+    def test_same_timestamp_ties(self, client, db_session, auth_headers, order_history):
+        """Test orders sharing created_at are split across pages by id."""
+        orders, _ = order_history
+        for order in orders:
+            order.created_at = orders[0].created_at
+        db_session.commit()
+        first = client.get("/orders/?limit=3", headers=auth_headers).json()
+        second = client.get(f"/orders/?limit=3&cursor={first['next_cursor']}", headers=auth_headers).json()
+        ids = [order["id"] for order in first["items"] + second["items"]]
+        assert ids == sorted((order.id for order in orders), reverse=True)
+
+    def test_summary_skips_items(self, client, auth_headers, order_history):
+        """Test summary mode returns order totals without line items."""
+        data = client.get("/orders/?summary=true&limit=1", headers=auth_headers).json()
+        assert set(data["items"][0]) == {"id", "total_price", "created_at"}
+        assert data["items"][0]["total_price"] == 50.0
+        assert data["next_cursor"]
+
+    def test_invalid_cursor(self, client, auth_headers):
+        """Test a malformed cursor is rejected."""
+        response = client.get("/orders/?cursor=not-a-cursor", headers=auth_headers)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_get_order(self, client, auth_headers, order_history):
+        """Test fetching one of the user's orders with its items."""
+        order = order_history[0][1]
+        data = client.get(f"/orders/{order.id}", headers=auth_headers).json()
+        assert (data["id"], data["total_price"], len(data["items"])) == (order.id, 20.0, 1)
+
+    def test_other_users_order_not_found(self, client, auth_headers, order_history):
+        """Test another user's order is indistinguishable from a missing one."""
+        _, other = order_history
+        assert client.get(f"/orders/{other.id}", headers=auth_headers).status_code == status.HTTP_404_NOT_FOUND
+        assert client.get("/orders/999999", headers=auth_headers).status_code == status.HTTP_404_NOT_FOUND
+
+    def test_deleted_product(self, client, db_session, auth_headers, order_history, test_product):
+        """Test items of deleted products keep their charged price with no product."""
+        order = order_history[0][0]
+        db_session.delete(test_product)
+        db_session.commit()
+        item = client.get(f"/orders/{order.id}", headers=auth_headers).json()["items"][0]
+        assert (item["price"], item["product"]) == (10.0, None)
@@ -0,0 +1,157 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from fastapi import status
+from app import models
+from app.counters import CounterBuffer, StatsFlusher, product_counters
+
+def _stats(db_session, product_id):
+    db_session.expire_all()
+    return db_session.get(models.ProductStats, product_id)
+
+@pytest.fixture
+def products(db_session):
+    """Three products to rank."""
+    items = [
+        models.Product(name=f"Ranked {i}", description="Ranked", price=1.0 + i, quantity=10)
+        for i in range(3)
+    ]
+    db_session.add_all(items)
+    db_session.commit()
+    return items
+
+class TestCounterBuffer:
+    """Test buffering and flushing of product events."""
+
+    def test_flush_adds_to_existing_rows(self, db_session, products):
+        """Test successive flushes accumulate instead of overwriting."""
+        buffer = CounterBuffer()
+        for _ in range(3):
+            buffer.record(products[0].id, "views")
+        buffer.record(products[0].id, "cart_adds", 2)
+        assert buffer.flush(db_session) == 1
+        buffer.record(products[0].id, "views")
+        buffer.record(products[0].id, "purchases")
+        buffer.flush(db_session)
+        stats = _stats(db_session, products[0].id)
+        assert (stats.views, stats.cart_adds, stats.purchases) == (4, 2, 1)
+        assert stats.popularity == 4 * 1 + 2 * 5 + 1 * 20
+        assert buffer.pending() == {}
+
+    def test_flush_is_one_batched_upsert(self, db_session, products):
+        """Test a flush is one existence check plus one upsert, whatever the product count."""
+        buffer = CounterBuffer()
+        for product in products:
+            buffer.record(product.id, "views")
+        with patch.object(db_session, "execute", wraps=db_session.execute) as execute:
+            assert buffer.flush(db_session) == 3
+        assert execute.call_count == 2
+
+    def test_failed_flush_keeps_counts(self, products):
+        """Test counts survive a database error and are written later."""
+        buffer = CounterBuffer()
+        buffer.record(products[0].id, "views", 5)
+        db = MagicMock()
+        db.query.side_effect = RuntimeError("database is locked")
+        with pytest.raises(RuntimeError):
+            buffer.flush(db)
+        buffer.record(products[0].id, "views")
+        assert buffer.pending()[products[0].id]["views"] == 6
+
+    def test_deleted_products_are_skipped(self, db_session, products):
+        """Test events for products deleted before the flush are dropped."""
+        buffer = CounterBuffer()
+        buffer.record(products[0].id, "views")
+        buffer.record(999, "views")
+        assert buffer.flush(db_session) == 1
+        assert _stats(db_session, 999) is None
+
+    def test_unknown_event(self):
+        """Test recording an unknown event type fails loudly."""
+        with pytest.raises(ValueError):
+            CounterBuffer().record(1, "likes")
+
+    def test_flusher_stop_writes_remaining(self, db_session, products):
+        """Test stopping the flusher writes what is still buffered."""
+        buffer = CounterBuffer()
+        buffer.record(products[1].id, "views")
+
+        def get_db():
+            yield db_session
+
+        flusher = StatsFlusher(buffer, get_db, interval=60)
+        flusher.start()
+        flusher.stop()
+        assert _stats(db_session, products[1].id).views == 1
+
+class TestProductEvents:
+    """Test routes record events without writing counters."""
+
+    def test_views_include_cache_hits(self, client, products, query_log):
+        """Test every product view is counted, cached or not, with no extra SQL."""
+        client.get(f"/products/{products[0].id}")
+        client.get(f"/products/{products[0].id}")
+        assert product_counters.pending()[products[0].id]["views"] == 2
+        assert [stats.statement_count for stats in query_log] == [1, 0]
+
+    def test_missing_product_not_counted(self, client):
+        """Test 404s do not create counters."""
+        client.get("/products/999")
+        assert product_counters.pending() == {}
+
+    def test_cart_adds_and_purchases(self, client, products, auth_headers):
+        """Test add-to-cart counts units and only a paid checkout counts purchased units."""
+        client.post("/cart/add", json={"product_id": products[1].id, "quantity": 3}, headers=auth_headers)
+        session = MagicMock()
+        session.id = "cs_test_1"
+        session.url = "https://checkout.stripe.com/test"
+        session.payment_status = "paid"
+        with patch("stripe.checkout.Session.create", return_value=session):
+            client.post("/orders/checkout", headers=auth_headers)
+        assert product_counters.pending()[products[1].id]["purchases"] == 0
+        with patch("stripe.checkout.Session.retrieve", return_value=session):
+            client.get(f"/orders/success?session_id={session.id}")
+            client.get(f"/orders/success?session_id={session.id}")
+        counts = product_counters.pending()[products[1].id]
+        assert (counts["cart_adds"], counts["purchases"]) == (3, 3)
+
+class TestPopularSort:
+    """Test ranking products by popularity."""
+
+    def test_sort_popular(self, client, db_session, products):
+        """Test products are ranked by weighted activity; inactive ones are omitted."""
+        for _ in range(4):
+            client.get(f"/products/{products[0].id}")
+        client.get(f"/products/{products[2].id}")
+        product_counters.record(products[2].id, "purchases")
+        product_counters.flush(db_session)
+
+        response = client.get("/products/popular")
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert [item["id"] for item in data] == [products[2].id, products[0].id]
+        assert data[0]["popularity"] == 21
+        assert data[1]["views"] == 4
+
+    def test_sort_popular_limit(self, client, db_session, products, query_log):
+        """Test the ranking is cut off at ``limit`` in a single statement."""
+        for product in products:
+            product_counters.record(product.id, "views")
+        product_counters.flush(db_session)
+        response = client.get("/products/popular?limit=2")
+        assert len(response.json()) == 2
+        (stats,) = query_log
+        assert stats.statement_count == 1
+
+    def test_popular_offset(self, client, db_session, products):
+        """Test later pages continue the ranking."""
+        for weight, product in enumerate(products, 1):
+            product_counters.record(product.id, "views", weight)
+        product_counters.flush(db_session)
+        data = client.get("/products/popular?limit=2&offset=1").json()
+        assert [item["id"] for item in data] == [products[1].id, products[0].id]
+
+    def test_unsorted_listing_unchanged(self, client, products):
+        """Test the default listing still returns plain products."""
+        data = client.get("/products/").json()
+        assert len(data) == 3
+        assert "popularity" not in data[0]
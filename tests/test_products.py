@@ -19,6 +19,19 @@ class TestProductListing:
         assert data[0]["name"] == "Test Product"
         assert data[0]["price"] == 99.99
         assert data[0]["quantity"] == 10
+
+    def test_list_products_pages(self, client, db_session):
+        """Test the listing is bounded by ``limit`` and continues after the last id."""
+        from app import models
+        db_session.add_all([
+            models.Product(name=f"Page {i}", description="Page", price=1.0, quantity=1) for i in range(5)
+        ])
+        db_session.commit()
+        first = client.get("/products/?limit=2").json()
+        second = client.get(f"/products/?limit=2&after={first[-1]['id']}").json()
+        rest = client.get(f"/products/?after={second[-1]['id']}").json()
+        assert [p["name"] for p in first + second + rest] == [f"Page {i}" for i in range(5)]
+        assert client.get("/products/?limit=101").status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
     
     def test_get_product_by_id_success(self, client, test_product):
         """Test getting a specific product by ID."""
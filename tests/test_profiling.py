@@ -0,0 +1,150 @@
+import io
+import marshal
+import pstats
+import threading
+import time
+import anyio
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from starlette.responses import PlainTextResponse
+from app.monitoring.profiling import Profile, ProfilingMiddleware, StackSampler, _active_sampler, profile_store
+
+@pytest.fixture(autouse=True)
+def clear_profiles():
+    """Start every test with an empty profile store."""
+    profile_store.clear()
+    yield
+    profile_store.clear()
+
+def _login(client, headers, params=None):
+    return client.post(
+        "/users/login",
+        json={"email": "admin@example.com", "password": "adminpassword"},
+        headers=headers,
+        params=params,
+    )
+
+class TestProfileTriggers:
+    """Test which requests get profiled."""
+
+    def test_unprofiled_by_default(self, client, test_product):
+        """Test requests without the trigger are not profiled."""
+        response = client.get(f"/products/{test_product.id}")
+        assert "x-profile-id" not in response.headers
+        assert profile_store.list() == []
+
+    def test_admin_header_triggers_profile(self, client, admin_headers):
+        """Test an admin sending X-Profile gets a stored profile."""
+        response = _login(client, {**admin_headers, "X-Profile": "1"})
+        assert response.status_code == status.HTTP_200_OK
+        profile_id = response.headers["x-profile-id"]
+        summary = profile_store.get(profile_id).summary()
+        assert summary["route"] == "/users/login"
+        assert summary["trigger"] == "requested"
+        assert summary["sample_count"] > 0
+
+    def test_admin_query_flag_triggers_profile(self, client, admin_headers):
+        """Test the ?_profile=1 query flag works like the header."""
+        response = _login(client, admin_headers, params={"_profile": "1"})
+        assert "x-profile-id" in response.headers
+
+    def test_non_admin_header_ignored(self, client, auth_headers):
+        """Test regular users cannot trigger profiling."""
+        response = client.get("/users/me", headers={**auth_headers, "X-Profile": "1"})
+        assert response.status_code == status.HTTP_200_OK
+        assert "x-profile-id" not in response.headers
+        assert profile_store.list() == []
+
+    def test_sampled_profiling(self):
+        """Test the sampler profiles requests at the configured rate."""
+        store = type(profile_store)(max_items=5)
+        app = ProfilingMiddleware(PlainTextResponse("ok"), sample_rate=1.0, store=store)
+        response = TestClient(app).get("/anything")
+        assert store.get(response.headers["x-profile-id"]).trigger == "sampled"
+
+class TestProfileDownloads:
+    """Test the admin profile endpoints."""
+
+    def test_list_profiles_admin_only(self, client, auth_headers):
+        """Test regular users cannot list profiles."""
+        response = client.get("/admin/profiles", headers=auth_headers)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_collapsed_and_pstats_downloads(self, client, admin_headers):
+        """Test a profile can be fetched in both formats."""
+        profile_id = _login(client, {**admin_headers, "X-Profile": "1"}).headers["x-profile-id"]
+
+        listing = client.get("/admin/profiles", headers=admin_headers).json()
+        assert [p["id"] for p in listing] == [profile_id]
+
+        collapsed = client.get(f"/admin/profiles/{profile_id}", headers=admin_headers)
+        assert collapsed.status_code == status.HTTP_200_OK
+        first_line = collapsed.text.splitlines()[0]
+        stack, count = first_line.rsplit(" ", 1)
+        assert int(count) > 0
+        assert "login_user (users.py:" in collapsed.text
+
+        dump = client.get(f"/admin/profiles/{profile_id}?format=pstats", headers=admin_headers)
+        assert dump.status_code == status.HTTP_200_OK
+        stats = pstats.Stats(_StatsSource(dump.content), stream=io.StringIO())
+        assert any(name == "login_user" for _, _, name in stats.stats)
+
+    def test_unknown_profile(self, client, admin_headers):
+        """Test fetching a missing profile returns 404."""
+        response = client.get("/admin/profiles/nope", headers=admin_headers)
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_store_is_bounded(self):
+        """Test the store evicts the oldest profiles."""
+        store = type(profile_store)(max_items=2)
+        profiles = [Profile("GET", "/", "sampled", 0.001) for _ in range(3)]
+        for profile in profiles:
+            store.add(profile)
+        assert [p.id for p in store.list()] == [profiles[2].id, profiles[1].id]
+
+class _StatsSource:
+    """Adapter letting pstats.Stats load a marshalled dump from memory."""
+
+    def __init__(self, data):
+        self.stats = marshal.loads(data)
+
+    def create_stats(self):
+        pass
+
+class TestSamplerIsolation:
+    """Test a profile only holds the profiled request's stacks."""
+
+    def test_other_threads_not_sampled(self):
+        """Test a concurrent thread outside the request's context is never sampled."""
+        def spin(seconds):
+            deadline = time.perf_counter() + seconds
+            while time.perf_counter() < deadline:
+                pass
+
+        def request_work():
+            spin(0.1)
+
+        def other_request_work(stop):
+            while not stop.is_set():
+                spin(0.01)
+
+        sampler = StackSampler(0.001)
+        stop = threading.Event()
+        other = threading.Thread(target=other_request_work, args=(stop,))
+        other.start()
+
+        async def profiled_request():
+            _active_sampler.set(sampler)
+            sampler.start()
+            await anyio.to_thread.run_sync(request_work)
+            sampler.stop()
+
+        try:
+            anyio.run(profiled_request)
+        finally:
+            stop.set()
+            other.join()
+        names = {name for stack in sampler.samples for _, _, name in stack}
+        assert "request_work" in names
+        assert "other_request_work" not in names
@@ -0,0 +1,172 @@
+import importlib
+import pkgutil
+import re
+import threading
+import time
+import pytest
+from unittest.mock import patch, MagicMock
+import app.routes
+from app import models
+from app.counters import product_counters
+from app.stream import stock_updates
+
+# Tables expected to hold many rows in production. A filtered or joined
+# statement that has to SCAN one of them (instead of SEARCH through an index)
+# gets slower with every row added.
+LARGE_TABLES = {"users", "products", "cart_items", "orders", "order_items"}
+
+_SCAN = re.compile(r"^SCAN (\w+)(?: AS (\w+))?$")
+_FILTERED = re.compile(r"\b(WHERE|JOIN)\b", re.IGNORECASE)
+_ALIAS_SUFFIX = re.compile(r"_\d+$")
+
+
+def _all_routes():
+    """Every (method, path) served by a module in app/routes."""
+    routes = set()
+    for module_info in pkgutil.iter_modules(app.routes.__path__):
+        module = importlib.import_module(f"app.routes.{module_info.name}")
+        for route in module.router.routes:
+            routes.update((method, route.path) for method in route.methods)
+    return routes
+
+
+def _full_scans(connection, statement, parameters):
+    """Large tables read with a full scan by a filtered/joined statement."""
+    if not statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+        return []
+    if not _FILTERED.search(statement):
+        # Unfiltered listings read the whole table by definition.
+        return []
+    if isinstance(parameters, list) and parameters and isinstance(parameters[0], (tuple, list)):
+        parameters = parameters[0]
+    plan = connection.exec_driver_sql(
+        "EXPLAIN QUERY PLAN " + statement, tuple(parameters or ())
+    ).fetchall()
+    scans = []
+    for row in plan:
+        match = _SCAN.match(row[-1])
+        if match:
+            table = _ALIAS_SUFFIX.sub("", match.group(1))
+            if table in LARGE_TABLES:
+                scans.append(row[-1])
+    return scans
+
+
+@pytest.fixture
+def catalog(db_session, test_user, test_admin):
+    """Products plus a cart so every route has rows to work on."""
+    products = [
+        models.Product(name=f"Plan Product {i}", description="Plan", price=10.0 + i, quantity=50)
+        for i in range(5)
+    ]
+    db_session.add_all(products)
+    db_session.commit()
+    db_session.add_all([
+        models.CartItem(user_id=test_user.id, product_id=products[0].id, quantity=1),
+        models.CartItem(user_id=test_admin.id, product_id=products[1].id, quantity=2),
+    ])
+    db_session.commit()
+    return products
+
+
+def _exercise_routes(client, db_session, auth_headers, admin_headers, products):
+    """One call per route in app/routes; keep in sync when adding endpoints."""
+    product = products[2]
+    client.get("/products/")
+    client.get(f"/products/{product.id}")
+    product_counters.record(product.id, "views")
+    product_counters.flush(db_session)
+    client.get("/products/popular")
+    client.get(f"/products/?after={product.id}")
+    client.get(f"/products/{product.id}/related")
+    client.get("/products/search?price=0-25&price=25-50&in_stock=true&sort=price_asc")
+    client.get("/products/autocomplete?prefix=qp")
+    client.get("/products/fuzzy?q=plam")
+    # The stream only ends when closed: read it from a thread.
+    stream = threading.Thread(target=client.get, args=(f"/products/stream?ids={product.id}",))
+    stream.start()
+    while not stock_updates.subscriber_count() and stream.is_alive():
+        time.sleep(0.01)
+    stock_updates.close()
+    stream.join(5)
+    client.post("/products/", json={
+        "name": "Plan New", "description": "d", "price": 1.0, "quantity": 1,
+    }, headers=auth_headers)
+    client.delete(f"/products/{products[4].id}", headers=auth_headers)
+
+    client.post("/users/register", json={
+        "username": "planner", "email": "planner@example.com", "password": "password123",
+    })
+    client.post("/users/login", json={"email": "test@example.com", "password": "testpassword"})
+    client.get("/users/me", headers=auth_headers)
+
+    client.post("/cart/add", json={"product_id": product.id, "quantity": 1}, headers=auth_headers)
+    client.get("/cart/", headers=auth_headers)
+
+    sessions = [
+        MagicMock(id=f"cs_plan_{i}", url="https://checkout.stripe.com/test", payment_status="paid",
+                  customer_details=None)
+        for i in range(2)
+    ]
+    # Twice (recorded on payment), so order history has a second page.
+    for session in sessions:
+        client.post("/cart/add", json={"product_id": product.id, "quantity": 1}, headers=auth_headers)
+        with patch("stripe.checkout.Session.create", return_value=session), \
+                patch("stripe.checkout.Session.retrieve", return_value=session):
+            client.post("/orders/checkout", headers=auth_headers)
+            client.get(f"/orders/success?session_id={session.id}")
+    client.get("/orders/cancel")
+    orders = client.get("/orders/?limit=1", headers=auth_headers).json()
+    client.get(f"/orders/?cursor={orders['next_cursor']}&summary=true", headers=auth_headers)
+    client.get(f"/orders/{orders['items'][0]['id']}", headers=auth_headers)
+    client.delete(f"/cart/{product.id}", headers=auth_headers)
+
+    client.get("/admin/products", headers=admin_headers)
+    client.get("/admin/analytics/sales", headers=admin_headers)
+    client.get("/admin/orders/export?from=2000-01-01&to=2100-01-01", headers=admin_headers)
+    client.get("/admin/inventory/low-stock", headers=admin_headers)
+    client.get("/admin/inventory/cart-demand", headers=admin_headers)
+    job = client.post("/admin/recommendations/refresh", headers=admin_headers).json()
+    client.get("/admin/jobs?status=queued", headers=admin_headers)
+    client.post(f"/admin/jobs/{job['id']}/retry", headers=admin_headers)
+    client.post("/admin/products", json={
+        "name": "Plan Admin", "description": "d", "price": 2.0, "quantity": 2,
+    }, headers=admin_headers)
+    client.put(f"/admin/products/{products[3].id}", json={"price": 3.0}, headers=admin_headers)
+    client.delete(f"/admin/products/{products[3].id}", headers=admin_headers)
+
+    client.get("/metrics")
+    client.get("/admin/profiles", headers=admin_headers)
+    client.get("/admin/profiles/missing", headers=admin_headers)
+    client.delete("/admin/profiles", headers=admin_headers)
+    client.get("/admin/memory", headers=admin_headers)
+    client.get("/admin/memory/top", headers=admin_headers)
+    client.post("/admin/memory/snapshots", headers=admin_headers)
+    client.get("/admin/memory/snapshots", headers=admin_headers)
+    client.get("/admin/memory/snapshots/a/diff/b", headers=admin_headers)
+
+    # Last: these invalidate the tokens used above.
+    client.post("/users/logout-all", headers=auth_headers)
+    client.post("/users/logout", headers=admin_headers)
+
+
+class TestQueryPlans:
+    """EXPLAIN QUERY PLAN every statement the routes issue."""
+
+    def test_no_full_scans_of_large_tables(
+        self, client, db_session, auth_headers, admin_headers, catalog, query_log
+    ):
+        """Test filtered statements are served by indexes, not full table scans."""
+        _exercise_routes(client, db_session, auth_headers, admin_headers, catalog)
+
+        exercised = {(stats.method, stats.route) for stats in query_log}
+        missing = _all_routes() - exercised
+        assert not missing, f"Routes not exercised by the query plan test: {sorted(missing)}"
+
+        connection = db_session.connection()
+        offenders = []
+        for stats in query_log:
+            for statement, parameters in stats.statements:
+                for scan in _full_scans(connection, statement, parameters):
+                    offenders.append(f"{stats.method} {stats.route}: {scan}\n    {statement}")
+        assert not offenders, "Full scans of large tables:\n" + "\n".join(offenders)
@@ -0,0 +1,123 @@
+from unittest.mock import patch
+import pytest
+from fastapi import status
+from app.cache import CacheBackend, CacheError, FakeCacheServer, InMemoryCache
+from app.config import Settings
+from app.main import app
+from app.ratelimit import RateLimit, RateLimiter
+
+class UnreachableBackend(CacheBackend):
+    def consume_tokens(self, key, capacity, refill_per_second, cost=1.0):
+        raise CacheError("connection refused")
+
+@pytest.fixture
+def limits(client):
+    """Install a limiter with the given limits for the duration of the test."""
+    original = app.state.rate_limiter
+
+    def install(**specs):
+        app.state.rate_limiter = RateLimiter(
+            InMemoryCache(), limits={name.replace("_", "."): spec for name, spec in specs.items()}
+        )
+        return app.state.rate_limiter
+
+    yield install
+    app.state.rate_limiter = original
+
+def _login(client, email, password="wrongpassword"):
+    return client.post("/users/login", json={"email": email, "password": password})
+
+class TestLoginRateLimit:
+    """Test token buckets on /users/login."""
+
+    def test_per_email_limit(self, client, test_user, limits):
+        """Test repeated attempts on one email are rejected with Retry-After."""
+        limits(login_email="3/60")
+        for _ in range(3):
+            assert _login(client, test_user.email).status_code == status.HTTP_400_BAD_REQUEST
+        response = _login(client, test_user.email)
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert 1 <= int(response.headers["Retry-After"]) <= 20
+        # Other accounts are unaffected.
+        assert _login(client, "other@example.com").status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_per_ip_limit(self, client, limits):
+        """Test one client cycling through emails hits the IP bucket."""
+        limits(login_ip="2/60")
+        assert _login(client, "a@example.com").status_code == status.HTTP_400_BAD_REQUEST
+        assert _login(client, "b@example.com").status_code == status.HTTP_400_BAD_REQUEST
+        assert _login(client, "c@example.com").status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    def test_rejected_before_bcrypt(self, client, test_user, limits):
+        """Test over-limit requests never reach password verification."""
+        limits(login_email="1/60")
+        _login(client, test_user.email)
+        with patch("app.routes.users.verify_password") as verify:
+            response = _login(client, test_user.email)
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        verify.assert_not_called()
+
+    def test_email_is_normalized(self, client, test_user, limits):
+        """Test case and whitespace variants share a bucket."""
+        limits(login_email="1/60")
+        _login(client, test_user.email)
+        response = _login(client, f"  {test_user.email.upper()} ")
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+class TestRegisterRateLimit:
+    """Test token buckets on /users/register."""
+
+    def test_register_limited_before_hashing(self, client, limits):
+        """Test over-limit registrations never hash a password."""
+        limits(register_ip="1/60")
+        user = {"username": "new", "email": "new@example.com", "password": "secret123"}
+        assert client.post("/users/register", json=user).status_code == status.HTTP_200_OK
+        with patch("app.routes.users.hash_password") as hash_password:
+            response = client.post("/users/register", json=dict(user, email="new2@example.com"))
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        hash_password.assert_not_called()
+
+class TestRateLimiter:
+    """Test the limiter independent of routes."""
+
+    def test_shared_store_spans_workers(self):
+        """Test limiters on one shared store draw from the same bucket."""
+        server = FakeCacheServer()
+        first = RateLimiter(server.client(), limits={"login.ip": "2/60"})
+        second = RateLimiter(server.client(), limits={"login.ip": "2/60"})
+        assert first.hit("login.ip", "10.0.0.1") == 0
+        assert second.hit("login.ip", "10.0.0.1") == 0
+        assert first.hit("login.ip", "10.0.0.1") > 0
+
+    def test_bucket_refills(self):
+        """Test tokens come back at the configured rate."""
+        clock = [0.0]
+        limiter = RateLimiter(InMemoryCache(clock=lambda: clock[0]), limits={"login.ip": "2/10"})
+        assert limiter.hit("login.ip", "ip") == limiter.hit("login.ip", "ip") == 0
+        assert limiter.hit("login.ip", "ip") == pytest.approx(5)
+        clock[0] = 5
+        assert limiter.hit("login.ip", "ip") == 0
+
+    def test_store_failure_allows_requests(self):
+        """Test an unreachable shared store fails open."""
+        limiter = RateLimiter(UnreachableBackend(), limits={"login.ip": "1/60"})
+        assert limiter.hit("login.ip", "ip") == limiter.hit("login.ip", "ip") == 0
+
+    def test_disabled(self):
+        """Test a disabled limiter never rejects."""
+        limiter = RateLimiter(InMemoryCache(), limits={"login.ip": "1/60"}, enabled=False)
+        assert limiter.hit("login.ip", "ip") == limiter.hit("login.ip", "ip") == 0
+
+    def test_invalid_limit(self):
+        """Test malformed limits are refused."""
+        with pytest.raises(ValueError):
+            RateLimit.parse("0/60")
+
+    def test_limits_from_environment(self, monkeypatch):
+        """Test RATE_LIMITS overrides individual limits."""
+        monkeypatch.setenv("RATE_LIMITS", "login.ip=100/60, register.email=1/86400")
+        settings = Settings.from_env(env_file=None)
+        assert settings.rate_limits == {"login.ip": "100/60", "register.email": "1/86400"}
+        limiter = RateLimiter(InMemoryCache(), limits=settings.rate_limits)
+        assert limiter.limits["login.ip"] == RateLimit(100, 60)
+        assert limiter.limits["login.email"] == RateLimit(5, 60)
@@ -0,0 +1,138 @@
+import sys
+from datetime import datetime
+from unittest.mock import patch
+import pytest
+from fastapi import status
+from sqlalchemy import select
+from app import models
+from app.database import Base, make_engine
+from app.recommendations import main, rebuild, update
+from app.seed_db import SeedConfig, generate
+
+@pytest.fixture
+def catalog(db_session):
+    """Four products and a user placing orders."""
+    user = models.User(username="buyer", email="buyer@example.com", hashed_password="x")
+    products = [
+        models.Product(name=f"Item {i}", description="Item", price=5.0, quantity=10)
+        for i in range(4)
+    ]
+    db_session.add(user)
+    db_session.add_all(products)
+    db_session.commit()
+    return user, products
+
+def _order(db_session, user, *products):
+    order = models.Order(user_id=user.id, total_price=0.0)
+    order.items = [
+        models.OrderItem(product_id=product.id, quantity=1, price=product.price)
+        for product in products
+    ]
+    db_session.add(order)
+    db_session.commit()
+    return order
+
+def _rankings(engine):
+    table = models.ProductRecommendation.__table__
+    with engine.connect() as conn:
+        return conn.execute(
+            select(table.c.product_id, table.c.rank, table.c.related_product_id, table.c.score)
+            .order_by(table.c.product_id, table.c.rank)
+        ).all()
+
+class TestCooccurrence:
+    """Test counting and ranking products bought together."""
+
+    def test_update_ranks_by_orders_together(self, db_session, catalog):
+        """Test related products are ranked by the number of shared orders."""
+        user, (a, b, c, d) = catalog
+        _order(db_session, user, a, b)
+        _order(db_session, user, a, b, c)
+        _order(db_session, user, a, c)
+        _order(db_session, user, a, d)
+        _order(db_session, user, a, b)
+        engine = db_session.get_bind()
+        assert update(engine)["orders"] == 5
+        top_for_a = [(related, score) for product, _, related, score in _rankings(engine) if product == a.id]
+        assert top_for_a == [(b.id, 3), (c.id, 2), (d.id, 1)]
+
+    def test_top_k_cut(self, db_session, catalog):
+        """Test only the top K related products are stored."""
+        user, (a, b, c, d) = catalog
+        _order(db_session, user, a, b, c, d)
+        engine = db_session.get_bind()
+        update(engine, top_k=2)
+        assert [related for product, _, related, _ in _rankings(engine) if product == a.id] == [b.id, c.id]
+
+    def test_update_is_incremental(self, db_session, catalog):
+        """Test a later update only reads new orders and matches a full rebuild."""
+        user, (a, b, c, d) = catalog
+        _order(db_session, user, a, b)
+        engine = db_session.get_bind()
+        update(engine)
+        _order(db_session, user, b, c)
+        assert update(engine) == {"orders": 1, "pairs": 2, "products": 2}
+        assert update(engine)["orders"] == 0
+        incremental = _rankings(engine)
+        rebuild(engine)
+        assert _rankings(engine) == incremental
+
+    def test_rebuild_without_numpy(self, db_session, catalog):
+        """Test rebuild falls back to the pure-Python path without NumPy/SciPy."""
+        user, (a, b, c, d) = catalog
+        _order(db_session, user, a, b, c)
+        _order(db_session, user, a, b)
+        engine = db_session.get_bind()
+        with patch.dict(sys.modules, {"numpy": None}):
+            rebuild(engine)
+        fallback = _rankings(engine)
+        pytest.importorskip("scipy")
+        rebuild(engine)
+        assert _rankings(engine) == fallback
+
+    def test_rebuild_matches_update_on_synthetic_history(self, tmp_path):
+        """Test the vectorized rebuild agrees with incremental updates."""
+        pytest.importorskip("scipy")
+        engine = make_engine(f"sqlite:///{tmp_path / 'orders.db'}")
+        Base.metadata.create_all(bind=engine)
+        generate(engine, SeedConfig(products=50, users=10, orders=300, seed=3,
+                                    history_end=datetime(2026, 1, 1)), log=lambda message: None)
+        update(engine, top_k=5)
+        incremental = _rankings(engine)
+        rebuild(engine, top_k=5)
+        assert _rankings(engine) == incremental
+        engine.dispose()
+
+    def test_cli(self, tmp_path, capsys):
+        """Test the command line entry point."""
+        url = f"sqlite:///{tmp_path / 'cli.db'}"
+        main(["rebuild", "--database-url", url])
+        main(["update", "--database-url", url])
+        assert "Recommendations update: 0 orders" in capsys.readouterr().out
+
+class TestRelatedEndpoint:
+    """Test serving precomputed recommendations."""
+
+    def test_related_products(self, client, db_session, catalog, query_log):
+        """Test related products are returned in rank order with a single query."""
+        user, (a, b, c, d) = catalog
+        _order(db_session, user, a, b)
+        _order(db_session, user, a, b, c)
+        update(db_session.get_bind())
+        response = client.get(f"/products/{a.id}/related")
+        assert response.status_code == status.HTTP_200_OK
+        assert [(item["id"], item["score"]) for item in response.json()] == [(b.id, 2), (c.id, 1)]
+        (stats,) = query_log
+        assert stats.statement_count == 1
+
+    def test_related_limit(self, client, db_session, catalog):
+        """Test ``limit`` caps the number of related products."""
+        user, (a, b, c, d) = catalog
+        _order(db_session, user, a, b, c, d)
+        update(db_session.get_bind())
+        assert len(client.get(f"/products/{a.id}/related?limit=1").json()) == 1
+
+    def test_no_recommendations(self, client, catalog):
+        """Test products without order history have no related products."""
+        _, products = catalog
+        assert client.get(f"/products/{products[0].id}/related").json() == []
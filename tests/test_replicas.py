@@ -0,0 +1,140 @@
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from app import database, models
+from app.auth.jwt_handler import create_access_token
+from app.config import Settings
+from app.database import Base, ReplicaSet, make_engine
+from app.main import create_app
+
+def _make_db(path, products=(), users=()):
+    engine = make_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for product_id, name in products:
+            conn.execute(models.Product.__table__.insert(), {
+                "id": product_id, "name": name, "description": name, "price": 10.0, "quantity": 5,
+            })
+        for user_id in users:
+            conn.execute(models.User.__table__.insert(), {
+                "id": user_id, "username": f"user{user_id}", "email": f"user{user_id}@example.com",
+                "hashed_password": "x", "is_admin": False,
+            })
+    engine.dispose()
+    return f"sqlite:///{path}"
+
+@pytest.fixture
+def restore_database():
+    """Put the module engine back and drop replicas after the test."""
+    original = database.SQLALCHEMY_DATABASE_URL
+    yield
+    database.configure_replicas()
+    database.configure_database(original)
+
+@pytest.fixture
+def primary_url(tmp_path):
+    return _make_db(tmp_path / "primary.db", products=[(1, "Primary Product")], users=[1, 2])
+
+@pytest.fixture
+def replica_url(tmp_path):
+    return _make_db(tmp_path / "replica.db", products=[(1, "Replica Product")], users=[1])
+
+def _client(primary_url, replicas, **settings):
+    app = create_app(Settings(database_url=primary_url, read_replica_urls=tuple(replicas), **settings))
+    return TestClient(app)
+
+def _headers(user_id):
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+
+class TestReadRouting:
+    """Test read-only routes are served from replicas."""
+
+    def test_reads_use_replica(self, primary_url, replica_url, restore_database):
+        """Test product reads come from the replica."""
+        with _client(primary_url, [replica_url]) as client:
+            assert client.get("/products/1").json()["name"] == "Replica Product"
+            assert [p["name"] for p in client.get("/products/").json()] == ["Replica Product"]
+
+    def test_without_replicas_reads_use_primary(self, primary_url, restore_database):
+        """Test reads hit the primary when no replica is configured."""
+        with _client(primary_url, []) as client:
+            assert client.get("/products/1").json()["name"] == "Primary Product"
+
+    def test_round_robin(self, tmp_path, primary_url, replica_url, restore_database):
+        """Test consecutive reads alternate between replicas."""
+        second = _make_db(tmp_path / "replica2.db", products=[(1, "Second Replica")])
+        with _client(primary_url, [replica_url, second]) as client:
+            names = {client.get("/products/").json()[0]["name"] for _ in range(4)}
+        assert names == {"Replica Product", "Second Replica"}
+
+    def test_unhealthy_replica_skipped(self, tmp_path, primary_url, replica_url, restore_database):
+        """Test a replica failing its health check is not used."""
+        broken = f"sqlite:///{tmp_path / 'missing' / 'replica.db'}"
+        with _client(primary_url, [broken, replica_url]) as client:
+            names = {client.get("/products/").json()[0]["name"] for _ in range(4)}
+        assert names == {"Replica Product"}
+
+    def test_all_replicas_down_falls_back_to_primary(self, tmp_path, primary_url, restore_database):
+        """Test reads go to the primary when no replica is healthy."""
+        broken = f"sqlite:///{tmp_path / 'missing' / 'replica.db'}"
+        with _client(primary_url, [broken]) as client:
+            assert client.get("/products/1").json()["name"] == "Primary Product"
+
+    def test_user_missing_on_replica_found_on_primary(self, primary_url, replica_url, restore_database):
+        """Test a user not yet replicated is loaded from the primary."""
+        with _client(primary_url, [replica_url]) as client:
+            response = client.get("/users/me", headers=_headers(2))
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["id"] == 2
+
+class TestReadYourWrites:
+    """Test a client's reads follow its own writes."""
+
+    def test_reads_after_write_use_primary(self, primary_url, replica_url, restore_database):
+        """Test the cart is read from the primary right after adding to it."""
+        with _client(primary_url, [replica_url]) as client:
+            headers = _headers(1)
+            assert client.get("/cart/", headers=headers).json() == []
+            client.post("/cart/add", json={"product_id": 1, "quantity": 2}, headers=headers)
+            cart = client.get("/cart/", headers=headers).json()
+            # Other clients keep reading the replica.
+            assert client.get("/products/1").json()["name"] == "Replica Product"
+        assert len(cart) == 1
+        assert cart[0]["quantity"] == 2
+
+    def test_window_expires(self, primary_url, replica_url, restore_database):
+        """Test reads return to the replica once the window has passed."""
+        with _client(primary_url, [replica_url], read_your_writes_seconds=0) as client:
+            headers = _headers(1)
+            client.post("/cart/add", json={"product_id": 1, "quantity": 2}, headers=headers)
+            assert client.get("/cart/", headers=headers).json() == []
+
+class TestReplicaSet:
+    """Test the replica set and read-only sessions directly."""
+
+    def test_choose_none_when_all_down(self, tmp_path):
+        """Test choose returns None when every replica is unhealthy."""
+        replicas = ReplicaSet([f"sqlite:///{tmp_path / 'missing' / 'r.db'}"])
+        assert replicas.choose() is None
+        replicas.dispose()
+
+    def test_marked_unhealthy_until_next_check(self, replica_url):
+        """Test a replica marked unhealthy is skipped until re-probed."""
+        replicas = ReplicaSet([replica_url], health_check_interval=3600)
+        engine = replicas.choose()
+        assert engine is not None
+        replicas.mark_unhealthy(engine)
+        assert replicas.choose() is None
+        replicas.health_check_interval = 0
+        assert replicas.choose() is engine
+        replicas.dispose()
+
+    def test_read_session_refuses_writes(self, replica_url):
+        """Test flushing a read-only session raises."""
+        engine = make_engine(replica_url)
+        session = database.readSessionLocal(bind=engine)
+        session.add(models.Product(name="Nope", description="", price=1.0, quantity=1))
+        with pytest.raises(RuntimeError):
+            session.flush()
+        session.close()
+        engine.dispose()
@@ -0,0 +1,87 @@
+import time
+import pytest
+from fastapi import status
+from app import models
+
+@pytest.fixture
+def catalog(db_session):
+    """Products across price buckets, some out of stock."""
+    products = [
+        models.Product(name=name, description=name, price=price, quantity=quantity)
+        for name, price, quantity in (
+            ("Sticker", 2.0, 100),
+            ("Mug", 12.0, 0),
+            ("Book", 30.0, 5),
+            ("Lamp", 45.0, 0),
+            ("Chair", 120.0, 3),
+            ("Desk", 650.0, 1),
+        )
+    ]
+    db_session.add_all(products)
+    db_session.commit()
+    return products
+
+def _facet(data, name):
+    return {item["value"]: item["count"] for item in data["facets"][name]}
+
+class TestSearchFacets:
+    """Test filtered listing with facet counts."""
+
+    def test_unfiltered(self, client, catalog):
+        """Test facet counts cover the whole catalog without filters."""
+        data = client.get("/products/search").json()
+        assert data["total"] == 6
+        assert _facet(data, "price") == {
+            "0-25": 2, "25-50": 2, "50-100": 0, "100-250": 1, "250-500": 0, "500+": 1,
+        }
+        assert _facet(data, "availability") == {"in_stock": 4, "out_of_stock": 2}
+
+    def test_facets_exclude_their_own_filter(self, client, catalog):
+        """Test each facet is counted with the other filter only."""
+        data = client.get("/products/search?price=0-25&price=25-50&in_stock=true").json()
+        assert data["total"] == 2
+        assert sorted(item["name"] for item in data["items"]) == ["Book", "Sticker"]
+        assert _facet(data, "price")["0-25"] == 1
+        assert _facet(data, "price")["500+"] == 1
+        assert _facet(data, "availability") == {"in_stock": 2, "out_of_stock": 2}
+
+    def test_sort_and_page(self, client, catalog):
+        """Test sorting and paging apply to the items, not the counts."""
+        data = client.get("/products/search?sort=price_desc&limit=2&offset=1").json()
+        assert [item["name"] for item in data["items"]] == ["Chair", "Lamp"]
+        assert data["total"] == 6
+
+    def test_newest_first(self, client, db_session):
+        """Test ``sort=newest`` orders by creation time, not by id."""
+        for name in ("Older", "Newer"):
+            db_session.add(models.Product(name=name, description=name, price=5.0, quantity=1))
+            db_session.commit()
+            time.sleep(0.01)
+        data = client.get("/products/search?sort=newest").json()
+        assert [item["name"] for item in data["items"]] == ["Newer", "Older"]
+
+    def test_out_of_stock_filter(self, client, catalog):
+        """Test ``in_stock=false`` lists only unavailable products."""
+        data = client.get("/products/search?in_stock=false").json()
+        assert sorted(item["name"] for item in data["items"]) == ["Lamp", "Mug"]
+
+    def test_unknown_bucket(self, client, catalog):
+        """Test unknown price buckets are rejected."""
+        response = client.get("/products/search?price=1-2")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_fixed_statement_count(self, client, catalog, query_log):
+        """Test a filtered page costs two statements, then one once the counts are cached."""
+        client.get("/products/search?price=25-50&in_stock=true")
+        client.get("/products/search?price=0-25&sort=newest")
+        assert [stats.statement_count for stats in query_log] == [2, 1]
+
+    def test_admin_write_invalidates_counts(self, client, catalog, admin_headers):
+        """Test product writes refresh the cached counts."""
+        client.get("/products/search")
+        client.post("/admin/products", json={
+            "name": "Rug", "description": "Rug", "price": 300.0, "quantity": 2,
+        }, headers=admin_headers)
+        assert _facet(client.get("/products/search").json(), "price")["250-500"] == 1
+        client.put(f"/admin/products/{catalog[5].id}", json={"price": 60.0}, headers=admin_headers)
+        assert _facet(client.get("/products/search").json(), "price")["500+"] == 0
@@ -0,0 +1,118 @@
+from datetime import datetime
+import pytest
+from sqlalchemy import func, select, text
+from app import models
+from app.database import Base, make_engine
+from app.seed_db import SeedConfig, generate, main, reset, seed_demo
+
+HISTORY_END = datetime(2026, 1, 1)
+
+@pytest.fixture
+def seed_engine(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path / 'seed.db'}")
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+def _count(engine, model):
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(model.__table__)).scalar()
+
+def _config(**overrides):
+    values = dict(products=200, users=20, carts=10, orders=50, seed=7,
+                  batch_size=64, history_end=HISTORY_END)
+    values.update(overrides)
+    return SeedConfig(**values)
+
+class TestSyntheticData:
+    """Test bulk generation of synthetic data."""
+
+    def test_generates_requested_rows(self, seed_engine):
+        """Test generate inserts the requested numbers of rows."""
+        counts = generate(seed_engine, _config(), log=lambda message: None)
+        assert counts["products"] == _count(seed_engine, models.Product) == 200
+        assert counts["users"] == _count(seed_engine, models.User) == 20
+        assert counts["orders"] == _count(seed_engine, models.Order) == 50
+        assert counts["order_items"] == _count(seed_engine, models.OrderItem) >= 50
+        assert _count(seed_engine, models.CartItem) == counts["cart_items"] > 0
+
+    def test_order_totals_match_items(self, seed_engine):
+        """Test every order total equals the sum of its item prices."""
+        generate(seed_engine, _config(), log=lambda message: None)
+        query = text(
+            "SELECT o.id, o.total_price, SUM(i.price * i.quantity) FROM orders o "
+            "JOIN order_items i ON i.order_id = o.id GROUP BY o.id"
+        )
+        with seed_engine.connect() as conn:
+            for _, total, items_total in conn.execute(query):
+                assert total == pytest.approx(items_total, abs=0.01)
+
+    def test_same_seed_is_deterministic(self, tmp_path):
+        """Test the same seed produces identical data."""
+        snapshots = []
+        for name in ("a.db", "b.db"):
+            engine = make_engine(f"sqlite:///{tmp_path / name}")
+            Base.metadata.create_all(bind=engine)
+            generate(engine, _config(), log=lambda message: None)
+            with engine.connect() as conn:
+                snapshots.append((
+                    conn.execute(text("SELECT name, price, quantity, created_at FROM products ORDER BY id")).all(),
+                    conn.execute(text("SELECT user_id, total_price, created_at FROM orders ORDER BY id")).all(),
+                ))
+            engine.dispose()
+        assert snapshots[0] == snapshots[1]
+
+    def test_appends_to_existing_data(self, seed_engine):
+        """Test generation keeps existing rows and continues their ids."""
+        seed_demo(seed_engine)
+        generate(seed_engine, _config(orders=0, carts=0), log=lambda message: None)
+        assert _count(seed_engine, models.Product) == 204
+        assert _count(seed_engine, models.User) == 22
+        with seed_engine.connect() as conn:
+            names = set(conn.execute(select(models.Product.__table__.c.name)).scalars())
+        assert {"Laptop", "Desktop PC", "Monitor", "TV"} <= names
+
+class TestDemoAndReset:
+    """Test the demo dataset and the reset option."""
+
+    def test_demo_is_idempotent(self, seed_engine):
+        """Test seeding the demo data twice adds it only once."""
+        assert seed_demo(seed_engine) == {"users": 2, "products": 4}
+        assert seed_demo(seed_engine) == {"users": 0, "products": 0}
+        assert _count(seed_engine, models.User) == 2
+
+    def test_reset_only_clears_seeded_tables(self, seed_engine):
+        """Test reset clears every app table, including ones referring to users, and nothing else."""
+        with seed_engine.begin() as conn:
+            conn.execute(text("CREATE TABLE notes (id INTEGER PRIMARY KEY, body TEXT)"))
+            conn.execute(text("INSERT INTO notes (body) VALUES ('keep me')"))
+        generate(seed_engine, _config(), log=lambda message: None)
+        with seed_engine.begin() as conn:
+            conn.execute(models.CheckoutSession.__table__.insert(), {
+                "id": "cs_seeded", "user_id": 1, "total_price": 1.0, "items": "[]",
+                "created_at": HISTORY_END,
+            })
+            conn.execute(models.RevokedToken.__table__.insert(), {
+                "jti": "seeded", "user_id": 1, "expires_at": HISTORY_END,
+            })
+            conn.execute(models.Job.__table__.insert(), {
+                "kind": "analytics.record_order", "payload": "{}", "status": "queued",
+                "attempts": 0, "max_attempts": 5, "run_at": HISTORY_END, "created_at": HISTORY_END,
+            })
+        reset(seed_engine)
+        for model in (models.Product, models.User, models.CartItem, models.Order, models.OrderItem,
+                      models.CheckoutSession, models.RevokedToken, models.Job):
+            assert _count(seed_engine, model) == 0
+        with seed_engine.connect() as conn:
+            assert conn.execute(text("SELECT body FROM notes")).scalar() == "keep me"
+
+    def test_cli_does_not_wipe_by_default(self, seed_engine, tmp_path, capsys):
+        """Test the CLI adds data without deleting existing rows."""
+        with seed_engine.begin() as conn:
+            conn.execute(models.Product.__table__.insert(), {
+                "name": "Existing", "description": "kept", "price": 1.0,
+                "quantity": 1, "created_at": HISTORY_END,
+            })
+        main(["--database-url", str(seed_engine.url), "--products", "10", "--seed", "1"])
+        assert _count(seed_engine, models.Product) == 15
+        assert "seeded successfully" in capsys.readouterr().out
@@ -0,0 +1,146 @@
+import logging
+import pytest
+from unittest.mock import patch, MagicMock
+from fastapi import status
+from app import models
+from app.monitoring import sql
+from app.monitoring.context import RequestStats
+
+@pytest.fixture
+def three_products(db_session):
+    """Create three products."""
+    products = [
+        models.Product(name=f"Product {i}", description="Bulk", price=10.0 * i, quantity=10)
+        for i in range(1, 4)
+    ]
+    db_session.add_all(products)
+    db_session.commit()
+    return products
+
+@pytest.fixture
+def full_cart(client, auth_headers, three_products):
+    """Put three different products in the test user's cart."""
+    for product in three_products:
+        client.post("/cart/add", json={"product_id": product.id, "quantity": 1}, headers=auth_headers)
+    return three_products
+
+@pytest.fixture
+def order_history(db_session, test_user, three_products):
+    """Three orders for the test user, each with all three products."""
+    orders = [
+        models.Order(user_id=test_user.id, total_price=60.0, items=[
+            models.OrderItem(product_id=product.id, quantity=1, price=product.price) for product in three_products
+        ])
+        for _ in range(3)
+    ]
+    db_session.add_all(orders)
+    db_session.commit()
+    return orders
+
+class TestStatementShapes:
+    """Test statement normalization used by the N+1 detector."""
+
+    def test_whitespace_is_folded(self):
+        """Test formatting differences map to the same shape."""
+        assert sql.statement_shape("SELECT *\n  FROM products") == "SELECT * FROM products"
+
+    def test_in_lists_are_folded(self):
+        """Test expanded IN lists of different lengths share a shape."""
+        short = sql.statement_shape("SELECT * FROM products WHERE id IN (?, ?)")
+        long = sql.statement_shape("SELECT * FROM products WHERE id IN (?, ?, ?, ?)")
+        assert short == long
+
+    def test_repeated_statements_detected(self):
+        """Test shapes at or over the threshold are reported."""
+        stats = RequestStats("GET", "/cart/")
+        stats.statement_shapes = {"SELECT a": 3, "SELECT b": 1}
+        assert sql.find_repeated_statements(stats, threshold=3) == {"SELECT a": 3}
+
+class TestRequestInstrumentation:
+    """Test per-request statement counts, DB time and N+1 logging."""
+
+    def test_statements_recorded_with_parameters(self, client, test_product, query_log):
+        """Test statements and bound parameters are captured per request."""
+        client.get(f"/products/{test_product.id}")
+        stats = query_log[-1]
+        assert stats.route == "/products/{product_id}"
+        assert stats.statement_count == 1
+        assert stats.db_time > 0
+        statement, parameters = stats.statements[0]
+        assert "FROM products" in statement
+        assert test_product.id in tuple(parameters)
+
+    def test_n_plus_one_logged(self, caplog):
+        """Test a handler repeating a statement shape is flagged."""
+        stats = RequestStats("GET", "/cart/")
+        stats.route = "/cart/"
+        stats.statement_shapes = {"SELECT * FROM products WHERE products.id = ?": 5}
+        with caplog.at_level(logging.WARNING, logger="app.sql"):
+            sql._report_n_plus_one(stats)
+        assert "Possible N+1" in caplog.text
+
+    def test_slow_query_logged_with_parameters(self, client, test_product, caplog):
+        """Test statements over the slow threshold are logged with parameters."""
+        with patch.object(sql, "SLOW_QUERY_MS", 0), \
+                caplog.at_level(logging.WARNING, logger="app.sql"):
+            client.get(f"/products/{test_product.id}")
+        assert "Slow query" in caplog.text
+        assert f"({test_product.id}," in caplog.text
+
+class TestQueryBudgets:
+    """Per-endpoint query budgets; a new N+1 makes these fail."""
+
+    @pytest.mark.query_budget(1, route="/products/{product_id}")
+    def test_get_product_budget(self, client, test_product):
+        """Test fetching a product costs one statement."""
+        assert client.get(f"/products/{test_product.id}").status_code == status.HTTP_200_OK
+
+    @pytest.mark.query_budget(2, route="/cart/")
+    def test_view_cart_budget(self, client, auth_headers, full_cart):
+        """Test viewing a cart does not lazy-load each product."""
+        response = client.get("/cart/", headers=auth_headers)
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.json()) == 3
+
+    @pytest.mark.query_budget(4, route="/orders/")
+    def test_order_history_budget(self, client, auth_headers, order_history):
+        """Test a page of orders loads items and products in one query each."""
+        response = client.get("/orders/", headers=auth_headers)
+        assert len(response.json()["items"]) == 3
+
+    @pytest.mark.query_budget(2, route="/orders/")
+    def test_order_summary_budget(self, client, auth_headers, order_history):
+        """Test summary mode never touches order items."""
+        response = client.get("/orders/?summary=true", headers=auth_headers)
+        assert len(response.json()["items"]) == 3
+
+    @pytest.mark.query_budget(2, route="/orders/{order_id}")
+    def test_get_order_budget(self, client, auth_headers, order_history):
+        """Test one order is loaded with its items and products in one query."""
+        response = client.get(f"/orders/{order_history[0].id}", headers=auth_headers)
+        assert len(response.json()["items"]) == 3
+
+    # user, cart, products, checkout session
+    @pytest.mark.query_budget(4, route="/orders/checkout")
+    @patch('stripe.checkout.Session.create')
+    def test_checkout_budget(self, mock_stripe_create, client, auth_headers, full_cart):
+        """Test checkout loads all cart products in one query and stores one checkout session row."""
+        mock_session = MagicMock()
+        mock_session.id = "cs_test_1"
+        mock_session.url = "https://checkout.stripe.com/test"
+        mock_stripe_create.return_value = mock_session
+        response = client.post("/orders/checkout", headers=auth_headers)
+        assert response.status_code == status.HTTP_200_OK
+        assert len(mock_stripe_create.call_args[1]["line_items"]) == 3
+
+    # existing order, checkout session, claim it, order, items, cart rows, job,
+    # order reloaded after commit
+    @pytest.mark.query_budget(8, route="/orders/success")
+    def test_payment_success_budget(self, client, auth_headers, full_cart):
+        """Test confirming a payment writes the order and all its items in single statements."""
+        session = MagicMock(id="cs_test_1", url="https://checkout.stripe.com/test", payment_status="paid")
+        with patch("stripe.checkout.Session.create", return_value=session):
+            client.post("/orders/checkout", headers=auth_headers)
+        with patch("stripe.checkout.Session.retrieve", return_value=session):
+            response = client.get(f"/orders/success?session_id={session.id}")
+        assert response.status_code == status.HTTP_200_OK
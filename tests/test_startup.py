@@ -0,0 +1,138 @@
+import os
+import subprocess
+import sys
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlalchemy import inspect
+from app import database
+from app.auth import jwt_handler
+from app.config import Settings
+from app.main import create_app
+from app.monitoring import memory, sql
+from app.monitoring.profiling import ProfilingMiddleware, profile_store
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def restore_database():
+    """Put the module engine back after a test builds an app on another database."""
+    original = database.SQLALCHEMY_DATABASE_URL
+    yield
+    database.configure_database(original)
+
+class TestImportSideEffects:
+    """Importing the app must not touch the database or load heavy SDKs."""
+
+    def test_import_is_side_effect_free(self, tmp_path):
+        """Test importing app.main creates no database and defers heavy imports."""
+        code = (
+            "import sys, app.main; "
+            "print(','.join(m for m in ('stripe', 'passlib', 'jose') if m in sys.modules))"
+        )
+        env = dict(os.environ, PYTHONPATH=ROOT)
+        env.pop("DATABASE_URL", None)
+        result = subprocess.run(
+            [sys.executable, "-c", code], cwd=tmp_path, env=env,
+            capture_output=True, text=True, check=True,
+        )
+        assert result.stdout.strip() == ""
+        assert os.listdir(tmp_path) == []
+
+    def test_engine_built_from_settings_only(self, tmp_path):
+        """Test app.database reads no environment and builds no engine until configured."""
+        code = (
+            "from app import database; print(database.engine); "
+            "from app.config import Settings; from app.main import create_app; "
+            "create_app(Settings(database_url='sqlite:///./explicit.db', create_schema=False)); "
+            "print(database.engine.url)"
+        )
+        env = dict(os.environ, PYTHONPATH=ROOT, DATABASE_URL="sqlite:///./from_env.db")
+        result = subprocess.run(
+            [sys.executable, "-W", "ignore", "-c", code], cwd=tmp_path, env=env,
+            capture_output=True, text=True, check=True,
+        )
+        assert result.stdout.split() == ["None", "sqlite:///./explicit.db"]
+
+class TestAppFactory:
+    """Test create_app and the startup lifespan."""
+
+    def test_schema_created_on_startup(self, tmp_path, restore_database):
+        """Test tables are created by the lifespan, not at construction."""
+        url = f"sqlite:///{tmp_path / 'app.db'}"
+        app = create_app(Settings(database_url=url))
+        assert not inspect(database.engine).get_table_names()
+        with TestClient(app) as client:
+            assert client.get("/").status_code == status.HTTP_200_OK
+        assert "products" in inspect(database.engine).get_table_names()
+
+    def test_schema_creation_can_be_disabled(self, tmp_path, restore_database):
+        """Test create_schema=False leaves the database untouched."""
+        url = f"sqlite:///{tmp_path / 'app.db'}"
+        with TestClient(create_app(Settings(database_url=url, create_schema=False))):
+            pass
+        assert inspect(database.engine).get_table_names() == []
+
+    def test_warm_up(self, tmp_path, restore_database):
+        """Test warm-up initializes the password context and Stripe SDK."""
+        from app import payments
+        from app.auth.utils import get_pwd_context
+
+        get_pwd_context.cache_clear()
+        url = f"sqlite:///{tmp_path / 'app.db'}"
+        with TestClient(create_app(Settings(database_url=url, warm_up=True))):
+            assert get_pwd_context.cache_info().currsize == 1
+            assert payments._stripe is not None
+
+    def test_settings_configure_auth_and_monitoring(self, tmp_path, restore_database, monkeypatch):
+        """Test values passed to create_app reach token signing and monitoring."""
+        for module, name in (
+            (jwt_handler, "SECRET_KEY"), (jwt_handler, "ALGORITHM"), (jwt_handler, "ACCESS_TOKEN_EXPIRE_MINUTES"),
+            (sql, "SLOW_QUERY_MS"), (sql, "N_PLUS_ONE_THRESHOLD"), (memory, "TRACEMALLOC_FRAMES"),
+            (memory.memory_tracker, "max_snapshots"), (profile_store, "max_items"),
+        ):
+            monkeypatch.setattr(module, name, getattr(module, name))
+        app = create_app(Settings(
+            database_url=f"sqlite:///{tmp_path / 'app.db'}", secret_key="s3cret",
+            sql_slow_query_ms=7, profile_sample_rate=0.5, profile_max_stored=3, memory_max_snapshots=4,
+        ))
+        assert jwt_handler.SECRET_KEY == "s3cret"
+        assert sql.SLOW_QUERY_MS == 7
+        assert (profile_store.max_items, memory.memory_tracker.max_snapshots) == (3, 4)
+        (profiling,) = [m for m in app.user_middleware if m.cls is ProfilingMiddleware]
+        assert profiling.kwargs["sample_rate"] == 0.5
+
+class TestSettings:
+    """Test settings loading."""
+
+    def test_env_file_read_without_exporting(self, tmp_path, monkeypatch):
+        """Test .env values are used but not written into os.environ."""
+        env_file = tmp_path / ".env"
+        env_file.write_text("STRIPE_SECRET_KEY=sk_test_file\nWARM_UP=true\n")
+        monkeypatch.delenv("STRIPE_SECRET_KEY", raising=False)
+        monkeypatch.delenv("WARM_UP", raising=False)
+        settings = Settings.from_env(str(env_file))
+        assert settings.stripe_secret_key == "sk_test_file"
+        assert settings.warm_up is True
+        assert "STRIPE_SECRET_KEY" not in os.environ
+
+    def test_environment_overrides_env_file(self, tmp_path, monkeypatch):
+        """Test real environment variables win over the .env file."""
+        env_file = tmp_path / ".env"
+        env_file.write_text("DATABASE_URL=sqlite:///./from_file.db\n")
+        monkeypatch.setenv("DATABASE_URL", "sqlite:///./from_env.db")
+        assert Settings.from_env(str(env_file)).database_url == "sqlite:///./from_env.db"
+
+    def test_env_file_reaches_auth_and_monitoring(self, tmp_path, monkeypatch):
+        """Test the signing key and monitoring options can come from the .env file."""
+        env_file = tmp_path / ".env"
+        env_file.write_text(
+            "SECRET_KEY=from-file\nSQL_SLOW_QUERY_MS=250\nTRACEMALLOC=1\nREVOCATION_BLOOM_CAPACITY=500\n"
+        )
+        for name in ("SECRET_KEY", "SQL_SLOW_QUERY_MS", "TRACEMALLOC", "REVOCATION_BLOOM_CAPACITY"):
+            monkeypatch.delenv(name, raising=False)
+        settings = Settings.from_env(str(env_file))
+        assert settings.secret_key == "from-file"
+        assert settings.sql_slow_query_ms == 250.0
+        assert settings.tracemalloc is True
+        assert settings.revocation_bloom_capacity == 500
@@ -0,0 +1,153 @@
+import asyncio
+import threading
+import time
+import pytest
+from fastapi import status
+from app import models
+from app.cache import InMemoryCache
+from app.stream import StockBroadcaster, encode_event, stock_updates
+
+@pytest.fixture
+def shelf(db_session):
+    """Two products to follow."""
+    products = [
+        models.Product(name=f"Streamed {i}", description="Streamed", price=10.0 + i, quantity=5)
+        for i in range(2)
+    ]
+    db_session.add_all(products)
+    db_session.commit()
+    return products
+
+def _open_stream(client, path):
+    """Start a streaming request in a thread; returns a function giving its response."""
+    result = {}
+    before = stock_updates.subscriber_count()
+    thread = threading.Thread(target=lambda: result.update(response=client.get(path)))
+    thread.start()
+    deadline = time.monotonic() + 5
+    while stock_updates.subscriber_count() == before and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    def finish():
+        stock_updates.close()
+        thread.join(5)
+        return result["response"]
+    return finish
+
+def _events(response):
+    return [block for block in response.text.split("\n\n") if block.startswith("event:")]
+
+class TestStockStream:
+    """Test the Server-Sent Events endpoint."""
+
+    def test_snapshot_then_changes(self, client, shelf, admin_headers):
+        """Test the stream starts with current values and pushes admin updates."""
+        first, second = shelf
+        finish = _open_stream(client, f"/products/stream?ids={first.id},{second.id},999")
+        client.put(f"/admin/products/{first.id}", json={"quantity": 2, "price": 8.5}, headers=admin_headers)
+        client.delete(f"/admin/products/{second.id}", headers=admin_headers)
+        response = finish()
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert _events(response) == [
+            f'event: stock\ndata: {{"id":{first.id},"price":10.0,"quantity":5}}',
+            f'event: stock\ndata: {{"id":{second.id},"price":11.0,"quantity":5}}',
+            f'event: stock\ndata: {{"id":{first.id},"price":8.5,"quantity":2}}',
+            f'event: stock\ndata: {{"id":{second.id},"deleted":true}}',
+        ]
+
+    def test_other_products_not_sent(self, client, shelf, admin_headers):
+        """Test a stream only receives changes of the products it asked for."""
+        first, second = shelf
+        finish = _open_stream(client, f"/products/stream?ids={first.id}")
+        client.put(f"/admin/products/{second.id}", json={"quantity": 1}, headers=admin_headers)
+        assert len(_events(finish())) == 1
+
+    def test_closed_stream_unsubscribes(self, client, shelf):
+        """Test finished streams leave no subscription behind."""
+        _open_stream(client, f"/products/stream?ids={shelf[0].id}")()
+        assert stock_updates.subscriber_count() == 0
+
+    def test_connection_released_while_streaming(self, client, db_session, shelf):
+        """Test the snapshot's transaction ends before the stream, not with it."""
+        pool = db_session.get_bind().pool
+        before = pool.checkedout()
+        finish = _open_stream(client, f"/products/stream?ids={shelf[0].id}")
+        deadline = time.monotonic() + 5
+        while db_session.in_transaction() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        try:
+            assert not db_session.in_transaction()
+            assert pool.checkedout() == before
+        finally:
+            finish()
+
+    @pytest.mark.parametrize("ids", ["", "a,b", ",".join(str(i) for i in range(1, 52))])
+    def test_invalid_ids(self, client, ids):
+        """Test missing, malformed and too many ids are rejected."""
+        response = client.get(f"/products/stream?ids={ids}")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+class TestBroadcaster:
+    """Test fan-out and per-client buffering."""
+
+    def test_one_encoding_shared_by_subscribers(self):
+        """Test every subscriber receives the same encoded event object."""
+        broadcaster = StockBroadcaster()
+        first, second = broadcaster.subscribe([1]), broadcaster.subscribe([1, 2])
+        broadcaster.publish([{"id": 1, "quantity": 3}])
+        assert first._pending[1] is second._pending[1]
+        assert 2 not in second._pending
+
+    def test_slow_client_buffer_is_bounded(self):
+        """Test unread changes of a product collapse into the latest one."""
+        broadcaster = StockBroadcaster()
+        subscription = broadcaster.subscribe([1, 2])
+        for quantity in range(100):
+            broadcaster.publish([{"id": 1, "quantity": quantity}, {"id": 2, "quantity": quantity}])
+        subscription.close()
+
+        async def read():
+            return [event async for event in subscription.events()]
+        assert asyncio.run(read()) == [
+            encode_event({"id": 1, "quantity": 99}), encode_event({"id": 2, "quantity": 99}),
+        ]
+
+    def test_heartbeat(self):
+        """Test idle streams get keep-alive comments."""
+        subscription = StockBroadcaster().subscribe([1])
+
+        async def first_event():
+            return await subscription.events(heartbeat=0.01).__anext__()
+        assert asyncio.run(first_event()) == b": keep-alive\n\n"
+
+    def test_subscribe_from_worker_thread(self):
+        """Test subscriptions made in a thread without an event loop still stream."""
+        broadcaster = StockBroadcaster()
+        made = []
+        thread = threading.Thread(target=lambda: made.append(broadcaster.subscribe([1])))
+        thread.start()
+        thread.join(5)
+        (subscription,) = made
+
+        async def first_event():
+            events = subscription.events(heartbeat=5)
+            asyncio.get_running_loop().call_later(
+                0.01, threading.Thread(target=broadcaster.publish, args=([{"id": 1, "quantity": 2}],)).start
+            )
+            return await events.__anext__()
+        assert asyncio.run(first_event()) == encode_event({"id": 1, "quantity": 2})
+
+    def test_across_workers(self):
+        """Test changes published by one worker reach streams of another."""
+        backend = InMemoryCache()
+        first, second = StockBroadcaster(), StockBroadcaster()
+        first.attach(backend)
+        second.attach(backend)
+        try:
+            subscription = second.subscribe([7])
+            first.publish([{"id": 7, "price": 1.0}])
+            assert subscription._pending == {7: encode_event({"id": 7, "price": 1.0})}
+        finally:
+            first.detach()
+            second.detach()
@@ -0,0 +1,181 @@
+import time
+from datetime import datetime, timedelta
+from fastapi import status
+from fastapi.testclient import TestClient
+from app import models
+from app.auth.jwt_handler import create_access_token, create_user_token, verify_token
+from app.auth.revocation import BloomFilter, RevocationRegistry, revocations
+from app.cache import FakeCacheServer
+from app.database import get_db
+from app.main import app
+
+def _login(client, email, password):
+    response = client.post("/users/login", json={"email": email, "password": password})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+class TestTokenClaims:
+    """Test the claims carried by issued tokens."""
+
+    def test_login_token_claims(self, client, test_user):
+        """Test login tokens carry role, version and a unique id."""
+        headers = _login(client, test_user.email, "testpassword")
+        payload = verify_token(headers["Authorization"].split()[1])
+        assert payload["sub"] == str(test_user.id)
+        assert payload["role"] == "user"
+        assert payload["ver"] == 0
+        assert len(payload["jti"]) == 32
+
+    def test_admin_check_reads_only_the_user_row(self, client, test_admin, query_log):
+        """Test admin routes authorize with one primary-key read of the user."""
+        headers = {"Authorization": f"Bearer {create_user_token(test_admin)}"}
+        response = client.get("/admin/products", headers=headers)
+        assert response.status_code == status.HTTP_200_OK
+        (stats,) = query_log
+        assert stats.statement_count == 2
+        assert sum("FROM users" in statement for statement, _ in stats.statements) == 1
+
+    def test_demoted_admin_token_refused(self, client, db_session, test_admin):
+        """Test an admin role claim is not honoured once the user is no longer an admin."""
+        headers = {"Authorization": f"Bearer {create_user_token(test_admin)}"}
+        test_admin.is_admin = False
+        db_session.commit()
+        response = client.get("/admin/products", headers=headers)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_admin_version_bumped_elsewhere(self, client, db_session, test_admin):
+        """Test an admin token older than the user's token version is refused."""
+        headers = {"Authorization": f"Bearer {create_user_token(test_admin)}"}
+        test_admin.token_version = 1
+        db_session.commit()
+        response = client.get("/admin/products", headers=headers)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_user_role_forbidden(self, client, test_user):
+        """Test a user role claim is refused by admin routes."""
+        headers = {"Authorization": f"Bearer {create_user_token(test_user)}"}
+        response = client.get("/admin/products", headers=headers)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_legacy_token_uses_database(self, client, admin_headers):
+        """Test tokens without a role claim are still checked against the user row."""
+        response = client.get("/admin/products", headers=admin_headers)
+        assert response.status_code == status.HTTP_200_OK
+
+class TestLogout:
+    """Test revoking tokens."""
+
+    def test_logout_revokes_only_that_token(self, client, test_user):
+        """Test logging out rejects the token but not the user's other tokens."""
+        first = _login(client, test_user.email, "testpassword")
+        second = _login(client, test_user.email, "testpassword")
+        assert client.post("/users/logout", headers=first).status_code == status.HTTP_200_OK
+        response = client.get("/users/me", headers=first)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response.json()["detail"] == "Token has been revoked"
+        assert client.get("/users/me", headers=second).status_code == status.HTTP_200_OK
+
+    def test_logout_is_persisted(self, client, db_session, test_user):
+        """Test revoked token ids are stored for other workers and restarts."""
+        headers = _login(client, test_user.email, "testpassword")
+        client.post("/users/logout", headers=headers)
+        jti = verify_token(headers["Authorization"].split()[1])["jti"]
+        row = db_session.query(models.RevokedToken).filter_by(jti=jti).one()
+        assert row.user_id == test_user.id
+
+    def test_logout_all_revokes_every_token(self, client, test_user):
+        """Test bumping the token version invalidates all existing tokens."""
+        first = _login(client, test_user.email, "testpassword")
+        second = _login(client, test_user.email, "testpassword")
+        assert client.post("/users/logout-all", headers=first).status_code == status.HTTP_200_OK
+        for headers in (first, second):
+            assert client.get("/users/me", headers=headers).status_code == status.HTTP_401_UNAUTHORIZED
+        fresh = _login(client, test_user.email, "testpassword")
+        assert client.get("/users/me", headers=fresh).status_code == status.HTTP_200_OK
+
+    def test_version_bumped_elsewhere(self, client, db_session, test_user):
+        """Test a version bump this worker has not heard about is caught by the user row."""
+        headers = _login(client, test_user.email, "testpassword")
+        test_user.token_version = 3
+        db_session.commit()
+        assert client.get("/users/me", headers=headers).status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_revoked_admin_token(self, client, test_admin):
+        """Test a revoked admin token is refused."""
+        headers = {"Authorization": f"Bearer {create_user_token(test_admin)}"}
+        client.post("/users/logout", headers=headers)
+        response = client.get("/admin/products", headers=headers)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+class TestRevocationRegistry:
+    """Test the Bloom filter and registry directly."""
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        """Test every added item is found and false positives stay rare."""
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        added = [f"token-{i}" for i in range(1000)]
+        for item in added:
+            bloom.add(item)
+        assert all(item in bloom for item in added)
+        false_positives = sum(f"other-{i}" in bloom for i in range(10_000))
+        assert false_positives < 300
+
+    def test_purge_drops_expired(self):
+        """Test purging forgets revocations of tokens that have expired anyway."""
+        registry = RevocationRegistry(capacity=100)
+        registry.revoke("old", time.time() - 1)
+        registry.revoke("live", time.time() + 60)
+        registry.purge_expired()
+        assert not registry.is_revoked("old")
+        assert registry.is_revoked("live")
+
+    def test_revocations_reach_other_workers(self):
+        """Test revocations and version bumps travel over pub/sub."""
+        server = FakeCacheServer()
+        first, second = RevocationRegistry(capacity=100), RevocationRegistry(capacity=100)
+        first.attach(server.client())
+        second.attach(server.client())
+        first.revoke("abc", time.time() + 60)
+        first.set_version(7, 2)
+        assert second.is_revoked("abc")
+        assert not second.version_is_current(7, 1)
+        assert second.version_is_current(7, 2)
+        first.detach()
+        second.detach()
+
+    def test_load_from_database(self, db_session, test_user):
+        """Test startup replaces the registry with unexpired revocations and bumped versions."""
+        db_session.add_all([
+            models.RevokedToken(jti="live", user_id=test_user.id, expires_at=datetime.utcnow() + timedelta(minutes=5)),
+            models.RevokedToken(jti="expired", user_id=test_user.id, expires_at=datetime.utcnow() - timedelta(minutes=5)),
+        ])
+        test_user.token_version = 2
+        db_session.commit()
+        registry = RevocationRegistry(capacity=100)
+        registry.set_version(99, 3, publish=False)
+        registry.load(db_session)
+        assert registry.version_is_current(99, 0)
+        assert registry.is_revoked("live")
+        assert not registry.is_revoked("expired")
+        assert db_session.query(models.RevokedToken).count() == 1
+        token = create_access_token({"sub": str(test_user.id), "ver": 1})
+        assert registry.is_token_revoked(verify_token(token))
+
+    def test_loaded_at_startup(self, db_session, test_user, monkeypatch):
+        """Test startup sizes the registry from settings and fills it through get_db."""
+        db_session.add(models.RevokedToken(
+            jti="startup", user_id=test_user.id, expires_at=datetime.utcnow() + timedelta(minutes=5)
+        ))
+        db_session.commit()
+
+        def override_get_db():
+            yield db_session
+
+        app.dependency_overrides[get_db] = override_get_db
+        monkeypatch.setattr(app.state.settings, "revocation_bloom_capacity", 500)
+        try:
+            with TestClient(app):
+                assert revocations.is_revoked("startup")
+                assert revocations.capacity == 500
+        finally:
+            app.dependency_overrides.clear()
+            revocations.clear()